@@ -0,0 +1,215 @@
+# AgenticWorkers/Embeddings/backfill.py
+# (Re)embed a whole table, e.g. after a model change, without going row by
+# row through embedding_jobs:
+#
+#   python backfill.py usergrievance                 # every row
+#   python backfill.py auditlog --missing-only       # rows without an embedding
+#   python backfill.py usergrievance --restart       # ignore the checkpoint
+#
+# Rows are streamed through a named (server-side) cursor in id order,
+# embedded in large batches and written back with binary COPY + UPDATE ...
+# FROM. Rows whose stored text hash still matches are skipped. The last
+# written id is checkpointed after every batch, so an interrupted run
+# resumes where it stopped; a finished scan removes its checkpoint.
+import argparse
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# queue_worker first: it loads .env and configures logging
+from queue_worker import TEXT_COLUMNS, StopSignal, text_for_table, text_hash
+from config import Config
+from db import (
+    get_connection,
+    id_type,
+    normalize_table_name,
+    pooled_connection,
+    text_projection,
+    write_embeddings,
+)
+from embedding_engine import EmbeddingEngine
+
+logger = logging.getLogger(__name__)
+
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class Checkpoint:
+    """Last written id per table, in a small JSON file (written atomically)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.data: Dict[str, Any] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    @property
+    def last_id(self) -> Optional[str]:
+        return self.data.get("last_id")
+
+    def save(self, **fields: Any) -> None:
+        self.data.update(fields, updated_at=time.time())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        """Forget the table's progress once the whole scan has finished"""
+        self.data = {}
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def backfill(
+    table_name: str,
+    batch_size: int = Config.BACKFILL_BATCH_SIZE,
+    missing_only: bool = False,
+    checkpoint_path: Optional[Path] = None,
+    restart: bool = False,
+    stop: Optional[StopSignal] = None,
+) -> int:
+    """
+    Embed every row of `table_name`. Returns the number of rows written
+    (including earlier runs resumed from the checkpoint). A set `stop` ends
+    the run after the current batch is committed and checkpointed.
+    """
+    full_table = normalize_table_name(table_name)
+    base = full_table.split(".")[-1]
+    checkpoint = Checkpoint(checkpoint_path or Path(Config.BACKFILL_CHECKPOINT_DIR) / f"{base}.json")
+    if restart:
+        checkpoint.data = {}
+    elif checkpoint.last_id and checkpoint.data.get("model") != Config.EMBEDDING_MODEL:
+        # Rows before the checkpoint carry the old model's vectors
+        logger.warning(
+            "Checkpoint was written with model %s, now %s; restarting %s from the first row",
+            checkpoint.data.get("model"), Config.EMBEDDING_MODEL, full_table,
+        )
+        checkpoint.data = {}
+    if checkpoint.last_id:
+        logger.info("Resuming %s after id %s (%s rows done)", full_table, checkpoint.last_id, checkpoint.data.get("rows_done", 0))
+
+    engine = EmbeddingEngine()
+    reader = get_connection()
+    written_total = int(checkpoint.data.get("rows_done", 0))
+    done_this_run = 0
+    unchanged = 0
+    finished = False
+    started = time.time()
+    try:
+        select = text_projection(full_table, TEXT_COLUMNS.get(base), reader, with_hash=True)
+        key_type = id_type(full_table, reader)
+        where = ["(%s::text IS NULL OR id > %s::" + key_type + ")"]
+        if missing_only:
+            where.append("embedding IS NULL")
+        where_sql = " AND ".join(where)
+        params = (checkpoint.last_id, checkpoint.last_id)
+
+        with reader.cursor() as cur:
+            cur.execute(f"SELECT count(*) FROM {full_table} WHERE {where_sql}", params)
+            remaining = cur.fetchone()[0]
+        logger.info("Backfilling %s: %s rows to go (batch_size=%s)", full_table, remaining, batch_size)
+
+        # Named cursor: rows are streamed from the server batch by batch
+        with reader.cursor(name=f"backfill_{base}") as cur:
+            cur.itersize = batch_size
+            cur.execute(f"SELECT {select} FROM {full_table} WHERE {where_sql} ORDER BY id", params)
+            last_log = 0.0
+            while not (stop and stop.requested):
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    finished = True
+                    break
+                # A named cursor only has a description after the first fetch
+                columns = [d[0] for d in cur.description]
+                keys, texts, digests = [], [], []
+                for values in rows:
+                    row = dict(zip(columns, values))
+                    key = row.pop("_row_key")
+                    stored_hash = row.pop("_text_hash")
+                    text = text_for_table(full_table, row)
+                    if not text:
+                        continue
+                    digest = text_hash(text)
+                    if digest == stored_hash:
+                        unchanged += 1
+                        continue
+                    keys.append(key)
+                    texts.append(text)
+                    digests.append(digest)
+                last_key = rows[-1][0]
+
+                embeddings = engine.encode_batch(texts) if texts else []
+                with pooled_connection() as writer:
+                    written = write_embeddings(
+                        full_table, [(k, e, d) for k, e, d in zip(keys, embeddings, digests) if e], conn=writer
+                    )
+                    writer.commit()
+                # Only checkpoint what is committed
+                written_total += written
+                done_this_run += len(rows)
+                checkpoint.save(
+                    table=full_table, last_id=last_key, rows_done=written_total, model=Config.EMBEDDING_MODEL
+                )
+
+                now = time.time()
+                if now - last_log >= Config.BACKFILL_LOG_INTERVAL_SEC:
+                    last_log = now
+                    rate = done_this_run / max(now - started, 1e-9)
+                    left = max(remaining - done_this_run, 0)
+                    logger.info(
+                        "%s: %s/%s rows (%.1f%%), %.0f rows/s, ETA %s",
+                        full_table, done_this_run, remaining,
+                        100.0 * done_this_run / remaining if remaining else 100.0,
+                        rate, _format_eta(left / rate) if rate else "?",
+                    )
+        reader.commit()
+        if finished:
+            # A leftover last_id would make later runs skip every newer row
+            # whose (random uuid) id sorts below it
+            checkpoint.clear()
+    finally:
+        try:
+            reader.close()
+        except Exception:
+            pass
+
+    elapsed = time.time() - started
+    logger.info(
+        "Backfill of %s %s: %s rows read, %s unchanged, %s embeddings written in %s (%.0f rows/s)",
+        full_table, "finished" if finished else "stopped (resume by running it again)",
+        done_this_run, unchanged, written_total, _format_eta(elapsed), done_this_run / max(elapsed, 1e-9),
+    )
+    return written_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a whole table through the embedding model")
+    parser.add_argument("table", help="Table to (re)embed, e.g. usergrievance or public.faqs")
+    parser.add_argument("--batch-size", type=int, default=Config.BACKFILL_BATCH_SIZE, help="Rows per fetch/encode/write")
+    parser.add_argument("--missing-only", action="store_true", help="Only rows whose embedding IS NULL")
+    parser.add_argument("--checkpoint", type=Path, default=None, help="Checkpoint file (default: per table)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first row")
+    args = parser.parse_args()
+
+    stop = StopSignal()
+    stop.install()
+    backfill(args.table, args.batch_size, args.missing_only, args.checkpoint, args.restart, stop=stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -39,10 +39,68 @@ class Config:
         )
         return f"{base}?sslmode=require"
 
+    # poll: sleep POLL_INTERVAL_SEC when the queue is empty.
+    # listen: block on LISTEN (see DB/embedding_jobs_notify.sql), polling
+    # only every LISTEN_FALLBACK_SEC in case a notification was missed.
+    WAKEUP_MODE = os.environ.get("EMBEDDING_WAKEUP_MODE", "poll").lower()
+    # Must match the channel argument of the trigger in DB/embedding_jobs_notify.sql
+    NOTIFY_CHANNEL = os.environ.get("EMBEDDING_NOTIFY_CHANNEL", "embedding_jobs")
+    LISTEN_FALLBACK_SEC = float(os.environ.get("EMBEDDING_LISTEN_FALLBACK_SEC", "30"))
+    # LISTEN needs a session connection; the transaction-mode pooler (port 6543)
+    # drops notifications. Use the direct host (5432) or the session pooler.
+    # Required for listen mode: without it the worker polls.
+    LISTEN_DATABASE_URL = os.environ.get("EMBEDDING_LISTEN_DATABASE_URL", "").strip()
+
+    @classmethod
+    def listen_dsn(cls) -> str:
+        """DSN for the LISTEN connection (EMBEDDING_LISTEN_DATABASE_URL)"""
+        if not cls.LISTEN_DATABASE_URL:
+            raise ValueError("EMBEDDING_LISTEN_DATABASE_URL is required for EMBEDDING_WAKEUP_MODE=listen")
+        if "sslmode=" in cls.LISTEN_DATABASE_URL:
+            return cls.LISTEN_DATABASE_URL
+        joiner = "&" if "?" in cls.LISTEN_DATABASE_URL else "?"
+        return f"{cls.LISTEN_DATABASE_URL}{joiner}sslmode=require"
+
     EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")  # 384-dim
+    # torch | onnx: int8 model exported by VectorDBWorker/onnx_export.py
+    EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch").lower()
+    EMBEDDING_ONNX_PATH = os.environ.get(
+        "EMBEDDING_ONNX_PATH", str(Path.home() / ".cache" / "igrs" / "onnx" / "all-MiniLM-L6-v2")
+    )
+    EMBEDDING_ONNX_THREADS = int(os.environ.get("EMBEDDING_ONNX_THREADS", "0"))
     POLL_INTERVAL_SEC = float(os.environ.get("EMBEDDING_POLL_INTERVAL_SEC", "2.0"))
-    BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "10"))
+    BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "10"))  # Jobs claimed per batch
+    # Share of each claimed batch per table (unlisted tables weigh 1), so
+    # backfills of auditlog/citizens can't delay fresh grievances
+    TABLE_WEIGHTS = os.environ.get("EMBEDDING_TABLE_WEIGHTS", "usergrievance=8")
+    ENCODE_BATCH_SIZE = int(os.environ.get("EMBEDDING_ENCODE_BATCH_SIZE", "32"))  # Texts per forward pass
+    # Idle connections kept open between batches (each batch runs on one connection)
+    DB_POOL_SIZE = int(os.environ.get("EMBEDDING_DB_POOL_SIZE", "2"))
+    # Idle connections older than this are pinged before reuse (the pooler may have dropped them)
+    DB_POOL_PING_AFTER_SEC = float(os.environ.get("EMBEDDING_DB_POOL_PING_AFTER_SEC", "10"))
 
     # Requeue safety: if a worker crashes mid-job, rows can stay "processing".
     REQUEUE_STUCK_AFTER_SEC = int(os.environ.get("EMBEDDING_REQUEUE_STUCK_AFTER_SEC", "900"))  # 15 min
     REQUEUE_FAILED_AFTER_SEC = int(os.environ.get("EMBEDDING_REQUEUE_FAILED_AFTER_SEC", "3600"))  # 1 hour
+    REQUEUE_CHECK_INTERVAL_SEC = float(os.environ.get("EMBEDDING_REQUEUE_CHECK_INTERVAL_SEC", "60"))
+
+    # Multi-process mode (supervisor.py): N forked workers, each with its own model.
+    # Affinity pins processes to tables, e.g. "usergrievance=2,auditlog+citizens=1";
+    # processes beyond the pinned ones take jobs for any table.
+    WORKER_PROCESSES = int(os.environ.get("EMBEDDING_WORKER_PROCESSES", "1"))
+    TABLE_AFFINITY = os.environ.get("EMBEDDING_TABLE_AFFINITY", "").strip()
+    HEALTH_INTERVAL_SEC = float(os.environ.get("EMBEDDING_HEALTH_INTERVAL_SEC", "60"))
+    WORKER_STALL_SEC = float(os.environ.get("EMBEDDING_WORKER_STALL_SEC", "300"))  # No heartbeat for this long = stalled
+    SHUTDOWN_TIMEOUT_SEC = float(os.environ.get("EMBEDDING_SHUTDOWN_TIMEOUT_SEC", "60"))
+    HEALTH_FILE = os.environ.get("EMBEDDING_HEALTH_FILE", "").strip()  # Optional JSON health report path
+
+    # Prometheus text /metrics endpoint (0 = off). Under the supervisor,
+    # worker N listens on METRICS_PORT + N.
+    METRICS_PORT = int(os.environ.get("EMBEDDING_METRICS_PORT", "0"))
+    METRICS_ADDR = os.environ.get("EMBEDDING_METRICS_ADDR", "0.0.0.0")
+    METRICS_LOG_INTERVAL_SEC = float(os.environ.get("EMBEDDING_METRICS_LOG_INTERVAL_SEC", "60"))  # 0 = no summary line
+
+    # Full-table backfill (backfill.py): rows per streamed fetch / encode / write
+    BACKFILL_BATCH_SIZE = int(os.environ.get("EMBEDDING_BACKFILL_BATCH_SIZE", "512"))
+    BACKFILL_CHECKPOINT_DIR = os.environ.get("EMBEDDING_BACKFILL_CHECKPOINT_DIR") or str(BASE_DIR / ".backfill")
+    BACKFILL_LOG_INTERVAL_SEC = float(os.environ.get("EMBEDDING_BACKFILL_LOG_INTERVAL_SEC", "10"))
@@ -1,22 +1,34 @@
 # AgenticWorkers/Embeddings/db.py
 # DB helpers for async embedding worker: fetch pending, mark processing, update embedding.
+import io
+import logging
+import os
 import re
+import struct
 import time
 import random
+import select
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
 import psycopg2
 from psycopg2 import OperationalError, InterfaceError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, quote_ident
 from psycopg2.extras import RealDictCursor
-from typing import List, Optional, Dict, Any
+import numpy as np
+from typing import List, Optional, Dict, Any, Iterator, Sequence, Tuple
 
 from config import Config
 
+logger = logging.getLogger(__name__)
 
-def get_connection():
+
+def get_connection(dsn: Optional[str] = None):
     """
     Create a short-lived connection with retry.
     Supabase pooler/direct both require SSL; DSN comes from Config.supabase_dsn().
     """
-    dsn = Config.supabase_dsn()
+    dsn = dsn or Config.supabase_dsn()
     last_err = None
     for attempt in range(1, 6):
         try:
@@ -38,6 +50,185 @@ def get_connection():
     raise last_err
 
 
+class _ConnectionPool:
+    """
+    Keeps up to `size` idle connections for reuse, so the worker pays the
+    SSL handshake to the Supabase pooler once instead of once per statement.
+    New connections come from get_connection() and inherit its retries.
+    Connections idle for longer than DB_POOL_PING_AFTER_SEC are pinged
+    before reuse: `closed` stays 0 for a socket the server already dropped.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: List[Tuple[Any, float]] = []  # (connection, released at)
+        # Idle connections inherited from the parent after a fork. Only kept
+        # referenced so they are never garbage-collected: psycopg2 closes a
+        # connection when it is collected, which would end the parent's session.
+        self._inherited: List[Tuple[Any, float]] = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, released_at = self._idle.pop()
+            if conn.closed:
+                continue
+            if time.monotonic() - released_at < Config.DB_POOL_PING_AFTER_SEC or _ping(conn):
+                return conn
+            try:
+                conn.close()
+            except Exception:
+                pass
+        return get_connection()
+
+    def release(self, conn, discard: bool = False) -> None:
+        if not discard and not conn.closed:
+            try:
+                # Never hand out a connection with someone else's open transaction
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                with self._lock:
+                    if len(self._idle) < self.size:
+                        self._idle.append((conn, time.monotonic()))
+                        return
+            except (OperationalError, InterfaceError):
+                pass
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def forget_after_fork(self) -> None:
+        # Connections inherited from the parent share its sockets; closing them
+        # here would end the parent's sessions, so just never touch them again
+        # The child is single-threaded here, and the old lock may have been
+        # held by a parent thread at fork time: replace it before anything else
+        self._lock = threading.Lock()
+        self._inherited.extend(self._idle)
+        self._idle = []
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def _ping(conn) -> bool:
+    """True if an idle connection still answers"""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except (OperationalError, InterfaceError):
+        return False
+
+
+_pool = _ConnectionPool(Config.DB_POOL_SIZE)
+os.register_at_fork(after_in_child=_pool.forget_after_fork)
+
+
+@contextmanager
+def pooled_connection() -> Iterator[Any]:
+    """
+    Borrow a pooled connection for a unit of work (e.g. one claimed batch).
+    The caller commits; anything left uncommitted is rolled back on return.
+    Connections that hit a connection-level error are closed, not reused.
+    """
+    conn = _pool.acquire()
+    broken = False
+    try:
+        yield conn
+    except (OperationalError, InterfaceError):
+        broken = True
+        raise
+    finally:
+        _pool.release(conn, discard=broken or bool(conn.closed))
+
+
+@contextmanager
+def _borrowed(conn=None) -> Iterator[Any]:
+    """Run on the caller's connection (caller commits), or on a pooled one committed here"""
+    if conn is not None:
+        yield conn
+        return
+    with pooled_connection() as own:
+        yield own
+        own.commit()
+
+
+class JobListener:
+    """
+    Dedicated session connection LISTENing for new embedding_jobs, so an
+    idle worker sleeps in select() instead of re-running the claim query.
+
+    Notifications that arrive while the worker is busy queue up on the
+    connection, so a wait() right after an empty claim cannot miss them.
+    With `tables`, only jobs for those tables wake the worker.
+    """
+
+    def __init__(self, channel: Optional[str] = None, tables: Optional[Sequence[str]] = None):
+        self.channel = _safe_ident(channel or Config.NOTIFY_CHANNEL)
+        self.tables = set(table_name_variants(tables)) if tables else None
+        self._conn = None
+
+    def _connect(self) -> None:
+        conn = get_connection(Config.listen_dsn())
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {self.channel}")
+        self._conn = conn
+
+    def start(self) -> None:
+        """LISTEN before the first claim, so no insert can fall in between"""
+        if self._conn is None:
+            self._connect()
+
+    def wait(self, timeout: float, interrupt=None) -> bool:
+        """
+        Block until a job is enqueued, `timeout` passes or `interrupt` (any
+        object with fileno(), e.g. a shutdown pipe) becomes readable.
+        Returns True when woken by a notification; False otherwise, including
+        when the connection is down (the caller then simply polls).
+        """
+        extra = [interrupt] if interrupt is not None else []
+        deadline = time.monotonic() + timeout
+        try:
+            self.start()
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                ready, _, _ = select.select([self._conn] + extra, [], [], remaining)
+                if not ready or interrupt in ready:
+                    return False
+                self._conn.poll()
+                payloads = [n.payload for n in self._conn.notifies]
+                self._conn.notifies.clear()
+                if self.tables is None or any(p in self.tables for p in payloads):
+                    return True
+        except (OperationalError, InterfaceError, OSError):
+            # Polling fallback until the connection comes back
+            self.close()
+            select.select(extra, [], [], max(0.0, deadline - time.monotonic()))
+            return False
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
 _IDENT_RE = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_\.]*$")
 _JOB_TABLE = "public.embedding_jobs"
 
@@ -61,8 +252,7 @@ def claim_pending(limit: int = 10, table: Optional[str] = None) -> List[Dict[str
     and is safe to run continuously with multiple workers.
     """
     table = _safe_ident(table or Config.GRIEVANCE_TABLE)
-    conn = get_connection()
-    try:
+    with pooled_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
                 f"""
@@ -85,11 +275,6 @@ def claim_pending(limit: int = 10, table: Optional[str] = None) -> List[Dict[str
             rows = list(cur.fetchall())
         conn.commit()
         return rows
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
 
 # ---------------------------------------------------------------------------
@@ -155,8 +340,7 @@ def requeue_stuck(table: Optional[str] = None) -> int:
     This makes the worker “keep running” without manual resets.
     """
     table = _safe_ident(table or Config.GRIEVANCE_TABLE)
-    conn = get_connection()
-    try:
+    with pooled_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 f"""
@@ -182,11 +366,6 @@ def requeue_stuck(table: Optional[str] = None) -> int:
 
         conn.commit()
         return int(n_processing + n_failed)
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
 
 # ---------------------------------------------------------------------------
@@ -194,21 +373,174 @@ def requeue_stuck(table: Optional[str] = None) -> int:
 # ---------------------------------------------------------------------------
 
 
-def claim_jobs(limit: int = 10) -> List[Dict[str, Any]]:
+def table_name_variants(tables: Sequence[str]) -> List[str]:
+    """Both spellings found in embedding_jobs.table_name: 'faqs' and 'public.faqs'"""
+    names = []
+    for table in tables:
+        full = _normalize_table_name(table)
+        names.append(full)
+        if full.startswith("public."):
+            names.append(full[len("public."):])
+    return names
+
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    """ "usergrievance=8,faqs=2" -> {"usergrievance": 8.0, "faqs": 2.0} (keys without schema)"""
+    weights: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        name, sep, value = part.strip().partition("=")
+        if not sep:
+            continue
+        weight = float(value)
+        if weight <= 0:
+            raise ValueError(f"Table weight must be positive: {part!r}")
+        weights[name.strip().split(".")[-1]] = weight
+    return weights
+
+
+_TABLE_WEIGHTS = _parse_weights(Config.TABLE_WEIGHTS)
+# Smooth weighted round-robin state: per-table credit carried between claims,
+# so small batches still converge on the configured shares
+_credits: Dict[str, float] = {}
+_credits_lock = threading.Lock()
+
+
+def _plan_quotas(tables: Sequence[str], limit: int) -> Dict[str, int]:
+    """Split `limit` claim slots across (normalized) tables with pending work, by weight"""
+    weights = {t: _TABLE_WEIGHTS.get(t.split(".")[-1], 1.0) for t in tables}
+    total = sum(weights.values())
+    quotas = dict.fromkeys(weights, 0)
+    with _credits_lock:
+        # Idle tables don't bank credit for later
+        for table in list(_credits):
+            if table not in weights:
+                del _credits[table]
+        for _ in range(limit):
+            for table, weight in weights.items():
+                _credits[table] = _credits.get(table, 0.0) + weight
+            best = max(weights, key=lambda t: _credits[t])
+            _credits[best] -= total
+            quotas[best] += 1
+    return {t: n for t, n in quotas.items() if n}
+
+
+def _job_order(conn) -> str:
+    # Works before and after DB/embedding_jobs_priority.sql is applied
+    if "priority" in table_columns(_JOB_TABLE, conn):
+        return "priority DESC, created_at ASC"
+    return "created_at ASC"
+
+
+_weighted_claim: Optional[bool] = None
+
+
+def _weighted_claim_ready(conn) -> bool:
+    """
+    The per-table claim needs DB/embedding_jobs_priority.sql: without its
+    partial index every probe scans embedding_jobs, so claim_jobs falls
+    back to the single ordered claim instead.
+    """
+    global _weighted_claim
+    if _weighted_claim is None:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('public.idx_embedding_jobs_pending') IS NOT NULL")
+            has_index = cur.fetchone()[0]
+        _weighted_claim = bool(has_index) and "priority" in table_columns(_JOB_TABLE, conn)
+        if not _weighted_claim:
+            logger.warning(
+                "DB/embedding_jobs_priority.sql not applied: claiming oldest jobs first, "
+                "EMBEDDING_TABLE_WEIGHTS is ignored"
+            )
+    return _weighted_claim
+
+
+def _table_key(name: str) -> str:
+    # Like _normalize_table_name, without rejecting odd names: one bad
+    # table_name in the queue must not stop every claim
+    return name if "." in name else f"public.{name}"
+
+
+def _spread_quotas(pending: Sequence[str], quotas: Dict[str, int]) -> Dict[str, int]:
+    """
+    Hand each normalized table's quota to the spellings that have pending
+    jobs ('faqs' and 'public.faqs'), so a table queued both ways isn't
+    weighted twice. Slots a spelling can't fill are topped up afterwards.
+    """
+    spellings: Dict[str, List[str]] = defaultdict(list)
+    for name in pending:
+        spellings[_table_key(name)].append(name)
+    per_name: Dict[str, int] = {}
+    for table, n in quotas.items():
+        names = spellings[table]
+        for i, name in enumerate(names):
+            share = n // len(names) + (1 if i < n % len(names) else 0)
+            if share:
+                per_name[name] = share
+    return per_name
+
+
+def _pending_tables(cur, only: Optional[List[str]]) -> List[str]:
+    # Loose index scan: one index probe per distinct table instead of
+    # reading every pending row
+    cur.execute(
+        f"""
+        WITH RECURSIVE t AS (
+            (SELECT table_name FROM {_JOB_TABLE}
+             WHERE status = 'pending' AND (%s::text[] IS NULL OR table_name = ANY(%s::text[]))
+             ORDER BY table_name LIMIT 1)
+            UNION ALL
+            SELECT (SELECT table_name FROM {_JOB_TABLE}
+                    WHERE status = 'pending' AND table_name > t.table_name
+                      AND (%s::text[] IS NULL OR table_name = ANY(%s::text[]))
+                    ORDER BY table_name LIMIT 1)
+            FROM t
+            WHERE t.table_name IS NOT NULL
+        )
+        SELECT table_name FROM t WHERE table_name IS NOT NULL
+        """,
+        (only, only, only, only),
+    )
+    return [r["table_name"] for r in cur.fetchall()]
+
+
+def claim_jobs(limit: int = 10, conn=None, tables: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
     """
     Atomically claim up to `limit` embedding jobs from embedding_jobs.
-    Moves status pending -> processing and returns (id, table_name, row_id).
+    Moves status pending -> processing and returns (id, table_name, row_id, created_at).
+    With `tables`, only jobs for those tables are claimed.
+
+    The batch is shared between the tables that have pending jobs in
+    proportion to EMBEDDING_TABLE_WEIGHTS (default weight 1), so a large
+    backlog in one table cannot starve the others; slots a table can't
+    fill go to the remaining jobs in priority order. Within a table, jobs
+    are taken by priority, then oldest first. Until
+    DB/embedding_jobs_priority.sql is applied, the whole batch is simply
+    the oldest pending jobs (one scan, no per-table split).
+
+    Like the other job helpers, runs on `conn` when given (the caller
+    commits) and on its own pooled connection otherwise.
     """
-    conn = get_connection()
-    try:
+    only = table_name_variants(tables) if tables else None
+    with _borrowed(conn) as conn:
+        order = _job_order(conn)
+        weighted = _weighted_claim_ready(conn)
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            jobs: List[Dict[str, Any]] = []
+            if weighted:
+                jobs = _claim_weighted(cur, only, order, limit)
+                if jobs is None:
+                    return []
+                if len(jobs) >= limit:
+                    return _coalesce_claimed(cur, jobs)
+
             cur.execute(
                 f"""
                 WITH cte AS (
                     SELECT id
                     FROM {_JOB_TABLE}
                     WHERE status = 'pending'
-                    ORDER BY created_at ASC
+                      AND (%s::text[] IS NULL OR table_name = ANY(%s::text[]))
+                    ORDER BY {order}
                     LIMIT %s
                     FOR UPDATE SKIP LOCKED
                 )
@@ -218,23 +550,148 @@ def claim_jobs(limit: int = 10) -> List[Dict[str, Any]]:
                     last_attempt_at = NOW()
                 FROM cte
                 WHERE j.id = cte.id
-                RETURNING j.id, j.table_name, j.row_id;
+                RETURNING j.id, j.table_name, j.row_id, j.created_at;
                 """,
-                (limit,),
+                (only, only, limit - len(jobs)),
             )
-            jobs = list(cur.fetchall())
-        conn.commit()
-        return jobs
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+            return _coalesce_claimed(cur, jobs + list(cur.fetchall()))
 
 
-def mark_job_completed(job_id: str) -> None:
-    conn = get_connection()
-    try:
+def _claim_weighted(cur, only: Optional[List[str]], order: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+    """Claim each pending table's weighted share. None when nothing is pending"""
+    pending = _pending_tables(cur, only)
+    if not pending:
+        return None
+    quotas = _spread_quotas(
+        pending, _plan_quotas(sorted({_table_key(t) for t in pending}), limit)
+    )
+    cur.execute(
+        f"""
+        WITH quota(table_name, n) AS (
+            SELECT * FROM unnest(%s::text[], %s::int[])
+        ),
+        cte AS (
+            SELECT c.id
+            FROM quota q
+            CROSS JOIN LATERAL (
+                SELECT id
+                FROM {_JOB_TABLE}
+                WHERE status = 'pending' AND table_name = q.table_name
+                ORDER BY {order}
+                LIMIT q.n
+                FOR UPDATE SKIP LOCKED
+            ) c
+        )
+        UPDATE {_JOB_TABLE} j
+        SET status = 'processing',
+            updated_at = NOW(),
+            last_attempt_at = NOW()
+        FROM cte
+        WHERE j.id = cte.id
+        RETURNING j.id, j.table_name, j.row_id, j.created_at;
+        """,
+        (list(quotas), list(quotas.values())),
+    )
+    return list(cur.fetchall())
+
+
+def _coalesce_claimed(cur, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Keep one claimed job per (table, row_id) and fold the rest into it,
+    together with any other pending job for the same rows: the row is read
+    after this claim commits, so the kept job embeds the latest text anyway.
+
+    Folded jobs stay 'processing' and are listed under the kept job's
+    "coalesced" key; settle_coalesced_jobs() gives them the kept job's
+    outcome once it is known, so a failed embed leaves them failed too.
+    """
+    kept: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for job in jobs:
+        # 'faqs' and 'public.faqs' are the same table
+        key = (_table_key(job["table_name"]), str(job["row_id"]))
+        if key in kept:
+            kept[key]["coalesced"].append(str(job["id"]))
+        else:
+            job["coalesced"] = []
+            kept[key] = job
+    # Look the rows up under every spelling of their table
+    names, row_ids, kept_ids = [], [], []
+    for (table, row_id), job in kept.items():
+        for name in table_name_variants([table]):
+            names.append(name)
+            row_ids.append(row_id)
+            kept_ids.append(str(job["id"]))
+    cur.execute(
+        f"""
+        WITH claimed(table_name, row_id, kept_id) AS (
+            SELECT * FROM unnest(%s::text[], %s::text[], %s::uuid[])
+        ),
+        dup AS (
+            SELECT j.id, c.kept_id
+            FROM {_JOB_TABLE} j
+            JOIN claimed c ON j.table_name = c.table_name AND j.row_id = c.row_id
+            WHERE j.status = 'pending'
+            FOR UPDATE OF j SKIP LOCKED
+        )
+        UPDATE {_JOB_TABLE} j
+        SET status = 'processing', updated_at = NOW(), last_attempt_at = NOW()
+        FROM dup
+        WHERE j.id = dup.id
+        RETURNING j.id, dup.kept_id
+        """,
+        (names, row_ids, kept_ids),
+    )
+    by_id = {str(job["id"]): job for job in kept.values()}
+    for row in cur.fetchall():
+        by_id[str(row["kept_id"])]["coalesced"].append(str(row["id"]))
+    for job in kept.values():
+        if job["coalesced"]:
+            logger.info("Coalesced jobs %s into job %s", ",".join(job["coalesced"]), job["id"])
+    return list(kept.values())
+
+
+def settle_coalesced_jobs(jobs: Sequence[Dict[str, Any]], conn=None) -> int:
+    """
+    Give every job folded into a claimed job (see _coalesce_claimed) the
+    claimed job's final status and error. Folded jobs whose kept job is
+    still 'processing' are left for requeue_unfinished_jobs().
+    """
+    dup_ids, kept_ids = [], []
+    for job in jobs:
+        for dup_id in job.get("coalesced") or []:
+            dup_ids.append(dup_id)
+            kept_ids.append(str(job["id"]))
+    if not dup_ids:
+        return 0
+    with _borrowed(conn) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE {_JOB_TABLE} d
+                SET status = k.status,
+                    error = k.error,
+                    updated_at = NOW()
+                FROM unnest(%s::uuid[], %s::uuid[]) AS m(dup_id, kept_id)
+                JOIN {_JOB_TABLE} k ON k.id = m.kept_id
+                WHERE d.id = m.dup_id
+                  AND d.status = 'processing'
+                  AND k.status IN ('completed', 'failed')
+                """,
+                (dup_ids, kept_ids),
+            )
+            return cur.rowcount
+
+
+def queue_stats(conn=None) -> List[Dict[str, Any]]:
+    """Per-table queue depth and age (view from DB/embedding_jobs_priority.sql)"""
+    with _borrowed(conn) as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT * FROM public.embedding_jobs_queue_stats ORDER BY pending DESC, table_name")
+            return list(cur.fetchall())
+
+
+def mark_job_completed(job_id: str, conn=None) -> None:
+    with _borrowed(conn) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 f"""
@@ -244,17 +701,46 @@ def mark_job_completed(job_id: str) -> None:
                 """,
                 (job_id,),
             )
-        conn.commit()
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
 
-def mark_job_failed(job_id: str, error: str) -> None:
-    conn = get_connection()
-    try:
+def mark_jobs_completed(job_ids: Sequence[str], conn=None) -> None:
+    if not job_ids:
+        return
+    with _borrowed(conn) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE {_JOB_TABLE}
+                SET status = 'completed', updated_at = NOW()
+                WHERE id = ANY(%s::uuid[])
+                """,
+                (list(job_ids),),
+            )
+
+
+def requeue_unfinished_jobs(job_ids: Sequence[str], conn=None) -> int:
+    """
+    Put the jobs of an aborted batch that are still 'processing' back to
+    pending, so they are retried right away instead of after the failed
+    requeue delay. Jobs the batch already completed or failed are left alone.
+    """
+    if not job_ids:
+        return 0
+    with _borrowed(conn) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE {_JOB_TABLE}
+                SET status = 'pending', updated_at = NOW()
+                WHERE id = ANY(%s::uuid[]) AND status = 'processing'
+                """,
+                (list(job_ids),),
+            )
+            return cur.rowcount
+
+
+def mark_job_failed(job_id: str, error: str, conn=None) -> None:
+    with _borrowed(conn) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 f"""
@@ -266,22 +752,15 @@ def mark_job_failed(job_id: str, error: str) -> None:
                 """,
                 (error, job_id),
             )
-        conn.commit()
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
 
 def requeue_stuck_jobs(
-    processing_timeout_sec: int = 900, failed_timeout_sec: int = 3600
+    processing_timeout_sec: int = 900, failed_timeout_sec: int = 3600, conn=None
 ) -> int:
     """
     Re-queue jobs stuck in processing / failed for too long back to pending.
     """
-    conn = get_connection()
-    try:
+    with _borrowed(conn) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 f"""
@@ -305,13 +784,7 @@ def requeue_stuck_jobs(
             )
             n_failed = cur.rowcount
 
-        conn.commit()
         return int(n_processing + n_failed)
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
 
 def _normalize_table_name(table_name: str) -> str:
@@ -328,29 +801,150 @@ def _normalize_table_name(table_name: str) -> str:
     return f"public.{safe}"
 
 
-def load_row_for_job(table_name: str, row_id: str) -> Optional[Dict[str, Any]]:
+def normalize_table_name(table_name: str) -> str:
+    """Schema-qualified, validated table name ('faqs' -> 'public.faqs')"""
+    return _normalize_table_name(table_name)
+
+
+def load_row_for_job(
+    table_name: str, row_id: str, conn=None, columns: Optional[Sequence[str]] = None
+) -> Optional[Dict[str, Any]]:
     """
-    Load a single row for an embedding job.
+    Load a single row for an embedding job, with the same column projection
+    as load_rows_for_jobs so both paths build the same text.
     """
     full_table = _normalize_table_name(table_name)
-    conn = get_connection()
-    try:
+    with _borrowed(conn) as conn:
+        select = text_projection(full_table, columns, conn)
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
-                f"SELECT * FROM {full_table} WHERE id::text = %s",
+                f"SELECT {select} FROM {full_table} WHERE id::text = %s",
                 (row_id,),
             )
             row = cur.fetchone()
-        return row
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+    if row is not None:
+        row.pop("_row_key", None)
+    return row
+
+
+_TYPE_RE = re.compile(r"^[a-z][a-z0-9_ ]*(\(\d+(,\d+)?\))?(\[\])?$")
+# (full_table) -> {column: (type, pg_type.typcategory)}; schemas rarely change
+# while the worker runs, and a restart picks up migrations
+_columns_cache: Dict[str, Dict[str, Tuple[str, str]]] = {}
+_columns_lock = threading.Lock()
+# Hash of the text an embedding was computed from (DB/embedding_text_hash.sql)
+TEXT_HASH_COLUMN = "embedding_text_hash"
+
+
+def table_columns(full_table: str, conn) -> Dict[str, Tuple[str, str]]:
+    """
+    Column names of a table with their SQL type and pg_type category
+    ('S' string, 'E' enum, 'N' numeric, 'U' user-defined such as uuid/vector...).
+    """
+    with _columns_lock:
+        cached = _columns_cache.get(full_table)
+    if cached is not None:
+        return cached
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT a.attname, format_type(a.atttypid, a.atttypmod), t.typcategory
+            FROM pg_attribute a
+            JOIN pg_type t ON t.oid = a.atttypid
+            WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+            ORDER BY a.attnum
+            """,
+            (full_table,),
+        )
+        columns = {name: (sql_type, category) for name, sql_type, category in cur.fetchall()}
+    with _columns_lock:
+        _columns_cache[full_table] = columns
+    return columns
+
+
+def _id_array_type(columns: Dict[str, Tuple[str, str]], full_table: str) -> str:
+    if "id" not in columns:
+        raise ValueError(f"{full_table} has no id column")
+    sql_type = columns["id"][0]
+    if not _TYPE_RE.match(sql_type):
+        raise ValueError(f"Unsupported id type {sql_type!r} on {full_table}")
+    return f"{sql_type}[]"
+
+
+def text_projection(
+    full_table: str, columns: Optional[Sequence[str]], conn, with_hash: bool = False
+) -> str:
+    """
+    SELECT list with the row id as text (`_row_key`) plus the wanted text
+    columns that exist on the table; columns=None means every string/enum column.
+
+    The columns=None fallback (tables without a TEXT_COLUMNS entry) is
+    deliberately narrower than the old SELECT *: uuids, inet and unregistered
+    types such as the pgvector embedding also came back as str and were
+    concatenated into the text. Rows of such tables are re-embedded once
+    because their text hash changes.
+    With `with_hash`, also `_text_hash`: the stored hash of the embedded text
+    (NULL when the row has no embedding or the table has no hash column).
+    """
+    existing = table_columns(full_table, conn)
+    skip = ("id", TEXT_HASH_COLUMN)
+    if columns is None:
+        wanted = [c for c, (_, category) in existing.items() if category in ("S", "E") and c not in skip]
+    else:
+        wanted = [c for c in columns if c in existing and c not in skip]
+    select = ["id::text AS _row_key"] + [quote_ident(c, conn) for c in wanted]
+    if with_hash:
+        if has_text_hash(full_table, conn):
+            select.append(f"CASE WHEN embedding IS NOT NULL THEN {TEXT_HASH_COLUMN} END AS _text_hash")
+        else:
+            select.append("NULL::text AS _text_hash")
+    return ", ".join(select)
+
+
+def has_text_hash(full_table: str, conn) -> bool:
+    """True once DB/embedding_text_hash.sql added the hash column to the table"""
+    existing = table_columns(full_table, conn)
+    return TEXT_HASH_COLUMN in existing and "embedding" in existing
+
+
+def id_type(full_table: str, conn) -> str:
+    """SQL type of the table's id column, safe to use in a cast"""
+    return _id_array_type(table_columns(full_table, conn), full_table)[:-2]
+
+
+def load_rows_for_jobs(
+    table_name: str,
+    row_ids: Sequence[str],
+    columns: Optional[Sequence[str]] = None,
+    conn=None,
+    with_hash: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Load many rows of one table in a single query, keyed by id as text.
+
+    Ids are compared on the table's native id type (uuid, bigint...), so the
+    primary-key index is used. Only `columns` that exist on the table are
+    read; with columns=None, every string/enum column is read. Either way
+    embeddings, JSON blobs and other non-text columns stay in the database.
+    With `with_hash`, each row also carries `_text_hash` (see text_projection).
+    """
+    full_table = _normalize_table_name(table_name)
+    if not row_ids:
+        return {}
+    with _borrowed(conn) as conn:
+        select = text_projection(full_table, columns, conn, with_hash=with_hash)
+        array_type = _id_array_type(table_columns(full_table, conn), full_table)
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                f"SELECT {select} FROM {full_table} WHERE id = ANY(%s::{array_type})",
+                (list(row_ids),),
+            )
+            # The key is kept out of the row so it never leaks into the text
+            return {row.pop("_row_key"): row for row in cur.fetchall()}
 
 
 def update_embedding_for_row(
-    table_name: str, row_id: str, embedding: List[float]
+    table_name: str, row_id: str, embedding: List[float], conn=None, text_hash: Optional[str] = None
 ) -> None:
     """
     Write embedding back to the given table row.
@@ -358,16 +952,129 @@ def update_embedding_for_row(
     """
     full_table = _normalize_table_name(table_name)
     emb_str = "[" + ",".join(map(str, embedding)) + "]"
-    conn = get_connection()
-    try:
+    with _borrowed(conn) as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                f"UPDATE {full_table} SET embedding = %s::vector WHERE id::text = %s",
-                (emb_str, row_id),
-            )
-        conn.commit()
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+            if has_text_hash(full_table, conn):
+                cur.execute(
+                    f"UPDATE {full_table} SET embedding = %s::vector, {TEXT_HASH_COLUMN} = %s WHERE id::text = %s",
+                    (emb_str, text_hash, row_id),
+                )
+            else:
+                cur.execute(
+                    f"UPDATE {full_table} SET embedding = %s::vector WHERE id::text = %s",
+                    (emb_str, row_id),
+                )
+
+
+# PostgreSQL binary COPY framing; the embedding column uses pgvector's binary
+# wire format (int16 dim, int16 unused, dim x float4, all big-endian), so no
+# vector is ever formatted as decimal text
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_COPY_TRAILER = struct.pack("!h", -1)
+_COPY_NULL = struct.pack("!i", -1)
+
+
+def _copy_field(data: bytes) -> bytes:
+    return struct.pack("!i", len(data)) + data
+
+
+def _vector_binary(embedding: Sequence[float]) -> bytes:
+    values = np.asarray(embedding, dtype=">f4")
+    return struct.pack("!hh", len(values), 0) + values.tobytes()
+
+
+def _write_embeddings(
+    cur, conn, items: Sequence[Tuple[str, str, Sequence[float], Optional[str]]]
+) -> Dict[str, set]:
+    """
+    COPY (binary) every (full_table, row_id, embedding, text_hash) into a
+    temp table and apply it with one UPDATE ... FROM per table (the hash is
+    stored on tables that have the hash column).
+    Returns {full_table: row ids actually written}.
+    """
+    tables: List[str] = []
+    buf = io.BytesIO()
+    buf.write(_COPY_HEADER)
+    for full_table, row_id, embedding, text_hash in items:
+        if full_table not in tables:
+            tables.append(full_table)
+        buf.write(struct.pack("!h", 4))
+        buf.write(_copy_field(full_table.encode("utf-8")))
+        buf.write(_copy_field(row_id.encode("utf-8")))
+        buf.write(_copy_field(_vector_binary(embedding)))
+        buf.write(_copy_field(text_hash.encode("utf-8")) if text_hash else _COPY_NULL)
+    buf.write(_COPY_TRAILER)
+    buf.seek(0)
+
+    # ON COMMIT DROP keeps this safe behind the transaction-mode pooler
+    cur.execute(
+        """
+        CREATE TEMP TABLE _embedding_writeback (
+            table_name text NOT NULL,
+            row_key text NOT NULL,
+            embedding vector NOT NULL,
+            text_hash text
+        ) ON COMMIT DROP
+        """
+    )
+    cur.copy_expert(
+        "COPY _embedding_writeback (table_name, row_key, embedding, text_hash) FROM STDIN WITH (FORMAT binary)",
+        buf,
+    )
+    written: Dict[str, set] = {}
+    for full_table in tables:
+        set_hash = f", {TEXT_HASH_COLUMN} = s.text_hash" if has_text_hash(full_table, conn) else ""
+        cur.execute(
+            f"""
+            UPDATE {full_table} t
+            SET embedding = s.embedding{set_hash}
+            FROM _embedding_writeback s
+            WHERE s.table_name = %s AND t.id = s.row_key::{id_type(full_table, conn)}
+            RETURNING s.row_key
+            """,
+            (full_table,),
+        )
+        written[full_table] = {r[0] for r in cur.fetchall()}
+    cur.execute("DROP TABLE _embedding_writeback")
+    return written
+
+
+def write_embeddings(
+    table_name: str, rows: Sequence[Tuple[str, Sequence[float], Optional[str]]], conn=None
+) -> int:
+    """Bulk-write (row_id, embedding, text_hash) into one table. Returns rows written"""
+    if not rows:
+        return 0
+    full_table = _normalize_table_name(table_name)
+    with _borrowed(conn) as conn:
+        with conn.cursor() as cur:
+            written = _write_embeddings(cur, conn, [(full_table, row_id, emb, h) for row_id, emb, h in rows])
+    return len(written[full_table])
+
+
+def complete_jobs_with_embeddings(
+    items: Sequence[Tuple[str, str, str, Sequence[float], Optional[str]]], conn
+) -> List[str]:
+    """
+    Bulk write-back for a batch of (job_id, table_name, row_id, embedding, text_hash).
+
+    All vectors are COPYed (binary) into a temp table, each target table is
+    updated with one UPDATE ... FROM, and the jobs whose rows were written
+    are marked completed. Everything runs in the caller's transaction; the
+    caller commits. Returns the job ids whose row no longer exists.
+    """
+    if not items:
+        return []
+    targets = [
+        (job_id, _normalize_table_name(table_name), row_id, emb, text_hash)
+        for job_id, table_name, row_id, emb, text_hash in items
+    ]
+
+    completed: List[str] = []
+    missing: List[str] = []
+    with conn.cursor() as cur:
+        written = _write_embeddings(cur, conn, [(table, row_id, emb, h) for _, table, row_id, emb, h in targets])
+    for job_id, table, row_id, _, _ in targets:
+        (completed if row_id in written[table] else missing).append(job_id)
+    mark_jobs_completed(completed, conn=conn)
+    return missing
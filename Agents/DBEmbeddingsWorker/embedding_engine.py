@@ -1,6 +1,6 @@
 # AgenticWorkers/Embeddings/embedding_engine.py
 # Lazy-loads SentenceTransformer; same model as QueryAnalyst for consistency.
-from typing import List
+from typing import List, Optional
 
 from config import Config
 
@@ -12,8 +12,12 @@ class EmbeddingEngine:
     @property
     def model(self):
         if self._model is None:
-            from sentence_transformers import SentenceTransformer
-            self._model = SentenceTransformer(Config.EMBEDDING_MODEL)
+            if Config.EMBEDDING_BACKEND == "onnx":
+                from onnx_encoder import OnnxSentenceEncoder
+                self._model = OnnxSentenceEncoder(Config.EMBEDDING_ONNX_PATH, Config.EMBEDDING_ONNX_THREADS)
+            else:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(Config.EMBEDDING_MODEL)
         return self._model
 
     def encode(self, text: str) -> List[float]:
@@ -21,3 +25,26 @@ class EmbeddingEngine:
             return []
         emb = self.model.encode([text], normalize_embeddings=True)
         return emb[0].tolist()
+
+    def encode_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """
+        Embed many texts in one call. Returns one vector per input, in input
+        order; blank texts map to [].
+        """
+        results: List[List[float]] = [[] for _ in texts]
+        # Longest first, so each mini-batch pads to similar lengths
+        order = sorted(
+            (i for i, t in enumerate(texts) if (t or "").strip()),
+            key=lambda i: -len(texts[i]),
+        )
+        if not order:
+            return results
+        embs = self.model.encode(
+            [texts[i] for i in order],
+            batch_size=batch_size or Config.ENCODE_BATCH_SIZE,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        for i, emb in zip(order, embs):
+            results[i] = emb.tolist()
+        return results
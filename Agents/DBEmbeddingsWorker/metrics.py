@@ -0,0 +1,204 @@
+# AgenticWorkers/Embeddings/metrics.py
+# In-process counters and latency histograms for the queue worker, served
+# in Prometheus text format on /metrics (EMBEDDING_METRICS_PORT) and
+# summarised in a periodic log line. Stdlib only.
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_WAIT_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0, 14400.0)
+_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        '%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for n, v in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = _LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def totals(self) -> Dict[Tuple[str, ...], Tuple[float, float]]:
+        """{label values: (count, sum)}"""
+        with self._lock:
+            return {key: (s[-2], s[-1]) for key, s in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(s) for key, s in self._series.items()}
+        for key, s in sorted(series.items()):
+            for bound, count in zip(self.buckets + (float("inf"),), s[:-1]):
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {_format_value(count)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {_format_value(s[-2])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(s[-1])}")
+        return lines
+
+
+# stage: claim | load | encode | write_back (whole batch); table: per-table row loads
+STAGE_SECONDS = Histogram("embedding_stage_seconds", "Time spent per batch stage", ("stage",))
+TABLE_LOAD_SECONDS = Histogram("embedding_table_load_seconds", "Time to load one table's rows of a batch", ("table",))
+BATCH_JOBS = Histogram("embedding_batch_jobs", "Jobs per claimed batch", buckets=_SIZE_BUCKETS)
+QUEUE_WAIT_SECONDS = Histogram(
+    "embedding_job_queue_wait_seconds", "Time from enqueue to claim", ("table",), buckets=_WAIT_BUCKETS
+)
+# outcome: claimed | completed | unchanged | failed
+JOBS = Counter("embedding_jobs_total", "Embedding jobs by table and outcome", ("table", "outcome"))
+TEXTS_ENCODED = Counter("embedding_texts_encoded_total", "Texts sent to the model", ("table",))
+BATCHES = Counter("embedding_batches_total", "Claimed batches (empty claims excluded)")
+
+_ALL = (STAGE_SECONDS, TABLE_LOAD_SECONDS, BATCH_JOBS, QUEUE_WAIT_SECONDS, JOBS, TEXTS_ENCODED, BATCHES)
+
+
+def table_label(table_name: str) -> str:
+    """Jobs say "faqs" or "public.faqs"; both report as faqs"""
+    return table_name.split(".")[-1]
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _ALL:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # noqa: N802
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+def start_http_server(port: int, addr: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a daemon thread; returns None if the port is taken"""
+    try:
+        server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning("Metrics endpoint not started on %s:%s: %s", addr, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Metrics on http://%s:%s/metrics", addr, port)
+    return server
+
+
+class SummaryLogger:
+    """One log line per interval: throughput, outcomes and mean stage latency since the last line"""
+
+    def __init__(self, interval_sec: float):
+        self.interval = interval_sec
+        self._last_time = time.monotonic()
+        self._last_jobs: Dict[Tuple[str, ...], float] = {}
+        self._last_stages: Dict[Tuple[str, ...], Tuple[float, float]] = {}
+
+    def maybe_log(self) -> None:
+        now = time.monotonic()
+        if self.interval <= 0 or now - self._last_time < self.interval:
+            return
+        elapsed = now - self._last_time
+        self._last_time = now
+
+        jobs = JOBS.values()
+        outcomes: Dict[str, float] = {}
+        for (_, outcome), value in jobs.items():
+            outcomes[outcome] = outcomes.get(outcome, 0) + value
+        for (_, outcome), value in self._last_jobs.items():
+            outcomes[outcome] = outcomes.get(outcome, 0) - value
+        self._last_jobs = jobs
+
+        stages = STAGE_SECONDS.totals()
+        parts = []
+        for stage in ("claim", "load", "encode", "write_back"):
+            count, total = stages.get((stage,), (0.0, 0.0))
+            prev_count, prev_total = self._last_stages.get((stage,), (0.0, 0.0))
+            if count > prev_count:
+                parts.append(f"{stage}={1000 * (total - prev_total) / (count - prev_count):.1f}ms")
+        self._last_stages = stages
+
+        claimed = outcomes.get("claimed", 0)
+        if not claimed and not parts:
+            return
+        done = outcomes.get("completed", 0) + outcomes.get("unchanged", 0)
+        logger.info(
+            "Last %.0fs: %.1f jobs/s, claimed=%d completed=%d unchanged=%d failed=%d, mean per batch %s",
+            elapsed, done / elapsed, claimed, outcomes.get("completed", 0),
+            outcomes.get("unchanged", 0), outcomes.get("failed", 0), " ".join(parts) or "-",
+        )
@@ -0,0 +1,93 @@
+"""
+Drop-in replacement for SentenceTransformer.encode backed by an exported,
+int8-quantized ONNX model (see VectorDBWorker/onnx_export.py).
+
+Only onnxruntime, tokenizers and numpy are needed at runtime - no torch.
+"""
+import json
+from pathlib import Path
+from typing import List, Union
+
+import numpy as np
+
+
+class OnnxSentenceEncoder:
+    """
+    Runs a sentence-transformers model exported by onnx_export.py.
+
+    The export directory holds model.onnx, tokenizer.json and
+    encoder_config.json (max_seq_length, pooling, normalize).
+    """
+
+    def __init__(self, model_dir: str, num_threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir).expanduser()
+        if not (model_dir / "model.onnx").exists():
+            raise FileNotFoundError(
+                f"No ONNX model in {model_dir}; run VectorDBWorker/onnx_export.py export first"
+            )
+
+        with open(model_dir / "encoder_config.json", "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.max_seq_length = int(self.config.get("max_seq_length", 256))
+        self.pooling = self.config.get("pooling", "mean")
+        self.normalize = bool(self.config.get("normalize", False))
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding(pad_id=self.config.get("pad_token_id", 0))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            str(model_dir / "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        show_progress_bar: bool = False,
+        **kwargs,
+    ) -> np.ndarray:
+        """Same contract as SentenceTransformer.encode with convert_to_numpy=True"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Length-sorted batches keep padding (and wasted compute) low
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        out = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            for i, emb in zip(idx, self._encode_batch([texts[i] for i in idx])):
+                out[i] = emb
+
+        embeddings = np.stack(out)
+        if normalize_embeddings or self.normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self._input_names})[0]
+
+        if self.pooling == "cls":
+            return hidden[:, 0].astype(np.float32)
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (hidden * mask).sum(axis=1)
+        return (summed / np.clip(mask.sum(axis=1), 1e-9, None)).astype(np.float32)
@@ -1,8 +1,13 @@
+import hashlib
 import logging
+import os
+import select
+import signal
 import sys
 import time
 from pathlib import Path
-from typing import Dict, Any
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
 try:
     from dotenv import load_dotenv
@@ -13,14 +18,23 @@ except ImportError:
 
 from config import Config
 from db import (
+    JobListener,
+    pooled_connection,
     claim_jobs,
     load_row_for_job,
+    load_rows_for_jobs,
+    complete_jobs_with_embeddings,
     update_embedding_for_row,
     mark_job_completed,
+    mark_jobs_completed,
     mark_job_failed,
     requeue_stuck_jobs,
+    requeue_unfinished_jobs,
+    settle_coalesced_jobs,
+    queue_stats,
 )
 from embedding_engine import EmbeddingEngine
+import metrics
 
 
 logging.basicConfig(
@@ -39,6 +53,21 @@ def _coalesce_str(*values: Any) -> str:
     return ""
 
 
+# Columns text_for_table reads per table; only these are fetched. Tables not
+# listed here are loaded with all of their string columns (the fallback rule).
+TEXT_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "usergrievance": ("enhanced_query", "grievance_text", "image_description"),
+    "faqs": ("question", "answer"),
+    "departmentknowledgebase": ("title", "description", "content_text"),
+    "policydocuments": ("title", "content"),
+    "citizens": ("full_name", "email", "phone", "address", "city", "occupation", "location_address"),
+    "users": ("full_name", "email", "phone", "address", "city", "occupation", "location_address"),
+    "departments": ("name", "description", "address"),
+    "aiinsights": ("title", "description", "recommended_action"),
+    "auditlog": ("actor_name", "actor_role", "action", "entity_type"),
+}
+
+
 def text_for_table(table_name: str, row: Dict[str, Any]) -> str:
     """
     Build a reasonable text representation for different tables.
@@ -132,7 +161,7 @@ def text_for_table(table_name: str, row: Dict[str, Any]) -> str:
             if part
         ).strip()
 
-    # Fallback: concatenate all string fields
+    # Fallback: concatenate all string fields (text/varchar/enum columns, see db.text_projection)
     pieces = []
     for v in row.values():
         if isinstance(v, str) and v.strip():
@@ -140,75 +169,366 @@ def text_for_table(table_name: str, row: Dict[str, Any]) -> str:
     return " ".join(pieces).strip()
 
 
-def run_once(engine: EmbeddingEngine) -> int:
-    jobs = claim_jobs(limit=Config.BATCH_SIZE)
-    if not jobs:
+def text_hash(text: str) -> str:
+    """
+    Fingerprint of an embedding's input, stored next to the embedding. The
+    model name is part of it, so switching models re-embeds every row.
+    """
+    return hashlib.sha256(f"{Config.EMBEDDING_MODEL}\n{text}".encode("utf-8")).hexdigest()
+
+
+class ConnectionLost(Exception):
+    """The batch connection dropped; the batch is aborted and its unfinished jobs requeued"""
+
+
+def _fail_job(conn, job_id: str, error: str, table_name: str = "") -> None:
+    """Roll back the job's partial work and record the failure, without losing the batch connection"""
+    if conn.closed:
+        # The error came from the connection, not the job: don't fail it
+        raise ConnectionLost(error)
+    metrics.JOBS.inc(table=metrics.table_label(table_name), outcome="failed")
+    try:
+        conn.rollback()
+        mark_job_failed(job_id, error, conn=conn)
+        conn.commit()
+    except Exception:
+        if conn.closed:
+            raise ConnectionLost(error)
+        logger.exception("Could not mark job %s as failed", job_id)
+
+
+def _load_rows(conn, jobs: List[Dict[str, Any]]) -> Dict[str, Optional[Dict[str, Dict[str, Any]]]]:
+    """
+    Fetch the rows of a claimed batch with one query per table.
+    Returns {table_name: {row_id: row}}; None for a table whose bulk load
+    failed, so its jobs fall back to loading (and failing) one by one.
+    """
+    by_table: Dict[str, List[str]] = defaultdict(list)
+    for job in jobs:
+        by_table[job["table_name"]].append(str(job["row_id"]))
+
+    loaded: Dict[str, Optional[Dict[str, Dict[str, Any]]]] = {}
+    for table_name, row_ids in by_table.items():
+        try:
+            with metrics.TABLE_LOAD_SECONDS.time(table=metrics.table_label(table_name)):
+                loaded[table_name] = load_rows_for_jobs(
+                    table_name, row_ids, TEXT_COLUMNS.get(table_name.split(".")[-1]), conn=conn, with_hash=True
+                )
+                conn.commit()
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Bulk load of %s rows from %s failed, loading one by one: %s", len(row_ids), table_name, e)
+            conn.rollback()
+            loaded[table_name] = None
+    return loaded
+
+
+def _write_back(conn, ready: List[Tuple[str, str, str, List[float], str]]) -> int:
+    """
+    Write the batch's embeddings and complete their jobs in one transaction.
+    If the bulk path fails, retry job by job so one bad row can't fail the rest.
+    """
+    if not ready:
         return 0
+    try:
+        missing = complete_jobs_with_embeddings(ready, conn)
+        conn.commit()
+    except Exception as e:  # noqa: BLE001
+        logger.warning("Bulk write-back of %s embeddings failed, writing one by one: %s", len(ready), e)
+        if not conn.closed:
+            conn.rollback()
+        missing = None
+    if missing is None:
+        return _write_back_each(conn, ready)
+
+    for job_id, table_name, row_id, _, _ in ready:
+        if job_id in missing:
+            _fail_job(conn, job_id, f"Row not found for {table_name} id={row_id}", table_name)
+        else:
+            metrics.JOBS.inc(table=metrics.table_label(table_name), outcome="completed")
+            logger.info("Job %s completed for %s id=%s", job_id, table_name, row_id)
+    return len(ready) - len(missing)
+
 
+def _write_back_each(conn, ready: List[Tuple[str, str, str, List[float], str]]) -> int:
     processed = 0
+    for job_id, table_name, row_id, emb, digest in ready:
+        try:
+            update_embedding_for_row(table_name, row_id, emb, conn=conn, text_hash=digest)
+            mark_job_completed(job_id, conn=conn)
+            conn.commit()
+            processed += 1
+            metrics.JOBS.inc(table=metrics.table_label(table_name), outcome="completed")
+            logger.info("Job %s completed for %s id=%s", job_id, table_name, row_id)
+        except Exception as e:  # noqa: BLE001
+            logger.exception("Job %s failed: %s", job_id, e)
+            _fail_job(conn, job_id, str(e), table_name)
+    return processed
+
+
+def _encode_jobs(engine: EmbeddingEngine, pending: List[Tuple[str, str, str, str, str]]) -> List[Any]:
+    """
+    One vector per pending job, in order. If the batched call fails, each
+    text is retried on its own so only the offending jobs fail (their slot
+    then holds the exception).
+    """
+    texts = [text for _, _, _, text, _ in pending]
+    if not texts:
+        return []
+    try:
+        return engine.encode_batch(texts, batch_size=Config.ENCODE_BATCH_SIZE)
+    except Exception as e:  # noqa: BLE001
+        logger.warning("Batched encode of %s texts failed, encoding one by one: %s", len(texts), e)
+
+    results: List[Any] = []
+    for job_id, _, _, text, _ in pending:
+        try:
+            results.append(engine.encode(text))
+        except Exception as e:  # noqa: BLE001
+            logger.exception("Job %s failed: %s", job_id, e)
+            results.append(e)
+    return results
+
+
+def run_once(engine: EmbeddingEngine, tables: Optional[Sequence[str]] = None) -> int:
+    """Process one claimed batch. Returns the number of jobs completed"""
+    return _run_batch(engine, tables)[1]
+
+
+def _run_batch(engine: EmbeddingEngine, tables: Optional[Sequence[str]] = None) -> Tuple[int, int]:
+    """Returns (jobs claimed, jobs completed)"""
+    # The whole claimed batch runs over one pooled connection: one
+    # transaction for the claim, one query per table for the rows, one
+    # batched encode, and one transaction that writes every embedding and
+    # completes the jobs. Rows whose text hash matches the stored one are
+    # completed without touching the model.
+    with pooled_connection() as conn:
+        started = time.perf_counter()
+        jobs = claim_jobs(limit=Config.BATCH_SIZE, conn=conn, tables=tables)
+        conn.commit()
+        if not jobs:
+            return 0, 0
+        # Empty polls are left out so the stage means describe real batches
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage="claim")
+        metrics.BATCHES.inc()
+        metrics.BATCH_JOBS.observe(len(jobs))
+        now = time.time()
+        for job in jobs:
+            label = metrics.table_label(job["table_name"])
+            metrics.JOBS.inc(table=label, outcome="claimed")
+            if job.get("created_at") is not None:
+                metrics.QUEUE_WAIT_SECONDS.observe(max(0.0, now - job["created_at"].timestamp()), table=label)
+
+        try:
+            completed = _process_batch(engine, conn, jobs)
+            settle_coalesced_jobs(jobs, conn=conn)
+            conn.commit()
+            return len(jobs), completed
+        except Exception:
+            # Jobs still 'processing' would otherwise wait REQUEUE_STUCK_AFTER_SEC
+            try:
+                job_ids = [str(job["id"]) for job in jobs]
+                job_ids += [dup_id for job in jobs for dup_id in job.get("coalesced") or []]
+                n_requeued = requeue_unfinished_jobs(job_ids)
+                logger.warning("Batch aborted, %s unfinished jobs back to pending", n_requeued)
+            except Exception:  # noqa: BLE001
+                logger.exception("Could not requeue the aborted batch")
+            raise
+
+
+def _process_batch(engine: EmbeddingEngine, conn, jobs: List[Dict[str, Any]]) -> int:
+    """Load, encode and write back a claimed batch on `conn`. Returns jobs completed"""
+    with metrics.STAGE_SECONDS.time(stage="load"):
+        rows = _load_rows(conn, jobs)
+
+    # Build every job's text first, then embed the batch in one call
+    pending: List[Tuple[str, str, str, str, str]] = []
+    unchanged: List[str] = []
     for job in jobs:
         job_id = str(job["id"])
         table_name = job["table_name"]
         row_id = str(job["row_id"])
         try:
-            row = load_row_for_job(table_name, row_id)
+            table_rows = rows.get(table_name)
+            if table_rows is None:
+                row = load_row_for_job(
+                    table_name, row_id, conn=conn, columns=TEXT_COLUMNS.get(table_name.split(".")[-1])
+                )
+            else:
+                row = table_rows.get(row_id)
+            stored_hash = row.pop("_text_hash", None) if row else None
             if not row:
-                mark_job_failed(job_id, f"Row not found for {table_name} id={row_id}")
+                _fail_job(conn, job_id, f"Row not found for {table_name} id={row_id}", table_name)
                 continue
 
             text = text_for_table(table_name, row)
             if not text:
-                mark_job_failed(job_id, "Empty text for embedding")
+                _fail_job(conn, job_id, "Empty text for embedding", table_name)
                 continue
 
-            emb = engine.encode(text)
-            if not emb:
-                mark_job_failed(job_id, "Embedding engine returned empty vector")
+            digest = text_hash(text)
+            if digest == stored_hash:
+                unchanged.append(job_id)
+                metrics.JOBS.inc(table=metrics.table_label(table_name), outcome="unchanged")
                 continue
-
-            update_embedding_for_row(table_name, row_id, emb)
-            mark_job_completed(job_id)
-            processed += 1
-            logger.info("Job %s completed for %s id=%s", job_id, table_name, row_id)
+            pending.append((job_id, table_name, row_id, text, digest))
+        except ConnectionLost:
+            raise
         except Exception as e:  # noqa: BLE001
             logger.exception("Job %s failed: %s", job_id, e)
-            try:
-                mark_job_failed(job_id, str(e))
-            except Exception:
-                logger.exception("Could not mark job %s as failed", job_id)
+            _fail_job(conn, job_id, str(e), table_name)
+
+    if unchanged:
+        mark_jobs_completed(unchanged, conn=conn)
+        conn.commit()
+        logger.info("%s jobs completed without re-embedding (text unchanged)", len(unchanged))
+
+    ready: List[Tuple[str, str, str, List[float], str]] = []
+    with metrics.STAGE_SECONDS.time(stage="encode"):
+        embeddings = _encode_jobs(engine, pending)
+    for _, table_name, _, _, _ in pending:
+        metrics.TEXTS_ENCODED.inc(table=metrics.table_label(table_name))
+    for (job_id, table_name, row_id, _, digest), emb in zip(pending, embeddings):
+        if isinstance(emb, Exception):
+            _fail_job(conn, job_id, str(emb), table_name)
+        elif not emb:
+            _fail_job(conn, job_id, "Embedding engine returned empty vector", table_name)
+        else:
+            ready.append((job_id, table_name, row_id, emb, digest))
+
+    with metrics.STAGE_SECONDS.time(stage="write_back"):
+        written = _write_back(conn, ready)
+    return len(unchanged) + written
+
+
+class StopSignal:
+    """
+    Shutdown request that also interrupts idle waits: the signal handler
+    writes to a pipe the wait loops select() on, so SIGTERM never has to
+    sit out a full poll / LISTEN timeout.
+    """
 
-    return processed
+    def __init__(self):
+        self.requested = False
+        self._r, self._w = os.pipe()
+        os.set_blocking(self._w, False)
 
+    def request(self, *_args) -> None:
+        self.requested = True
+        try:
+            os.write(self._w, b"x")
+        except (BlockingIOError, OSError):
+            pass
 
-def main():
+    def fileno(self) -> int:
+        return self._r
+
+    def sleep(self, timeout: float) -> None:
+        select.select([self], [], [], timeout)
+
+    def install(self) -> None:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self.request)
+
+
+def _wait_for_jobs(listener: Optional[JobListener], stop: StopSignal) -> None:
+    if listener is None:
+        stop.sleep(Config.POLL_INTERVAL_SEC)
+    else:
+        listener.wait(Config.LISTEN_FALLBACK_SEC, interrupt=stop)
+
+
+def serve(
+    tables: Optional[Sequence[str]] = None,
+    stop: Optional[StopSignal] = None,
+    health=None,
+) -> None:
+    """
+    Claim and embed batches until `stop` is requested. The batch in flight
+    always finishes first. `tables` restricts the worker to those tables;
+    `health` (see supervisor.WorkerHealth) receives a beat after every batch.
+    """
+    stop = stop or StopSignal()
+    listener = None
+    if Config.WAKEUP_MODE == "listen":
+        if Config.LISTEN_DATABASE_URL:
+            listener = JobListener(tables=tables)
+        else:
+            # The default DSN is the transaction pooler, which drops notifications
+            logger.warning("EMBEDDING_WAKEUP_MODE=listen needs EMBEDDING_LISTEN_DATABASE_URL; polling instead")
     logger.info(
-        "Generic embedding queue worker started (batch_size=%s, poll_interval=%.1fs)",
+        "Generic embedding queue worker started (batch_size=%s, tables=%s, wakeup=%s, %s)",
         Config.BATCH_SIZE,
-        Config.POLL_INTERVAL_SEC,
+        ",".join(tables) if tables else "all",
+        "LISTEN " + listener.channel if listener else "poll",
+        "fallback poll every %.0fs" % Config.LISTEN_FALLBACK_SEC
+        if listener
+        else "interval %.1fs" % Config.POLL_INTERVAL_SEC,
     )
     engine = EmbeddingEngine()
+    if Config.METRICS_PORT:
+        metrics.start_http_server(Config.METRICS_PORT, Config.METRICS_ADDR)
+    summary = metrics.SummaryLogger(Config.METRICS_LOG_INTERVAL_SEC)
+    if listener is not None:
+        try:
+            listener.start()
+        except Exception as e:  # noqa: BLE001
+            logger.warning("LISTEN unavailable, polling until it connects: %s", e)
 
-    while True:
+    next_requeue = 0.0
+    while not stop.requested:
         try:
-            try:
-                n_requeued = requeue_stuck_jobs()
-                if n_requeued:
-                    logger.info("Re-queued %s stuck jobs", n_requeued)
-            except Exception:
-                # non-fatal
-                pass
-
-            n = run_once(engine)
-            if n == 0:
-                time.sleep(Config.POLL_INTERVAL_SEC)
+            if time.monotonic() >= next_requeue:
+                next_requeue = time.monotonic() + Config.REQUEUE_CHECK_INTERVAL_SEC
+                try:
+                    n_requeued = requeue_stuck_jobs()
+                    if n_requeued:
+                        logger.info("Re-queued %s stuck jobs", n_requeued)
+                except Exception:
+                    # non-fatal
+                    pass
+
+            # Keep draining while batches come back non-empty
+            claimed, completed = _run_batch(engine, tables)
+            if health is not None:
+                health.beat(claimed, completed)
+            summary.maybe_log()
+            if claimed == 0 and not stop.requested:
+                _wait_for_jobs(listener, stop)
         except KeyboardInterrupt:
-            logger.info("Worker stopped by user")
-            break
+            stop.request()
         except Exception as e:  # noqa: BLE001
             logger.exception("Worker loop error: %s", e)
-            time.sleep(Config.POLL_INTERVAL_SEC)
+            stop.sleep(Config.POLL_INTERVAL_SEC)
+
+    logger.info("Worker stopped")
+    if listener is not None:
+        listener.close()
+
+
+def print_queue_stats() -> None:
+    """`python queue_worker.py stats`: queue depth and age per table"""
+    rows = queue_stats()
+    print(f"{'table':<28}{'pending':>9}{'prio':>6}{'proc':>6}{'failed':>8}{'oldest':>10}{'avg age':>10}")
+    for r in rows:
+        print(
+            f"{r['table_name']:<28}{r['pending']:>9}{r['pending_prioritized']:>6}{r['processing']:>6}"
+            f"{r['failed']:>8}{float(r['oldest_pending_age_sec']):>9.0f}s{float(r['avg_pending_age_sec']):>9.0f}s"
+        )
+
+
+def main():
+    if sys.argv[1:] == ["stats"]:
+        print_queue_stats()
+        return
+    if Config.WORKER_PROCESSES > 1 or Config.TABLE_AFFINITY:
+        from supervisor import supervise
+
+        supervise()
+        return
+    stop = StopSignal()
+    stop.install()
+    serve(stop=stop)
 
 
 if __name__ == "__main__":
     main()
-
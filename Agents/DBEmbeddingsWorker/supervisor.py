@@ -0,0 +1,218 @@
+# AgenticWorkers/Embeddings/supervisor.py
+# Runs N embedding worker processes side by side. Each process loads the
+# model once and claims its own batches (FOR UPDATE SKIP LOCKED keeps them
+# from colliding), so throughput scales with CPU cores.
+import json
+import logging
+import multiprocessing as mp
+import os
+import signal
+import time
+from typing import Dict, List, Optional, Tuple
+
+# queue_worker first: it loads .env before Config reads the environment
+from queue_worker import StopSignal, serve
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_WORKER_LOG_FORMAT = "%(asctime)s [%(levelname)s] %(processName)s %(message)s"
+
+
+class WorkerHealth:
+    """Heartbeat and counters one worker process updates and the supervisor reads (shared memory)"""
+
+    _FIELDS = ("heartbeat", "batches", "claimed", "completed", "started")
+
+    def __init__(self, ctx):
+        self._values = ctx.Array("d", len(self._FIELDS))
+
+    def reset(self) -> None:
+        now = time.time()
+        with self._values.get_lock():
+            self._values[:] = [now, 0, 0, 0, now]
+
+    def beat(self, claimed: int = 0, completed: int = 0) -> None:
+        with self._values.get_lock():
+            self._values[0] = time.time()
+            if claimed:
+                self._values[1] += 1
+                self._values[2] += claimed
+                self._values[3] += completed
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._values.get_lock():
+            return dict(zip(self._FIELDS, self._values[:]))
+
+
+def parse_affinity(spec: str) -> List[Tuple[str, ...]]:
+    """
+    "usergrievance=2,auditlog+citizens=1" -> two processes that only take
+    usergrievance jobs and one that takes auditlog and citizens jobs.
+    """
+    slots: List[Tuple[str, ...]] = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        tables, _, count = part.partition("=")
+        group = tuple(t.strip() for t in tables.split("+") if t.strip())
+        if not group:
+            raise ValueError(f"Bad EMBEDDING_TABLE_AFFINITY entry: {part!r}")
+        slots.extend([group] * int(count or 1))
+    return slots
+
+
+def _worker_process(index: int, tables: Optional[Tuple[str, ...]], health: WorkerHealth, threads: int) -> None:
+    for handler in logging.getLogger().handlers:
+        handler.setFormatter(logging.Formatter(_WORKER_LOG_FORMAT, datefmt="%Y-%m-%d %H:%M:%S"))
+    # Split the cores between processes instead of every model using all of them
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    if not Config.EMBEDDING_ONNX_THREADS:
+        Config.EMBEDDING_ONNX_THREADS = threads
+    if Config.METRICS_PORT:
+        # One scrape target per worker process
+        Config.METRICS_PORT += index
+
+    stop = StopSignal()
+    stop.install()
+    health.reset()
+    serve(tables=tables, stop=stop, health=health)
+
+
+class _Slot:
+    def __init__(self, index: int, tables: Optional[Tuple[str, ...]], health: WorkerHealth):
+        self.index = index
+        self.tables = tables
+        self.health = health
+        self.process: Optional[mp.Process] = None
+        self.restarts = 0
+        self.next_start = 0.0
+
+    @property
+    def name(self) -> str:
+        return f"worker-{self.index}"
+
+
+def supervise(processes: Optional[int] = None, affinity: Optional[str] = None) -> None:
+    """
+    Fork the worker processes and keep them running until SIGTERM/SIGINT.
+
+    Crashed workers are restarted with backoff. On shutdown every worker
+    finishes its current batch; stragglers are killed after
+    EMBEDDING_SHUTDOWN_TIMEOUT_SEC and their jobs are picked up again by
+    requeue_stuck_jobs.
+    """
+    processes = processes or Config.WORKER_PROCESSES
+    pinned = parse_affinity(Config.TABLE_AFFINITY if affinity is None else affinity)
+    table_sets: List[Optional[Tuple[str, ...]]] = list(pinned)
+    table_sets += [None] * max(0, processes - len(pinned))
+    threads = max(1, (os.cpu_count() or 1) // len(table_sets))
+
+    # Fork: children inherit the imported modules; the parent never opens a
+    # DB connection or loads the model, so there is nothing unsafe to share
+    ctx = mp.get_context("fork")
+    slots = [_Slot(i, tables, WorkerHealth(ctx)) for i, tables in enumerate(table_sets)]
+
+    stop = StopSignal()
+    stop.install()
+    logger.info(
+        "Embedding supervisor started: %s processes (%s), %s threads each",
+        len(slots),
+        ", ".join("+".join(s.tables) if s.tables else "all" for s in slots),
+        threads,
+    )
+
+    next_report = time.monotonic() + Config.HEALTH_INTERVAL_SEC
+    while not stop.requested:
+        now = time.monotonic()
+        for slot in slots:
+            proc = slot.process
+            if proc is not None and proc.is_alive():
+                continue
+            if proc is not None:
+                proc.join()
+                slot.restarts += 1
+                # Back off 1s, 2s, 4s ... up to a minute for a crash-looping worker
+                slot.next_start = now + min(60.0, 2.0 ** min(slot.restarts - 1, 6))
+                logger.error(
+                    "%s (pid %s) exited with code %s; restarting in %.0fs",
+                    slot.name, proc.pid, proc.exitcode, slot.next_start - now,
+                )
+                slot.process = None
+            if now >= slot.next_start:
+                slot.process = ctx.Process(
+                    target=_worker_process,
+                    args=(slot.index, slot.tables, slot.health, threads),
+                    name=slot.name,
+                    daemon=False,
+                )
+                slot.process.start()
+
+        if now >= next_report:
+            next_report = now + Config.HEALTH_INTERVAL_SEC
+            _report(slots)
+        stop.sleep(1.0)
+
+    _shutdown(slots)
+    _report(slots)
+
+
+def _report(slots: List[_Slot]) -> None:
+    now = time.time()
+    report = []
+    for slot in slots:
+        snap = slot.health.snapshot()
+        alive = slot.process is not None and slot.process.is_alive()
+        age = now - snap["heartbeat"] if snap["heartbeat"] else None
+        stalled = alive and age is not None and age > Config.WORKER_STALL_SEC
+        report.append(
+            {
+                "worker": slot.name,
+                "pid": slot.process.pid if slot.process else None,
+                "tables": list(slot.tables) if slot.tables else "all",
+                "alive": alive,
+                "stalled": stalled,
+                "restarts": slot.restarts,
+                "heartbeat_age_sec": round(age, 1) if age is not None else None,
+                "batches": int(snap["batches"]),
+                "claimed": int(snap["claimed"]),
+                "completed": int(snap["completed"]),
+                "uptime_sec": round(now - snap["started"], 1) if snap["started"] else None,
+            }
+        )
+        log = logger.warning if (stalled or not alive) else logger.info
+        log(
+            "%s pid=%s tables=%s alive=%s heartbeat=%ss ago batches=%s completed=%s/%s restarts=%s",
+            slot.name, report[-1]["pid"], "+".join(slot.tables) if slot.tables else "all",
+            alive, report[-1]["heartbeat_age_sec"], report[-1]["batches"],
+            report[-1]["completed"], report[-1]["claimed"], slot.restarts,
+        )
+
+    if Config.HEALTH_FILE:
+        tmp = f"{Config.HEALTH_FILE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": now, "workers": report}, f, indent=2)
+        os.replace(tmp, Config.HEALTH_FILE)
+
+
+def _shutdown(slots: List[_Slot]) -> None:
+    running = [s.process for s in slots if s.process is not None and s.process.is_alive()]
+    logger.info("Stopping %s worker processes (finishing in-flight batches)", len(running))
+    for proc in running:
+        try:
+            os.kill(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + Config.SHUTDOWN_TIMEOUT_SEC
+    for proc in running:
+        proc.join(max(0.0, deadline - time.monotonic()))
+    for proc in running:
+        if proc.is_alive():
+            logger.warning("%s (pid %s) did not stop in time, killing it", proc.name, proc.pid)
+            proc.kill()
+            proc.join()
+
+
+if __name__ == "__main__":
+    supervise()
@@ -30,6 +30,20 @@ class Config:
     
     # Embedding Model
     EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+    # torch | onnx: int8 model exported by VectorDBWorker/onnx_export.py
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+    EMBEDDING_ONNX_PATH = os.getenv(
+        "EMBEDDING_ONNX_PATH", str(Path.home() / ".cache" / "igrs" / "onnx" / "all-MiniLM-L6-v2")
+    )
+    EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+    
+    # Embedding cache (SQLite, shared with VectorDBWorker when EMBEDDING_CACHE_PATH matches)
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    EMBEDDING_CACHE_PATH = os.getenv(
+        "EMBEDDING_CACHE_PATH", str(Path.home() / ".cache" / "igrs" / "embedding_cache.sqlite")
+    )
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
     
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL")
@@ -1,17 +1,33 @@
 import uuid
 from typing import List, Dict
-from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
 from config import Config
+from services.embedding_cache import EmbeddingCache
 
 
 class EmbeddingService:
     """Create embeddings for text chunks"""
     
     def __init__(self):
-        print(f"   Loading embedding model: {Config.EMBED_MODEL}")
-        self.model = SentenceTransformer(Config.EMBED_MODEL)
+        namespace = f"{Config.EMBED_MODEL}|normalized"
+        if Config.EMBEDDING_BACKEND == "onnx":
+            from services.onnx_encoder import OnnxSentenceEncoder
+            print(f"   Loading int8 ONNX embedding model from {Config.EMBEDDING_ONNX_PATH}")
+            self.model = OnnxSentenceEncoder(Config.EMBEDDING_ONNX_PATH, Config.EMBEDDING_ONNX_THREADS)
+            namespace = f"{Config.EMBED_MODEL}|onnx-int8|normalized"
+        else:
+            from sentence_transformers import SentenceTransformer
+            print(f"   Loading embedding model: {Config.EMBED_MODEL}")
+            self.model = SentenceTransformer(Config.EMBED_MODEL)
         print(f"   ✓ Model loaded")
+        
+        # Same namespace as VectorDBWorker, so a shared cache file serves both
+        self.cache = None
+        if Config.EMBEDDING_CACHE_ENABLED:
+            self.cache = EmbeddingCache(
+                Config.EMBEDDING_CACHE_PATH,
+                namespace,
+                Config.EMBEDDING_CACHE_MAX_ENTRIES,
+            )
     
     def chunk_text(self, pages: List[Dict], chunk_size: int = 1000, overlap: int = 200) -> List[Dict]:
         """Chunk text from pages with overlap"""
@@ -33,11 +49,32 @@ class EmbeddingService:
         return chunks
     
     def create_embeddings(self, chunks: List[Dict]) -> List[Dict]:
-        """Create embeddings for chunks"""
-        for chunk in tqdm(chunks, desc="Creating embeddings"):
-            embedding = self.model.encode(chunk["text"]).tolist()
+        """Create embeddings for chunks, reusing cached vectors for repeated text"""
+        texts = [chunk["text"] for chunk in chunks]
+        embeddings = self.cache.get_many(texts) if self.cache else [None] * len(texts)
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        
+        if missing:
+            encoded = self.model.encode(
+                [texts[i] for i in missing],
+                batch_size=Config.EMBED_BATCH_SIZE,
+                normalize_embeddings=True,
+                show_progress_bar=True,
+            )
+            fresh = [emb.tolist() for emb in encoded]
+            for i, emb in zip(missing, fresh):
+                embeddings[i] = emb
+            if self.cache:
+                self.cache.put_many([texts[i] for i in missing], fresh)
+        
+        for chunk, embedding in zip(chunks, embeddings):
             chunk["embedding"] = embedding
         
+        if self.cache:
+            stats = self.cache.stats()
+            print(f"   ✓ Embeddings: {len(chunks) - len(missing)} cached, {len(missing)} computed "
+                  f"(cache hit rate {stats['hit_rate']:.0%})")
+        
         return chunks
     
     def prepare_chunks_for_pinecone(self, chunks: List[Dict], metadata: Dict = None) -> List[Dict]:
@@ -0,0 +1,117 @@
+"""
+Concurrent execution of the per-grievance agent calls.
+
+Each agent call is one Groq round-trip, and most of them only read the
+described query. run_agent_graph runs every step whose dependencies are
+done on a bounded thread pool, so a grievance takes about as long as its
+longest dependency chain instead of the sum of all calls. RateLimiter
+keeps the whole process under the Groq requests-per-minute quota,
+however many steps are in flight.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+
+class RateLimiter:
+    """Token bucket: `per_minute` calls per minute with bursts of up to `burst`. per_minute <= 0 disables it."""
+
+    def __init__(self, per_minute: float, burst: int = 1):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a call may start; returns the seconds waited"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now and sleep outside the lock, so waiters
+            # are served in arrival order
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class AgentStep(NamedTuple):
+    """One agent call; `run` receives the results of `deps` by name"""
+
+    run: Callable[[Dict[str, Any]], Any]
+    deps: Tuple[str, ...] = ()
+
+
+def run_agent_graph(
+    steps: Dict[str, AgentStep], max_workers: int = 4
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run `steps` as soon as their dependencies finish, at most `max_workers`
+    at a time. Returns (results, seconds per step).
+
+    If a step raises, no new steps are started, the running ones finish,
+    and the first error is re-raised.
+    """
+    for name, step in steps.items():
+        unknown = [d for d in step.deps if d not in steps]
+        if unknown:
+            raise ValueError(f"Agent step {name!r} depends on unknown steps {unknown}")
+
+    results: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    remaining = dict(steps)
+    running: Dict[Future, str] = {}
+    error: Optional[BaseException] = None
+
+    def _timed(name: str, step: AgentStep, inputs: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return step.run(inputs)
+        finally:
+            timings[name] = time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="agent") as pool:
+        while remaining or running:
+            if error is None:
+                ready = [n for n, s in remaining.items() if all(d in results for d in s.deps)]
+                for name in ready:
+                    step = remaining.pop(name)
+                    inputs = {d: results[d] for d in step.deps}
+                    running[pool.submit(_timed, name, step, inputs)] = name
+            if not running:
+                if remaining and error is None:
+                    raise ValueError(f"Agent steps with a dependency cycle: {sorted(remaining)}")
+                break
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except BaseException as e:  # noqa: BLE001
+                    if error is None:
+                        error = e
+    if error is not None:
+        raise error
+    return results, timings
+
+
+def critical_path(steps: Dict[str, AgentStep], timings: Dict[str, float]) -> float:
+    """Duration of the longest dependency chain, given each step's duration"""
+    finish: Dict[str, float] = {}
+
+    def _finish(name: str) -> float:
+        if name not in finish:
+            start = max((_finish(d) for d in steps[name].deps), default=0.0)
+            finish[name] = start + timings.get(name, 0.0)
+        return finish[name]
+
+    return max((_finish(n) for n in steps), default=0.0)
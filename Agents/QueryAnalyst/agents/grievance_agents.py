@@ -1,11 +1,13 @@
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 import json
 import re
 
 from crewai import Crew, LLM, Task
 from configs.config import Config
 from prompts import grievance as grievance_prompts
+from .agent_runner import RateLimiter
 from .crew_agents import AgentsManager, TaskCreator
+from .structured_classifier import FIELD_SCHEMAS, validate_fields
 
 
 _crewai_llm = LLM(
@@ -19,6 +21,18 @@ _crewai_llm = LLM(
 _agents_manager = AgentsManager(_crewai_llm)
 _task_creator = TaskCreator(_agents_manager)
 _reasoning_log: Dict[str, Any] = {}
+# Shared by every task, including ones that run concurrently
+_rate_limiter = RateLimiter(Config.GROQ_REQUESTS_PER_MINUTE, Config.GROQ_BURST)
+_groq_llm = None
+
+
+def _get_groq_llm():
+    global _groq_llm
+    if _groq_llm is None:
+        from LLMs.groq_llm import GroqLLM
+
+        _groq_llm = GroqLLM()
+    return _groq_llm
 
 
 def _run_task(task: Task, key: str) -> str:
@@ -29,6 +43,7 @@ def _run_task(task: Task, key: str) -> str:
         verbose=False,
         tracing=False,
     )
+    _rate_limiter.acquire()
     result = crew.kickoff()
     _reasoning_log[key] = {
         "raw_output": result.raw,
@@ -110,16 +125,24 @@ def suggest_department(enhanced_query: str, retrieved_data: Dict[str, Any]) -> D
     return _parse_json(raw)
 
 
+def analyze_sentiment(enhanced_query: str) -> Dict[str, Any]:
+    task = _task_creator.create_sentiment_task(enhanced_query)
+    raw = _run_task(task, "sentiment")
+    return _parse_json(raw)
+
+
+def analyze_priority(enhanced_query: str) -> Dict[str, Any]:
+    task = _task_creator.create_priority_task(enhanced_query)
+    raw = _run_task(task, "priority")
+    return _parse_json(raw)
+
+
 def analyze_sentiment_priority(enhanced_query: str) -> Dict[str, Any]:
     """Run separate sentiment and priority agents, then merge into one dict."""
-    sentiment_task = _task_creator.create_sentiment_task(enhanced_query)
-    sentiment_raw = _run_task(sentiment_task, "sentiment")
-    sentiment = _parse_json(sentiment_raw)
+    return merge_sentiment_priority(analyze_sentiment(enhanced_query), analyze_priority(enhanced_query))
 
-    priority_task = _task_creator.create_priority_task(enhanced_query)
-    priority_raw = _run_task(priority_task, "priority")
-    priority = _parse_json(priority_raw)
 
+def merge_sentiment_priority(sentiment: Dict[str, Any], priority: Dict[str, Any]) -> Dict[str, Any]:
     merged: Dict[str, Any] = {
         "sentiment_score": sentiment.get("sentiment_score"),
         "urgency_level": sentiment.get("urgency_level"),
@@ -135,6 +158,31 @@ def analyze_sentiment_priority(enhanced_query: str) -> Dict[str, Any]:
     return merged
 
 
+def classify_grievance(
+    enhanced_query: str,
+    retrieved_data: Dict[str, Any],
+    validation_result: Dict[str, Any] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    Every classification field from ONE Groq JSON-mode call, without CrewAI.
+    Returns (valid fields, {failed field: reason}); callers re-run only the
+    failed fields through their own agents.
+    """
+    system, user = grievance_prompts.classify_grievance_prompt(enhanced_query, retrieved_data, validation_result)
+    _rate_limiter.acquire()
+    try:
+        data = _get_groq_llm().json_completion(system, user)
+    except Exception as e:
+        _reasoning_log["structured_classification"] = {"error": str(e)}
+        return {}, {name: f"request failed: {e}" for name in FIELD_SCHEMAS}
+    valid, failed = validate_fields(data)
+    _reasoning_log["structured_classification"] = {
+        "raw_output": data,
+        "failed_fields": failed,
+    }
+    return valid, failed
+
+
 def policy_search_queries(enhanced_query: str, category_info: Dict[str, Any]) -> Dict[str, Any]:
     """Use CrewAI policy agent to generate ONLY web search queries for policies."""
     task = _task_creator.create_policy_task(enhanced_query, category_info)
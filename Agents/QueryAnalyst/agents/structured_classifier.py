@@ -0,0 +1,164 @@
+"""
+Schema and validation for the single-call classification mode.
+
+The grievance is classified by one Groq JSON-mode request covering every
+field (prompts.grievance.classify_grievance_prompt). validate_fields checks
+each top-level field against FIELD_SCHEMAS, normalises what it safely can
+(enum casing, numeric strings, a lone string where an array is expected)
+and reports the fields that still do not fit; only those go back to their
+own CrewAI agent.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Tuple
+
+_LEVEL = ("High", "Medium", "Low")
+
+# field -> {key: spec}; spec is "str", "list", "bool", ("enum", choices) or ("number", lo, hi)
+FIELD_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "query_type": {
+        "query_type": ("enum", ("Complaint", "Suggestion", "Query", "Feedback", "Follow-up", "Appeal")),
+        "confidence": ("enum", _LEVEL),
+        "reasoning": "str",
+    },
+    "location": {
+        "pincode": "str",
+        "district": "str",
+        "state": "str",
+        "location_confidence": ("enum", _LEVEL),
+        "raw_location_mentions": "list",
+    },
+    "emotion": {
+        "primary_emotion": ("enum", ("Angry", "Frustrated", "Sad", "Confused", "Urgent", "Neutral")),
+        "secondary_emotions": "list",
+        "emotion_intensity": ("number", 1, 10),
+        "emotional_indicators": "list",
+    },
+    "severity": {
+        "severity_level": ("enum", ("Critical", "High", "Medium", "Low")),
+        "criticality_score": ("number", 1, 10),
+        "impact_scope": ("enum", ("Individual", "Community", "Regional")),
+        "potential_consequences": "list",
+    },
+    "patterns": {
+        "is_recurring_issue": "bool",
+        "similar_patterns_found": "list",
+        "spam_likelihood": ("enum", _LEVEL),
+        "pattern_notes": "str",
+    },
+    "fraud": {
+        "fraud_risk": ("enum", _LEVEL),
+        "spam_indicators": "list",
+        "authenticity_confidence": ("enum", _LEVEL),
+        "verification_recommendations": "list",
+    },
+    "category": {
+        "main_category": "str",
+        "sub_category": "str",
+        "confidence": ("enum", _LEVEL),
+        "reasoning": "str",
+    },
+    "similar_cases": {
+        "top_3_similar_cases": "list",
+        "common_resolutions": "list",
+        "patterns_identified": "list",
+    },
+    "department": {
+        "recommended_department": "str",
+        "contact_information": "str",
+        "jurisdiction": "str",
+    },
+    "sentiment": {
+        "sentiment_score": ("number", 1, 10),
+        "urgency_level": ("enum", _LEVEL),
+        "emotional_tone": "str",
+        "key_emotional_indicators": "list",
+    },
+    "priority": {
+        "priority_level": ("enum", _LEVEL),
+        "justification": "str",
+        "expected_resolution_time": "str",
+        "risk_assessment": "str",
+    },
+    "policy_search": {
+        "queries": "list",
+        "reasoning": "str",
+    },
+}
+
+# Keys whose value may legitimately be empty
+_MAY_BE_EMPTY = {"pincode", "district", "state", "secondary_emotions", "raw_location_mentions", "similar_patterns_found",
+                 "spam_indicators", "top_3_similar_cases", "common_resolutions", "patterns_identified"}
+
+
+class _Invalid(ValueError):
+    pass
+
+
+def _coerce(key: str, value: Any, spec: Any) -> Any:
+    if value is None:
+        # null is the model's usual answer for "not found" (e.g. no pincode)
+        if key in _MAY_BE_EMPTY and spec in ("str", "list"):
+            return "" if spec == "str" else []
+        raise _Invalid(f"{key} missing")
+    if spec == "str":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        if not isinstance(value, str):
+            raise _Invalid(f"{key} is not a string")
+        if not value.strip() and key not in _MAY_BE_EMPTY:
+            raise _Invalid(f"{key} is empty")
+        return value
+    if spec == "list":
+        if isinstance(value, str):
+            value = [value] if value.strip() else []
+        if not isinstance(value, list):
+            raise _Invalid(f"{key} is not an array")
+        if not value and key not in _MAY_BE_EMPTY:
+            raise _Invalid(f"{key} is empty")
+        return value
+    if spec == "bool":
+        if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+            return value.strip().lower() == "true"
+        if not isinstance(value, bool):
+            raise _Invalid(f"{key} is not a boolean")
+        return value
+    kind = spec[0]
+    if kind == "enum":
+        for choice in spec[1]:
+            if isinstance(value, str) and value.strip().lower() == choice.lower():
+                return choice
+        raise _Invalid(f"{key}={value!r} not in {spec[1]}")
+    if kind == "number":
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise _Invalid(f"{key}={value!r} is not a number") from None
+        if not spec[1] <= number <= spec[2]:
+            raise _Invalid(f"{key}={number} outside {spec[1]}-{spec[2]}")
+        return int(number) if number.is_integer() else number
+    raise ValueError(f"Unknown schema spec {spec!r}")
+
+
+def validate_field(name: str, value: Any) -> Dict[str, Any]:
+    """Normalised copy of one field's object; raises ValueError if it does not fit the schema"""
+    if not isinstance(value, dict):
+        raise _Invalid(f"{name} is not an object")
+    out = dict(value)
+    for key, spec in FIELD_SCHEMAS[name].items():
+        out[key] = _coerce(key, value.get(key), spec)
+    return out
+
+
+def validate_fields(data: Any) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """Returns ({field: normalised object}, {field: why it failed}) over FIELD_SCHEMAS"""
+    valid: Dict[str, Dict[str, Any]] = {}
+    failed: Dict[str, str] = {}
+    if not isinstance(data, dict):
+        return valid, {name: "response is not a JSON object" for name in FIELD_SCHEMAS}
+    for name in FIELD_SCHEMAS:
+        try:
+            valid[name] = validate_field(name, data.get(name))
+        except ValueError as e:
+            failed[name] = str(e)
+    return valid, failed
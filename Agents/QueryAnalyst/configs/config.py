@@ -34,6 +34,36 @@ class Config:
         return cls.GRIEVANCE_TABLE
 
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # 384-dim
+    # torch | onnx: int8 model exported by VectorDBWorker/onnx_export.py
+    EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch").lower()
+    EMBEDDING_ONNX_PATH = os.environ.get(
+        "EMBEDDING_ONNX_PATH", str(Path.home() / ".cache" / "igrs" / "onnx" / "all-MiniLM-L6-v2")
+    )
+    EMBEDDING_ONNX_THREADS = int(os.environ.get("EMBEDDING_ONNX_THREADS", "0"))
+
+    # Classification agents (workflow/nodes.py NODE_run_agents): independent
+    # agents run concurrently; every Groq call goes through one rate limiter
+    AGENT_MAX_CONCURRENCY = int(os.environ.get("AGENT_MAX_CONCURRENCY", "6"))
+    GROQ_REQUESTS_PER_MINUTE = float(os.environ.get("GROQ_REQUESTS_PER_MINUTE", "30"))  # 0 = no limit
+    GROQ_BURST = int(os.environ.get("GROQ_BURST", "12"))
+    # crew: one CrewAI agent per field | structured: one Groq JSON-mode call for
+    # every field, with the agents only re-run for fields that fail validation
+    AGENT_CLASSIFICATION_MODE = os.environ.get("AGENT_CLASSIFICATION_MODE", "crew").lower()
+
+    # Grievance images are decoded once per request (tools/image_context.py)
+    # and sent to Gemini as a JPEG at most IMAGE_MAX_SIDE px on its long side
+    IMAGE_MAX_SIDE = int(os.environ.get("IMAGE_MAX_SIDE", "1024"))
+    IMAGE_JPEG_QUALITY = int(os.environ.get("IMAGE_JPEG_QUALITY", "85"))
+    # separate: validate, locate and describe with one Gemini request each |
+    # combined: one request for all three (tools/image_combined.py), with the
+    # separate request only for a section that fails its check
+    IMAGE_VISION_MODE = os.environ.get("IMAGE_VISION_MODE", "separate").lower()
+
+    # Connections kept per Neon DB by the similarity search (tools/db_query.py)
+    DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "4"))
+    # worker.py: load the embedding model, LLM clients, DB connections and
+    # compiled graph before the first message instead of during it
+    WARMUP_ON_START = os.environ.get("WARMUP_ON_START", "true").lower() in ("1", "true", "yes")
 
     OUTPUT_DIR = BASE_DIR / "outputs"
     OUTPUT_DIR.mkdir(exist_ok=True)
@@ -11,9 +11,58 @@ os.environ.setdefault("LANGSMITH_SKIP_TRACING_PROMPT", "true")
 os.environ.setdefault("LANGSMITH_TRACING", "false")
 os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
 
+import threading
+import time
 from typing import Optional, Dict, Any
 from workflow.graph import build_graph
 
+# Compiled once per process; a compiled graph holds no per-run state
+_app = None
+_app_lock = threading.Lock()
+
+
+def get_app():
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = build_graph()
+    return _app
+
+
+def warmup() -> Dict[str, Any]:
+    """
+    Do the one-off work of the first grievance up front: compile the graph,
+    load the embedding model, open the LLM clients' connections and one
+    pooled connection per Neon DB. Returns seconds per step; a step that
+    fails is reported as its error and left to happen on first use.
+    """
+    from workflow import nodes
+    from agents import grievance_agents
+
+    def _llm_clients():
+        # Constructing the clients is cheap; listing models is a free call
+        # that opens the HTTPS connection the first completion would
+        grievance_agents._get_groq_llm()
+        nodes.groq_llm.client.models.list()
+
+    steps = (
+        ("graph", get_app),
+        ("embedding_model", lambda: nodes._get_embedding_engine().embed_query("warmup")),
+        ("llm_clients", _llm_clients),
+        ("db_pool", nodes.db_engine.warm_pools),
+    )
+    timings: Dict[str, Any] = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+            timings[name] = round(time.perf_counter() - started, 3)
+        except Exception as e:
+            timings[name] = f"failed: {e}"
+    return timings
+
+
 def analysis(
     query: str,
     image_path: Optional[str] = None,
@@ -21,7 +70,7 @@ def analysis(
     citizen_id: Optional[str] = None,
     grievance_id: Optional[str] = None,
 ) -> Dict[str, Any]:
-    app = build_graph()
+    app = get_app()
     initial_state = {
         "query": query,
         "image_path": image_path,
@@ -195,6 +195,54 @@ Return JSON:
     return system, user
 
 
+def classify_grievance_prompt(
+    enhanced_query: str,
+    retrieved_data: Dict[str, Any],
+    validation_result: Dict[str, Any] = None,
+) -> Tuple[str, str]:
+    """
+    One JSON-mode request for every classification field (the per-agent
+    prompts above, merged). Keys and value formats match the CrewAI task
+    outputs so both paths produce the same agents_outputs.
+    """
+    system = (
+        "You are a grievance analysis engine for Indian public grievances. "
+        "You return a single JSON object and nothing else."
+    )
+    validation_info = ""
+    if validation_result:
+        validation_info = f"""
+IMAGE VALIDATION RESULT:
+- Is Valid: {validation_result.get('is_valid', True)}
+- Validation Score: {validation_result.get('validation_score', 'N/A')}
+- Reasoning: {validation_result.get('reasoning', 'N/A')}
+"""
+    user = f"""
+GRIEVANCE: {enhanced_query}
+{validation_info}
+SIMILAR_DATA (JSON, may be truncated):
+{json.dumps(retrieved_data, default=str)[:8000]}
+
+Return ONE JSON object with exactly these keys, each holding an object:
+- query_type: {{query_type: Complaint | Suggestion | Query | Feedback | Follow-up | Appeal, confidence: High | Medium | Low, reasoning: string}}
+- location: {{pincode: string or "", district: string, state: string, location_confidence: High | Medium | Low, raw_location_mentions: array of strings}}
+- emotion: {{primary_emotion: Angry | Frustrated | Sad | Confused | Urgent | Neutral, secondary_emotions: array of strings, emotion_intensity: number 1-10, emotional_indicators: array of phrases}}
+- severity: {{severity_level: Critical | High | Medium | Low, criticality_score: number 1-10, impact_scope: Individual | Community | Regional, potential_consequences: array of strings}}
+- patterns: {{is_recurring_issue: boolean, similar_patterns_found: array of strings, spam_likelihood: Low | Medium | High, pattern_notes: string}}
+- fraud: {{fraud_risk: Low | Medium | High, spam_indicators: array of strings, authenticity_confidence: High | Medium | Low, verification_recommendations: array of strings}}
+- category: {{main_category: string (e.g. Sanitation, Roads, Water, Financial Fraud, Environment, Cybercrime, Other), sub_category: string, confidence: High | Medium | Low, reasoning: string}}
+- similar_cases: {{top_3_similar_cases: array of short case summaries, common_resolutions: array of strings, patterns_identified: array of strings}}
+- department: {{recommended_department: string, contact_information: string (generic, non-personal), jurisdiction: string}}
+- sentiment: {{sentiment_score: number 1-10, urgency_level: High | Medium | Low, emotional_tone: string, key_emotional_indicators: array of phrases}}
+- priority: {{priority_level: High | Medium | Low, justification: string, expected_resolution_time: string, risk_assessment: string}}
+- policy_search: {{queries: array of 3-6 web search query strings for relevant government schemes/policies, reasoning: string}}
+
+Fraud risk is judged from BEHAVIOUR (image-query mismatch, vague or generic details,
+promotional or repeated content), never from words like "fraud" or "scam" in the text.
+"""
+    return system, user
+
+
 def final_report_prompt(
     grievance_text: str,
     image_summary: Dict[str, Any],
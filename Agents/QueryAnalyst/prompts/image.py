@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
 
 def image_analysis_prompt(query: str) -> str:
@@ -22,3 +22,40 @@ Return STRICT JSON with:
 - confidence: high/medium/low
 """
 
+
+def combined_image_prompt(query: str, gps: Optional[Dict[str, float]] = None) -> str:
+    """
+    One vision request covering image validation, location extraction and
+    the description (the three prompts of the separate path, merged). The
+    response schema is enforced by the request; this only explains it.
+    """
+    gps_info = (
+        f"The photo's EXIF GPS position is {gps['latitude']:.6f}, {gps['longitude']:.6f}; "
+        "use it for latitude/longitude and to interpret what you see."
+        if gps
+        else "The photo has no GPS metadata."
+    )
+    return f"""
+You are the image intake step of a government grievance system.
+
+CITIZEN'S COMPLAINT:
+{query}
+
+{gps_info}
+
+Look at the image once and fill in all three sections of the JSON response:
+
+1. validation - does the image provide visual evidence for the complaint?
+   validation_score from 0.0 (unrelated) to 1.0 (clearly shows the issue);
+   is_valid is true when validation_score >= 0.5. List any mismatches.
+   Be strict but fair: citizens are not professional photographers.
+
+2. location - every location clue visible in the image: text on signboards,
+   nameplates and street signs, landmarks, address components, area type
+   (residential/commercial/industrial/rural/urban_slum/mixed). Only extract
+   what is visible; set confidence to "none" if there is nothing.
+
+3. description - a detailed visual summary, the important objects, the
+   scene type, whether the image supports the grievance (context_match),
+   and any visible text.
+"""
@@ -0,0 +1,121 @@
+"""
+Cold vs warm first-message latency of the QueryAnalyst worker.
+
+    python startup_bench.py [--rounds 3] [--full]
+
+Each round starts two fresh processes. "cold" handles its first message
+straight after import, paying for graph compilation, model loading and
+DB connects inside that message; "warm" runs main.warmup() first, as
+worker.py does at boot. Both then time a second message for the steady
+state.
+
+By default a "message" is the local part of the pipeline: the compiled
+graph, the query embedding and the similarity search over every Neon DB.
+--full runs main.analysis() end to end instead, which calls the LLMs and
+stores the grievance like a real message does.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+_SAMPLE_QUERY = (
+    "There is a huge garbage pile near my apartment in Bangalore. It has been there for "
+    "2 weeks and the BBMP workers are not cleaning it despite multiple complaints."
+)
+
+
+def _measure(mode: str, full: bool) -> dict:
+    """Runs in a child process so every round starts cold"""
+    started = time.perf_counter()
+    import main
+
+    import_s = time.perf_counter() - started
+
+    warmup_s = 0.0
+    warmup_steps = {}
+    if mode == "warm":
+        t = time.perf_counter()
+        warmup_steps = main.warmup()
+        warmup_s = time.perf_counter() - t
+
+    def _message():
+        if full:
+            main.analysis(_SAMPLE_QUERY)
+            return
+        from workflow import nodes
+
+        main.get_app()
+        emb = nodes._get_embedding_engine().embed_query(_SAMPLE_QUERY)
+        nodes.db_engine.retrive_releveant_data(emb)
+
+    t = time.perf_counter()
+    _message()
+    first_s = time.perf_counter() - t
+    t = time.perf_counter()
+    _message()
+    second_s = time.perf_counter() - t
+
+    return {
+        "mode": mode,
+        "import_s": import_s,
+        "warmup_s": warmup_s,
+        "warmup_steps": warmup_steps,
+        "first_s": first_s,
+        "second_s": second_s,
+    }
+
+
+def bench(rounds: int, full: bool) -> None:
+    results = {"cold": [], "warm": []}
+    for _ in range(rounds):
+        for mode in ("cold", "warm"):
+            cmd = [sys.executable, __file__, "_measure", mode] + (["--full"] if full else [])
+            proc = subprocess.run(cmd, capture_output=True, text=True, cwd=str(Path(__file__).resolve().parent))
+            if proc.returncode != 0:
+                print(f"❌ {mode} run failed:\n{proc.stderr[-2000:]}")
+                return
+            results[mode].append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"{rounds} round(s), message = {'analysis()' if full else 'graph + embedding + similarity search'}")
+    print(f"{'mode':<6}{'import s':>10}{'warmup s':>10}{'1st msg s':>11}{'2nd msg s':>11}")
+    medians = {}
+    for mode, runs in results.items():
+        med = {k: statistics.median(r[k] for r in runs) for k in ("import_s", "warmup_s", "first_s", "second_s")}
+        medians[mode] = med
+        print(
+            f"{mode:<6}{med['import_s']:>10.2f}{med['warmup_s']:>10.2f}"
+            f"{med['first_s']:>11.2f}{med['second_s']:>11.2f}"
+        )
+    failed = {k: v for k, v in results["warm"][-1]["warmup_steps"].items() if isinstance(v, str)}
+    if failed:
+        print(f"⚠️  Warm-up steps failed: {failed}")
+    cold, warm = medians["cold"], medians["warm"]
+    print(
+        f"First message: {cold['first_s']:.2f}s cold vs {warm['first_s']:.2f}s warm "
+        f"({cold['first_s'] - warm['first_s']:.2f}s moved to boot, warm-up took {warm['warmup_s']:.2f}s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold vs warm first-message latency")
+    parser.add_argument("command", nargs="?", default="bench", choices=["bench", "_measure"])
+    parser.add_argument("mode", nargs="?", help=argparse.SUPPRESS)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--full", action="store_true", help="Time main.analysis() (calls the LLMs, stores the grievance)")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench(max(1, args.rounds), args.full)
+    else:
+        # Keep library chatter off stdout; the parent parses the last line
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+        print(json.dumps(_measure(args.mode, args.full)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 
+from configs.config import Config
 from configs.db import ACTIVE_DB_SCHEMAS
 
 
@@ -11,8 +17,74 @@ class DatabaseQueryEngine:
     """Runs similarity search queries against configured Neon/Postgres DBs."""
 
     def __init__(self) -> None:
-        # stateless; kept for future extension
-        pass
+        # One pool per DSN, created on first use (or by warm_pools)
+        self._pools: Dict[str, ThreadedConnectionPool] = {}
+        self._pools_lock = threading.Lock()
+
+    def _pool(self, db_url: str) -> ThreadedConnectionPool:
+        secure_dsn = self._ensure_sslmode(db_url)
+        pool = self._pools.get(secure_dsn)
+        if pool is None:
+            # Opens the one connection kept idle between queries; done outside
+            # the lock so several DBs can connect at once
+            created = ThreadedConnectionPool(
+                1,
+                max(1, Config.DB_POOL_MAX),
+                secure_dsn,
+                connect_timeout=10,
+                application_name="IGRSAgent",
+            )
+            with self._pools_lock:
+                pool = self._pools.setdefault(secure_dsn, created)
+            if pool is not created:
+                created.closeall()
+        return pool
+
+    @contextmanager
+    def _connection(self, db_url: str) -> Iterator[Any]:
+        """
+        Borrow a pooled connection. It goes back to the pool with its
+        transaction rolled back, or is discarded if the server dropped it
+        (Neon closes idle connections when its compute suspends).
+        """
+        pool = self._pool(db_url)
+        conn = pool.getconn()
+        if conn.closed:
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            try:
+                conn.rollback()  # read-only queries; end the transaction before reuse
+                broken = False
+            except psycopg2.Error:
+                broken = True
+            pool.putconn(conn, close=broken or bool(conn.closed))
+
+    def warm_pools(self) -> Dict[str, float]:
+        """Open and check one connection per configured DB, in parallel; returns seconds per DB"""
+
+        def _ping(db_url: str) -> float:
+            started = time.perf_counter()
+            with self._connection(db_url) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                    cur.fetchone()
+            return time.perf_counter() - started
+
+        # Entries that share a DSN share a pool; ping it once
+        urls = {db["name"]: self._ensure_sslmode(db["db_url"]) for db in ACTIVE_DB_SCHEMAS}
+        unique = set(urls.values())
+        with ThreadPoolExecutor(max_workers=max(1, len(unique))) as pool:
+            futures = {url: pool.submit(_ping, url) for url in unique}
+        return {name: futures[url].result() for name, url in urls.items()}
+
+    def close(self) -> None:
+        with self._pools_lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.closeall()
 
     def _ensure_sslmode(self, dsn: str) -> str:
         """Ensure sslmode=require is present in the DSN."""
@@ -29,60 +101,64 @@ class DatabaseQueryEngine:
         top_k: int = 5,
     ) -> List[Dict[str, Any]]:
         """Query a single table using pgvector <=> similarity."""
-        secure_dsn = self._ensure_sslmode(db_url)
-        conn = psycopg2.connect(
-            secure_dsn,
-            connect_timeout=10,
-            application_name="IGRSAgent",
-        )
-        cur = conn.cursor()
-
-        # discover non-embedding columns
-        cur.execute(
-            """
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_name = %s AND column_name != %s;
-            """,
-            (table_name.lower(), embedding_col),
-        )
-        cols = [r[0] for r in cur.fetchall()]
-
-        if cols:
-            col_list = ", ".join([f'"{c}"' for c in cols])
-            select_clause = f"{col_list}, 1 - (\"{embedding_col}\" <=> %s::vector) AS similarity"
-        else:
-            # No non-embedding columns, return only similarity score
-            select_clause = f"1 - (\"{embedding_col}\" <=> %s::vector) AS similarity"
-
-        sql = f"""
-            SELECT {select_clause}
-            FROM "{table_name}"
-            ORDER BY "{embedding_col}" <=> %s::vector
-            LIMIT %s;
-        """
-
-        cur.execute(sql, (user_emb_str, user_emb_str, top_k))
-        rows = cur.fetchall()
+        try:
+            return self._query_table(user_emb_str, db_url, table_name, embedding_col, top_k)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Most likely a pooled connection the server already closed
+            return self._query_table(user_emb_str, db_url, table_name, embedding_col, top_k)
 
-        results: List[Dict[str, Any]] = []
+    def _query_table(
+        self,
+        user_emb_str: str,
+        db_url: str,
+        table_name: str,
+        embedding_col: str,
+        top_k: int,
+    ) -> List[Dict[str, Any]]:
+        with self._connection(db_url) as conn, conn.cursor() as cur:
+            # discover non-embedding columns
+            cur.execute(
+                """
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name = %s AND column_name != %s;
+                """,
+                (table_name.lower(), embedding_col),
+            )
+            cols = [r[0] for r in cur.fetchall()]
 
-        for row in rows:
-            row_dict: Dict[str, Any] = {}
             if cols:
-                for col, val in zip(cols, row[:-1]):
-                    if isinstance(val, (datetime, date)):
-                        row_dict[col] = val.isoformat()
-                    elif isinstance(val, Decimal):
-                        row_dict[col] = float(val)
-                    else:
-                        row_dict[col] = str(val) if val is not None else ""
-            # last column is similarity
-            row_dict["similarity"] = float(row[-1])
-            results.append(row_dict)
-
-        cur.close()
-        conn.close()
+                col_list = ", ".join([f'"{c}"' for c in cols])
+                select_clause = f"{col_list}, 1 - (\"{embedding_col}\" <=> %s::vector) AS similarity"
+            else:
+                # No non-embedding columns, return only similarity score
+                select_clause = f"1 - (\"{embedding_col}\" <=> %s::vector) AS similarity"
+
+            sql = f"""
+                SELECT {select_clause}
+                FROM "{table_name}"
+                ORDER BY "{embedding_col}" <=> %s::vector
+                LIMIT %s;
+            """
+
+            cur.execute(sql, (user_emb_str, user_emb_str, top_k))
+            rows = cur.fetchall()
+
+            results: List[Dict[str, Any]] = []
+
+            for row in rows:
+                row_dict: Dict[str, Any] = {}
+                if cols:
+                    for col, val in zip(cols, row[:-1]):
+                        if isinstance(val, (datetime, date)):
+                            row_dict[col] = val.isoformat()
+                        elif isinstance(val, Decimal):
+                            row_dict[col] = float(val)
+                        else:
+                            row_dict[col] = str(val) if val is not None else ""
+                # last column is similarity
+                row_dict["similarity"] = float(row[-1])
+                results.append(row_dict)
 
         return results
 
@@ -11,8 +11,12 @@ class EmbeddingEngine:
     @property
     def model(self):
         if self._model is None:
-            from sentence_transformers import SentenceTransformer
-            self._model = SentenceTransformer(Config.EMBEDDING_MODEL)
+            if Config.EMBEDDING_BACKEND == "onnx":
+                from tools.onnx_encoder import OnnxSentenceEncoder
+                self._model = OnnxSentenceEncoder(Config.EMBEDDING_ONNX_PATH, Config.EMBEDDING_ONNX_THREADS)
+            else:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(Config.EMBEDDING_MODEL)
         return self._model
 
     def encode(self, text: str) -> List[float]:
@@ -0,0 +1,152 @@
+"""
+Single-request image intake: validation, location clues and description
+from one Gemini vision call (IMAGE_VISION_MODE=combined).
+
+EXIF GPS is read locally first and handed to the model as context. The
+response is constrained by RESPONSE_SCHEMA and each section is checked on
+its own; analyze() returns only the sections that came back usable, and
+the graph falls back to the separate tool for any that did not.
+"""
+from typing import Any, Dict, Tuple, Union
+import json
+
+from LLMs.gemini_llm import GeminiClient
+from prompts.image import combined_image_prompt
+from tools.image_context import ImageContext
+from tools.image_validator import ImageQueryValidator
+from tools.location_extractor import LocationExtractor
+
+_STR = {"type": "string"}
+_STR_LIST = {"type": "array", "items": _STR}
+_CONFIDENCE = {"type": "string", "enum": ["high", "medium", "low"]}
+
+RESPONSE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "validation": {
+            "type": "object",
+            "properties": {
+                "is_valid": {"type": "boolean"},
+                "validation_score": {"type": "number"},
+                "reasoning": _STR,
+                "mismatches": _STR_LIST,
+                "confidence": _CONFIDENCE,
+                "image_shows": _STR,
+            },
+            "required": ["is_valid", "validation_score", "reasoning", "mismatches", "confidence", "image_shows"],
+        },
+        "location": {
+            "type": "object",
+            "properties": {
+                "address": _STR,
+                "latitude": {"type": "number", "nullable": True},
+                "longitude": {"type": "number", "nullable": True},
+                "landmarks": _STR_LIST,
+                "area_type": _STR,
+                "location_details": {
+                    "type": "object",
+                    "properties": {
+                        "visible_text": _STR_LIST,
+                        "street_name": _STR,
+                        "building_name": _STR,
+                        "area_name": _STR,
+                        "city": _STR,
+                        "state": _STR,
+                        "pincode": _STR,
+                        "nearby_places": _STR_LIST,
+                    },
+                },
+                "confidence": {"type": "string", "enum": ["high", "medium", "low", "none"]},
+                "extraction_method": _STR,
+                "notes": _STR,
+            },
+            "required": ["address", "landmarks", "area_type", "location_details", "confidence"],
+        },
+        "description": {
+            "type": "object",
+            "properties": {
+                "description": _STR,
+                "key_objects": _STR_LIST,
+                "scene_type": _STR,
+                "context_match": {"type": "boolean"},
+                "reasoning": _STR,
+                "contains_text": {"type": "boolean"},
+                "extracted_text": _STR,
+                "confidence": _CONFIDENCE,
+            },
+            "required": ["description", "key_objects", "scene_type", "context_match", "confidence"],
+        },
+    },
+    "required": ["validation", "location", "description"],
+}
+
+# section -> (key, expected type) that must be present for the section to be used
+_REQUIRED: Dict[str, Tuple[Tuple[str, Any], ...]] = {
+    "validation": (("is_valid", bool), ("validation_score", (int, float)), ("reasoning", str)),
+    "location": (("address", str), ("landmarks", list), ("confidence", str)),
+    "description": (("description", str), ("key_objects", list)),
+}
+
+
+class CombinedImageAnalyzer:
+    def __init__(self, validator: ImageQueryValidator, location_extractor: LocationExtractor) -> None:
+        self.client = GeminiClient()
+        self.validator = validator
+        self.location_extractor = location_extractor
+
+    def analyze(self, image: Union[str, ImageContext], query: str) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """
+        Returns ({section: result}, {section: why it is unusable}) for the
+        sections "validation", "location" and "description". Results have
+        the same shape as the separate tools' results.
+        """
+        try:
+            ctx = ImageContext.of(image)
+            gps_data = self.location_extractor.extract_gps_from_exif(ctx)
+            response = self.client.vision_model.generate_content(
+                [combined_image_prompt(query, gps_data), ctx.gemini_part()],
+                generation_config={
+                    "response_mime_type": "application/json",
+                    "response_schema": RESPONSE_SCHEMA,
+                },
+            )
+            data = json.loads((response.text or "").strip())
+        except Exception as e:
+            return {}, {section: f"request failed: {e}" for section in _REQUIRED}
+        if not isinstance(data, dict):
+            return {}, {section: "response is not a JSON object" for section in _REQUIRED}
+
+        results: Dict[str, Dict[str, Any]] = {}
+        failed: Dict[str, str] = {}
+        for section, required in _REQUIRED.items():
+            value = data.get(section)
+            problem = _check(value, required)
+            if problem:
+                failed[section] = problem
+            else:
+                results[section] = dict(value)
+
+        if "validation" in results:
+            results["validation"] = self.validator._finalize(results["validation"])
+        if "location" in results:
+            location = self.location_extractor._finalize(results["location"])
+            if gps_data:
+                print(f"   📍 GPS data found: {gps_data['latitude']:.6f}, {gps_data['longitude']:.6f}")
+                location = self.location_extractor._apply_gps(location, gps_data)
+            results["location"] = location
+        if "description" in results:
+            for key, default in (("scene_type", ""), ("context_match", None), ("reasoning", ""),
+                                 ("contains_text", None), ("extracted_text", ""), ("confidence", "medium")):
+                results["description"].setdefault(key, default)
+        return results, failed
+
+
+def _check(value: Any, required: Tuple[Tuple[str, Any], ...]) -> str:
+    if not isinstance(value, dict):
+        return "missing or not an object"
+    for key, expected in required:
+        if not isinstance(value.get(key), expected) or (expected is not bool and isinstance(value.get(key), bool)):
+            return f"{key} missing or not {getattr(expected, '__name__', 'a number')}"
+    if isinstance(value.get("description"), str) and not value["description"].strip():
+        return "description is empty"
+    return ""
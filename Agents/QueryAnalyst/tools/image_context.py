@@ -0,0 +1,118 @@
+"""
+Decoded image shared by the vision tools for one grievance.
+
+The validator, the location extractor and the image analysis all look at
+the same picture. ImageContext downloads and decodes it once, keeps its
+EXIF (GPS included) and re-encodes it as a JPEG no larger than
+IMAGE_MAX_SIDE on its longest side. That copy is what goes to Gemini:
+vision models downscale large images anyway, so full-resolution uploads
+only cost bandwidth and latency.
+"""
+from typing import Any, Dict, Optional, Union
+import io
+
+import requests
+from PIL import Image, ImageOps
+from PIL.ExifTags import GPSTAGS, TAGS
+
+from configs.config import Config
+
+_GPS_IFD = 0x8825
+
+
+class ImageContext:
+    def __init__(
+        self,
+        source: str,
+        jpeg_bytes: bytes,
+        exif: Dict[str, Any],
+        size: tuple,
+        original_size: tuple,
+        original_bytes: int,
+    ) -> None:
+        self.source = source
+        self.jpeg_bytes = jpeg_bytes
+        self.mime_type = "image/jpeg"
+        # Tag name -> value; "GPSInfo" is itself a dict keyed by GPS tag name
+        self.exif = exif
+        self.size = size
+        self.original_size = original_size
+        self.original_bytes = original_bytes
+
+    @classmethod
+    def load(
+        cls,
+        image_path_or_url: str,
+        max_side: Optional[int] = None,
+        quality: Optional[int] = None,
+    ) -> "ImageContext":
+        """Read a local path or http(s) URL; raises if it cannot be fetched or decoded"""
+        max_side = max_side or Config.IMAGE_MAX_SIDE
+        quality = quality or Config.IMAGE_JPEG_QUALITY
+
+        if image_path_or_url.startswith("http"):
+            resp = requests.get(image_path_or_url, timeout=30)
+            resp.raise_for_status()
+            raw = resp.content
+        else:
+            with open(image_path_or_url, "rb") as f:
+                raw = f.read()
+
+        image = Image.open(io.BytesIO(raw))
+        exif = _read_exif(image)
+        original_size = image.size
+
+        # Apply the EXIF orientation before resizing; the re-encoded JPEG
+        # carries no EXIF, so it would otherwise reach the model rotated
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        if max(image.size) > max_side:
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        with io.BytesIO() as buf:
+            image.save(buf, format="JPEG", quality=quality, optimize=True)
+            jpeg_bytes = buf.getvalue()
+
+        return cls(
+            source=image_path_or_url,
+            jpeg_bytes=jpeg_bytes,
+            exif=exif,
+            size=image.size,
+            original_size=original_size,
+            original_bytes=len(raw),
+        )
+
+    @classmethod
+    def of(cls, image: Union[str, "ImageContext"]) -> "ImageContext":
+        """Accept either a loaded context or a path/URL to load"""
+        return image if isinstance(image, ImageContext) else cls.load(image)
+
+    def gemini_part(self) -> Dict[str, Any]:
+        """Inline image part for GenerativeModel.generate_content"""
+        return {"mime_type": self.mime_type, "data": self.jpeg_bytes}
+
+    def describe(self) -> str:
+        return (
+            f"{self.original_size[0]}x{self.original_size[1]} {self.original_bytes / 1024:.0f} KB -> "
+            f"{self.size[0]}x{self.size[1]} {len(self.jpeg_bytes) / 1024:.0f} KB JPEG"
+        )
+
+
+def _read_exif(image: Image.Image) -> Dict[str, Any]:
+    try:
+        exif = image.getexif()
+    except Exception:
+        return {}
+    if not exif:
+        return {}
+    tags = {TAGS.get(tag_id, tag_id): value for tag_id, value in exif.items() if tag_id != _GPS_IFD}
+    try:
+        gps_ifd = exif.get_ifd(_GPS_IFD)
+    except Exception:
+        gps_ifd = {}
+    if gps_ifd:
+        tags["GPSInfo"] = {GPSTAGS.get(tag_id, tag_id): value for tag_id, value in gps_ifd.items()}
+    return tags
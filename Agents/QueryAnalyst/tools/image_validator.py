@@ -2,14 +2,12 @@
 Image-Query Validation Tool
 Validates if the provided image matches the grievance query before processing.
 """
-from typing import Dict, Any
-import io
+from typing import Dict, Any, Union
 import re
 import json
-import requests
-from PIL import Image
 
 from LLMs.gemini_llm import GeminiClient
+from tools.image_context import ImageContext
 
 
 class ImageQueryValidator:
@@ -17,7 +15,7 @@ class ImageQueryValidator:
         self.client = GeminiClient()
 
     def validate_image_query_match(
-        self, image_path_or_url: str, query: str
+        self, image: Union[str, ImageContext], query: str
     ) -> Dict[str, Any]:
         """
         Validate if image content matches the grievance query.
@@ -32,25 +30,7 @@ class ImageQueryValidator:
             }
         """
         try:
-            # Load image
-            if image_path_or_url.startswith("http"):
-                resp = requests.get(image_path_or_url, timeout=30)
-                resp.raise_for_status()
-                image = Image.open(io.BytesIO(resp.content))
-            else:
-                image = Image.open(image_path_or_url)
-
-            fmt = (image.format or "").upper()
-            mime_type = {
-                "JPEG": "image/jpeg",
-                "JPG": "image/jpeg",
-                "PNG": "image/png",
-                "WEBP": "image/webp",
-            }.get(fmt, "image/jpeg")
-
-            with io.BytesIO() as buf:
-                image.save(buf, format=image.format or "PNG")
-                image_bytes = buf.getvalue()
+            ctx = ImageContext.of(image)
 
             # Validation prompt
             prompt = f"""
@@ -88,9 +68,7 @@ IMPORTANT:
 - Consider that citizens may not be professional photographers
 """
 
-            response = self.client.vision_model.generate_content(
-                [prompt, {"mime_type": mime_type, "data": image_bytes}]
-            )
+            response = self.client.vision_model.generate_content([prompt, ctx.gemini_part()])
             raw = (response.text or "").strip()
 
             # Parse JSON response
@@ -111,12 +89,7 @@ IMPORTANT:
                         "image_shows": "Unable to analyze",
                     }
 
-            # Ensure required fields
-            result.setdefault("is_valid", result.get("validation_score", 0) >= 0.5)
-            result.setdefault("mismatches", [])
-            result.setdefault("confidence", "medium")
-            
-            return result
+            return self._finalize(result)
 
         except Exception as e:
             # On error, default to valid to not block legitimate complaints
@@ -128,3 +101,10 @@ IMPORTANT:
                 "confidence": "low",
                 "image_shows": "Error during analysis",
             }
+
+    def _finalize(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Ensure required fields."""
+        result.setdefault("is_valid", result.get("validation_score", 0) >= 0.5)
+        result.setdefault("mismatches", [])
+        result.setdefault("confidence", "medium")
+        return result
@@ -3,22 +3,19 @@ Location Extraction Tool
 Extracts address, landmarks, and geographic coordinates from images.
 Includes GPS/EXIF data extraction.
 """
-from typing import Dict, Any, Optional
-import io
+from typing import Dict, Any, Optional, Union
 import re
 import json
-import requests
-from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
 
 from LLMs.gemini_llm import GeminiClient
+from tools.image_context import ImageContext
 
 
 class LocationExtractor:
     def __init__(self) -> None:
         self.client = GeminiClient()
 
-    def extract_gps_from_exif(self, image_path_or_url: str) -> Optional[Dict[str, float]]:
+    def extract_gps_from_exif(self, image: Union[str, ImageContext]) -> Optional[Dict[str, float]]:
         """
         Extract GPS coordinates from image EXIF data.
         
@@ -26,28 +23,7 @@ class LocationExtractor:
             {"latitude": float, "longitude": float} or None
         """
         try:
-            # Load image
-            if image_path_or_url.startswith("http"):
-                resp = requests.get(image_path_or_url, timeout=30)
-                resp.raise_for_status()
-                image = Image.open(io.BytesIO(resp.content))
-            else:
-                image = Image.open(image_path_or_url)
-            
-            # Get EXIF data
-            exif_data = image._getexif()
-            if not exif_data:
-                return None
-            
-            # Find GPS info
-            gps_info = {}
-            for tag_id, value in exif_data.items():
-                tag = TAGS.get(tag_id, tag_id)
-                if tag == "GPSInfo":
-                    for gps_tag_id in value:
-                        gps_tag = GPSTAGS.get(gps_tag_id, gps_tag_id)
-                        gps_info[gps_tag] = value[gps_tag_id]
-            
+            gps_info = ImageContext.of(image).exif.get("GPSInfo")
             if not gps_info:
                 return None
             
@@ -80,7 +56,7 @@ class LocationExtractor:
             return None
 
     def extract_location_from_image(
-        self, image_path_or_url: str, query_context: str = ""
+        self, image: Union[str, ImageContext], query_context: str = ""
     ) -> Dict[str, Any]:
         """
         Extract location information from image including:
@@ -101,47 +77,27 @@ class LocationExtractor:
                 "extraction_method": str
             }
         """
+        try:
+            image = ImageContext.of(image)
+        except Exception as e:
+            return self._empty_location_result(f"Extraction error: {str(e)}")
+
         # First try GPS/EXIF extraction
-        gps_data = self.extract_gps_from_exif(image_path_or_url)
+        gps_data = self.extract_gps_from_exif(image)
         
         if gps_data:
             print(f"   📍 GPS data found: {gps_data['latitude']:.6f}, {gps_data['longitude']:.6f}")
             # If GPS found, still do vision analysis for address/landmarks
-            vision_result = self._extract_via_vision(image_path_or_url, query_context)
-            vision_result["latitude"] = gps_data["latitude"]
-            vision_result["longitude"] = gps_data["longitude"]
-            vision_result["extraction_method"] = "gps_exif"
-            vision_result["confidence"] = "high"
-            return vision_result
+            return self._apply_gps(self._extract_via_vision(image, query_context), gps_data)
         
         # Fallback to vision-based extraction
-        return self._extract_via_vision(image_path_or_url, query_context)
+        return self._extract_via_vision(image, query_context)
 
     def _extract_via_vision(
-        self, image_path_or_url: str, query_context: str = ""
+        self, image: ImageContext, query_context: str = ""
     ) -> Dict[str, Any]:
         """Vision-based location extraction using Gemini."""
         try:
-            # Load image
-            if image_path_or_url.startswith("http"):
-                resp = requests.get(image_path_or_url, timeout=30)
-                resp.raise_for_status()
-                image = Image.open(io.BytesIO(resp.content))
-            else:
-                image = Image.open(image_path_or_url)
-
-            fmt = (image.format or "").upper()
-            mime_type = {
-                "JPEG": "image/jpeg",
-                "JPG": "image/jpeg",
-                "PNG": "image/png",
-                "WEBP": "image/webp",
-            }.get(fmt, "image/jpeg")
-
-            with io.BytesIO() as buf:
-                image.save(buf, format=image.format or "PNG")
-                image_bytes = buf.getvalue()
-
             # Location extraction prompt
             prompt = f"""
 You are a location extraction system for government grievance processing.
@@ -185,9 +141,7 @@ IMPORTANT:
 - Don't make up information - only extract what's visible
 """
 
-            response = self.client.vision_model.generate_content(
-                [prompt, {"mime_type": mime_type, "data": image_bytes}]
-            )
+            response = self.client.vision_model.generate_content([prompt, image.gemini_part()])
             raw = (response.text or "").strip()
 
             # Parse JSON response
@@ -200,26 +154,36 @@ IMPORTANT:
                 else:
                     return self._empty_location_result("JSON parsing failed")
 
-            # Ensure required fields and clean data
-            result.setdefault("address", "Not visible in image")
-            result.setdefault("latitude", None)
-            result.setdefault("longitude", None)
-            result.setdefault("landmarks", [])
-            result.setdefault("area_type", "unknown")
-            result.setdefault("location_details", {})
-            result.setdefault("confidence", "none")
-            result.setdefault("extraction_method", "none")
-            result.setdefault("notes", "")
-
-            # Clean up lat/long - ensure they're valid numbers or None
-            result["latitude"] = self._clean_coordinate(result.get("latitude"))
-            result["longitude"] = self._clean_coordinate(result.get("longitude"))
-
-            return result
+            return self._finalize(result)
 
         except Exception as e:
             return self._empty_location_result(f"Extraction error: {str(e)}")
 
+    def _finalize(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Ensure required fields and clean data."""
+        result.setdefault("address", "Not visible in image")
+        result.setdefault("latitude", None)
+        result.setdefault("longitude", None)
+        result.setdefault("landmarks", [])
+        result.setdefault("area_type", "unknown")
+        result.setdefault("location_details", {})
+        result.setdefault("confidence", "none")
+        result.setdefault("extraction_method", "none")
+        result.setdefault("notes", "")
+
+        # Clean up lat/long - ensure they're valid numbers or None
+        result["latitude"] = self._clean_coordinate(result.get("latitude"))
+        result["longitude"] = self._clean_coordinate(result.get("longitude"))
+        return result
+
+    def _apply_gps(self, result: Dict[str, Any], gps_data: Dict[str, float]) -> Dict[str, Any]:
+        """EXIF coordinates take precedence over anything read from the image."""
+        result["latitude"] = gps_data["latitude"]
+        result["longitude"] = gps_data["longitude"]
+        result["extraction_method"] = "gps_exif"
+        result["confidence"] = "high"
+        return result
+
     def _clean_coordinate(self, coord: Any) -> Optional[float]:
         """Convert coordinate to float or None."""
         if coord is None or coord == "null" or coord == "":
@@ -23,7 +23,8 @@ os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
 
 from azure.storage.queue import QueueServiceClient, QueueClient
 from azure.storage.blob import BlobServiceClient
-from main import analysis
+from main import analysis, warmup
+from configs.config import Config
 
 
 class QueryAnalystWorker:
@@ -255,6 +256,13 @@ class QueryAnalystWorker:
     
     def run(self):
         """Main worker loop - continuously poll and process messages."""
+        if Config.WARMUP_ON_START:
+            print("\n🔥 Warming up (graph, embedding model, LLM clients, DB pool)...")
+            started = time.perf_counter()
+            for step, result in warmup().items():
+                print(f"   {step}: {result if isinstance(result, str) else f'{result:.2f}s'}")
+            print(f"   Warm-up done in {time.perf_counter() - started:.2f}s")
+
         print("\n🚀 QueryAnalyst Worker started. Waiting for messages...")
         print("   Press Ctrl+C to stop\n")
         
@@ -1,6 +1,9 @@
+import time
 from typing import Dict, Any, Tuple
 from tools.image_analysis import ImageAnalysisEngine
 from tools.image_validator import ImageQueryValidator
+from tools.image_context import ImageContext
+from tools.image_combined import CombinedImageAnalyzer
 from tools.location_extractor import LocationExtractor
 from tools.embeddings import EmbeddingEngine
 from tools.db_query import DatabaseQueryEngine
@@ -9,12 +12,14 @@ from tools.tavily_search import TavilySearchEngine
 from tools.department_allocator import DepartmentAllocator
 from persistent.supabase import insert_user_grievience
 from agents import grievance_agents as GA
+from agents.agent_runner import AgentStep, critical_path, run_agent_graph
 from configs.config import Config
 from LLMs.groq_llm import GroqLLM
 
 image_engine = ImageAnalysisEngine()
 validator_engine = ImageQueryValidator()
 location_engine = LocationExtractor()
+combined_image_engine = CombinedImageAnalyzer(validator_engine, location_engine)
 tavily_engine = TavilySearchEngine()
 department_allocator = DepartmentAllocator()
 groq_llm = GroqLLM()
@@ -29,6 +34,25 @@ def _get_embedding_engine():
 
 db_engine = DatabaseQueryEngine()
 
+
+def _image_context(state: Dict[str, Any]):
+    """
+    The request's image, decoded once and shared by the vision nodes.
+    If it cannot be loaded the URL is returned instead, so each tool
+    reports the failure in its own result shape.
+    """
+    ctx = state.get("image_context")
+    if ctx is None:
+        try:
+            ctx = ImageContext.load(state["IMAGE_URL"])
+        except Exception as e:
+            print(f"   ⚠️ Could not load image: {e}")
+            return state["IMAGE_URL"]
+        print(f"   🖼️ Image {ctx.describe()}")
+        state["image_context"] = ctx
+    return ctx
+
+
 def NODE_validate_image(state: Dict[str, Any]) -> Dict[str, Any]:
     """Validate if image matches the query before processing."""
     query = state["query"]
@@ -43,9 +67,26 @@ def NODE_validate_image(state: Dict[str, Any]) -> Dict[str, Any]:
         "image_shows": "No image"
     }
     
-    if IMAGE_URL:
+    sections: Dict[str, Any] = {}
+    if IMAGE_URL and Config.IMAGE_VISION_MODE == "combined":
+        # One request for validation, location and description; the
+        # location and describe nodes reuse what it returned and only make
+        # their own request for a section that came back unusable
+        print("    Validating, locating and describing the image in one request...")
+        sections, failed = combined_image_engine.analyze(_image_context(state), query)
+        if failed:
+            print(f"   ⚠️ Combined image request fell back for {sorted(failed)}: {failed}")
+        if "location" in sections:
+            state["location_data"] = sections["location"]
+        if "description" in sections:
+            state["image_analysis"] = sections["description"]
+
+    if "validation" in sections:
+        validation_result = sections["validation"]
+    elif IMAGE_URL:
         print("    Validating image-query match...")
-        validation_result = validator_engine.validate_image_query_match(IMAGE_URL, query)
+        validation_result = validator_engine.validate_image_query_match(_image_context(state), query)
+    if IMAGE_URL:
         print(f"   ✓ Validation: {validation_result['is_valid']} (score: {validation_result['validation_score']:.2f})")
     
     state["validation_result"] = validation_result
@@ -69,9 +110,11 @@ def NODE_extract_location(state: Dict[str, Any]) -> Dict[str, Any]:
         "extraction_method": "none"
     }
     
-    if IMAGE_URL:
+    if state.get("location_data"):
+        location_data = state["location_data"]
+    elif IMAGE_URL:
         print("   📍 Extracting location from image...")
-        location_data = location_engine.extract_location_from_image(IMAGE_URL, query)
+        location_data = location_engine.extract_location_from_image(_image_context(state), query)
         print(f"   ✓ Location: {location_data['address']} (confidence: {location_data['confidence']})")
     
     state["location_data"] = location_data
@@ -91,8 +134,10 @@ def NODE_describe_image(state:Dict[str,Any])-> Dict[str, Any]:
         "extracted_text": "",
         "confidence": "low"
     }
-    if IMAGE_URL:
-        image_analysis=image_engine.analyze_image(image_url=IMAGE_URL, query=query)
+    if state.get("image_analysis"):
+        image_analysis=state["image_analysis"]
+    elif IMAGE_URL:
+        image_analysis=image_engine.analyze_image(image_url=_image_context(state), query=query)
 
     state["image_analysis"]=image_analysis
     return state
@@ -186,30 +231,73 @@ def NODE_embed_query(state:Dict[str, Any])->Dict[str, Any]:
     retrieved=db_engine.retrive_releveant_data(emb)
     state["retrieved_data"]=retrieved
     return state
+# Output order of agents_outputs (kept stable for the JSON outputs)
+_AGENT_OUTPUT_KEYS = (
+    "query_type", "location", "emotion", "severity", "patterns", "fraud",
+    "category", "similar_cases", "department", "sentiment_priority",
+)
+
+
 def NODE_run_agents(state: Dict[str, Any]) -> Dict[str, Any]:
     enhanced_query = state["enhanced_query"]
     retrieved=state.get("retrieved_data", {})
     validation_result = state.get("validation_result", {})
-    
-    agents_outputs:Dict[str, Any]={}
-    agents_outputs["query_type"] = GA.analyze_query_type(enhanced_query)
-    agents_outputs["location"] = GA.analyze_location(enhanced_query)
-    agents_outputs["emotion"] = GA.analyze_emotion(enhanced_query)
-    agents_outputs["severity"] = GA.analyze_severity(enhanced_query)
-    agents_outputs["patterns"] = GA.analyze_patterns(enhanced_query, retrieved)
-    # Pass validation_result instead of retrieved_data to fraud analysis
-    agents_outputs["fraud"] = GA.analyze_fraud(enhanced_query, validation_result)
-    agents_outputs["category"] = GA.analyze_category(enhanced_query, retrieved)
-    agents_outputs["similar_cases"] = GA.analyze_similar_cases(enhanced_query, retrieved)
-    agents_outputs["department"] = GA.suggest_department(enhanced_query, retrieved)
-    agents_outputs["sentiment_priority"] = GA.analyze_sentiment_priority(enhanced_query)
+
+    # Every agent reads only the query (plus retrieved data / validation);
+    # the only chains are the sentiment+priority merge and the policy
+    # search queries, which need the category. Everything else runs at once.
+    steps = {
+        "query_type": AgentStep(lambda _: GA.analyze_query_type(enhanced_query)),
+        "location": AgentStep(lambda _: GA.analyze_location(enhanced_query)),
+        "emotion": AgentStep(lambda _: GA.analyze_emotion(enhanced_query)),
+        "severity": AgentStep(lambda _: GA.analyze_severity(enhanced_query)),
+        "patterns": AgentStep(lambda _: GA.analyze_patterns(enhanced_query, retrieved)),
+        # Pass validation_result instead of retrieved_data to fraud analysis
+        "fraud": AgentStep(lambda _: GA.analyze_fraud(enhanced_query, validation_result)),
+        "category": AgentStep(lambda _: GA.analyze_category(enhanced_query, retrieved)),
+        "similar_cases": AgentStep(lambda _: GA.analyze_similar_cases(enhanced_query, retrieved)),
+        "department": AgentStep(lambda _: GA.suggest_department(enhanced_query, retrieved)),
+        "sentiment": AgentStep(lambda _: GA.analyze_sentiment(enhanced_query)),
+        "priority": AgentStep(lambda _: GA.analyze_priority(enhanced_query)),
+        "sentiment_priority": AgentStep(
+            lambda r: GA.merge_sentiment_priority(r["sentiment"], r["priority"]), ("sentiment", "priority")
+        ),
+        "policy_search": AgentStep(
+            lambda r: GA.policy_search_queries(enhanced_query, r["category"]), ("category",)
+        ),
+    }
+
+    if Config.AGENT_CLASSIFICATION_MODE == "structured":
+        print("   🧾 Classifying all fields in one structured call...")
+        valid, failed = GA.classify_grievance(enhanced_query, retrieved, validation_result)
+        for name, value in valid.items():
+            steps[name] = AgentStep(lambda _, value=value: value)
+        if failed:
+            print(f"      ⚠️ Falling back to agents for: {', '.join(sorted(failed))}")
+        else:
+            print("      ✓ All fields valid, no agent calls needed")
+
+    print(f"   🤖 Running {len(steps)} agent steps (up to {Config.AGENT_MAX_CONCURRENCY} at a time)...")
+    started = time.perf_counter()
+    results, timings = run_agent_graph(steps, max_workers=Config.AGENT_MAX_CONCURRENCY)
+    elapsed = time.perf_counter() - started
+    print(
+        f"      ✓ Agents done in {elapsed:.1f}s "
+        f"(sequential {sum(timings.values()):.1f}s, longest chain {critical_path(steps, timings):.1f}s)"
+    )
+
+    agents_outputs: Dict[str, Any] = {key: results[key] for key in _AGENT_OUTPUT_KEYS}
     state["agents_outputs"]=agents_outputs
+    # Started as soon as the category was known; NODE_Policy_Queries reuses it
+    state["policy_search"] = results["policy_search"]
     return state
 
 def NODE_Policy_Queries(state: Dict[str, Any]) -> Dict[str, Any]:
     enhanced_query = state["enhanced_query"]
     category_info = state["agents_outputs"].get("category", {})
-    policy_search = GA.policy_search_queries(enhanced_query, category_info)
+    policy_search = state.get("policy_search")
+    if policy_search is None:
+        policy_search = GA.policy_search_queries(enhanced_query, category_info)
     state["policy_search"] = policy_search
     state["agents_outputs"]["policy_search"] = policy_search
     return state
@@ -4,6 +4,7 @@ class GrievanceState(TypedDict, total=False):
     image_path: Optional[str]
     original_image_url: Optional[str]  # Blob/public URL to store in DB; image_path may be temp local path
     IMAGE_URL: Optional[str]
+    image_context: Any  # tools.image_context.ImageContext, decoded once for the vision nodes
     citizen_id: Optional[str]  # ID of the citizen who submitted the grievance
     grievance_id: Optional[str]  # ID of the grievance to update
     
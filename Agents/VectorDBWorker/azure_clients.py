@@ -1,7 +1,10 @@
+import codecs
 import logging
-from typing import Optional, Dict, Any, List
+import threading
+from typing import Optional, Dict, Any, Iterable, Iterator, List
+from azure.core import MatchConditions
 from azure.storage.queue import QueueClient, QueueMessage
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import BlobServiceClient, ContentSettings, StorageStreamDownloader
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -15,17 +18,34 @@ class AzureQueueClient:
     
     def receive_message(self) -> Optional[QueueMessage]:
         """Receive one message from embeddings queue"""
+        messages = self.receive_messages(1)
+        return messages[0] if messages else None
+    
+    def receive_messages(self, max_messages: int = 32) -> List[QueueMessage]:
+        """Receive up to max_messages (Azure caps a page at 32) from embeddings queue"""
+        max_messages = max(1, min(32, max_messages))
         try:
             messages = self.queue_client.receive_messages(
-                messages_per_page=1,
+                messages_per_page=max_messages,
+                max_messages=max_messages,
                 visibility_timeout=Config.VISIBILITY_TIMEOUT
             )
-            for message in messages:
-                return message
-            return None
+            return list(messages)
         except Exception as e:
-            logger.error(f"Error receiving message: {e}")
-            return None
+            logger.error(f"Error receiving messages: {e}")
+            return []
+    
+    def extend_visibility(self, message: QueueMessage, visibility_timeout: int) -> bool:
+        """Keep a message hidden for another visibility_timeout seconds while it is being processed"""
+        try:
+            updated = self.queue_client.update_message(message, visibility_timeout=visibility_timeout)
+            # The old pop receipt is invalidated by the update
+            message.pop_receipt = updated.pop_receipt
+            message.next_visible_on = updated.next_visible_on
+            return True
+        except Exception as e:
+            logger.error(f"Error extending visibility of message {message.id}: {e}")
+            return False
     
     def delete_message(self, message: QueueMessage) -> bool:
         """Delete message from queue after processing"""
@@ -38,10 +58,64 @@ class AzureQueueClient:
             return False
 
 
+def iter_blob_text(ranges: Iterable[bytes]) -> Iterator[str]:
+    """Decode a stream of UTF-8 byte ranges, keeping multi-byte characters split across ranges intact"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for data in ranges:
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+class VisibilityHeartbeat:
+    """
+    Background thread that periodically extends the visibility timeout of every
+    message still being processed, so long jobs are not redelivered mid-flight.
+    """
+    
+    def __init__(self, queue_client: AzureQueueClient, interval: float, visibility_timeout: int):
+        self.queue_client = queue_client
+        self.interval = interval
+        self.visibility_timeout = visibility_timeout
+        self._messages: Dict[str, QueueMessage] = {}
+        # Held while renewing, so untrack() returns only once the pop receipt is final
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="visibility-heartbeat", daemon=True)
+    
+    def start(self) -> None:
+        self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
+    
+    def track(self, message: QueueMessage) -> None:
+        with self._lock:
+            self._messages[message.id] = message
+    
+    def untrack(self, message: QueueMessage) -> None:
+        with self._lock:
+            self._messages.pop(message.id, None)
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                for message in list(self._messages.values()):
+                    if self.queue_client.extend_visibility(message, self.visibility_timeout):
+                        logger.debug(f"Extended visibility of message {message.id}")
+
+
 class AzureBlobClient:
     def __init__(self):
+        # Range sizes bound how much of a blob is held in memory while streaming
         self.blob_service_client = BlobServiceClient.from_connection_string(
-            Config.AZURE_STORAGE_CONNECTION_STRING
+            Config.AZURE_STORAGE_CONNECTION_STRING,
+            max_single_get_size=Config.BLOB_RANGE_BYTES,
+            max_chunk_get_size=Config.BLOB_RANGE_BYTES,
         )
         self.container_client = self.blob_service_client.get_container_client(
             Config.AZURE_STORAGE_CONTAINER_NAME
@@ -92,3 +166,40 @@ class AzureBlobClient:
         except Exception as e:
             logger.error(f"Error downloading {blob_name}: {e}")
             return None
+    
+    def open_blob_stream(self, blob_name: str, etag: Optional[str] = None) -> Optional[StorageStreamDownloader]:
+        """
+        Start a download; only the first BLOB_RANGE_BYTES are fetched up front.
+        With `etag`, the download fails (returns None) if the blob has changed since.
+        """
+        try:
+            blob_client = self.container_client.get_blob_client(blob_name)
+            if etag:
+                return blob_client.download_blob(etag=etag, match_condition=MatchConditions.IfNotModified)
+            return blob_client.download_blob()
+        except Exception as e:
+            logger.error(f"Error downloading {blob_name}: {e}")
+            return None
+    
+    def blob_exists(self, blob_name: str) -> bool:
+        """Check whether a blob exists"""
+        try:
+            return self.container_client.get_blob_client(blob_name).exists()
+        except Exception as e:
+            logger.error(f"Error checking {blob_name}: {e}")
+            return False
+    
+    def upload_blob_content(self, blob_name: str, content: str, content_type: str = "application/json") -> bool:
+        """Upload (overwrite) text content to blob"""
+        try:
+            blob_client = self.container_client.get_blob_client(blob_name)
+            blob_client.upload_blob(
+                content.encode('utf-8'),
+                overwrite=True,
+                content_settings=ContentSettings(content_type=content_type)
+            )
+            logger.info(f"Uploaded {blob_name} ({len(content)} chars)")
+            return True
+        except Exception as e:
+            logger.error(f"Error uploading {blob_name}: {e}")
+            return False
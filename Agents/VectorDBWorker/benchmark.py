@@ -0,0 +1,394 @@
+"""
+Offline throughput benchmark for the VectorDB worker.
+
+Runs VectorDBWorker.process_message end to end against in-memory stand-ins
+for Azure Queue, Azure Blob and Pinecone, over a synthetic corpus, and
+reports per-stage latency percentiles, memory high-water mark and
+chunks/sec / vectors/sec. The embedding model is the real one unless
+--fake-model is given.
+
+Usage:
+    python benchmark.py --messages 4 --files 50 --file-kb 20
+    python benchmark.py --messages 8 --concurrency 4 --blob-latency-ms 40 --pinecone-latency-ms 80
+"""
+import argparse
+import hashlib
+import json
+import logging
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import Config
+from worker import VectorDBWorker
+from embedding_engine import EmbeddingEngine
+
+
+# ---------------------------------------------------------------------------
+# Stage timing
+# ---------------------------------------------------------------------------
+
+
+class StageTimer:
+    """Thread-safe collection of per-stage latencies"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.items: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, items: int = 1) -> None:
+        with self._lock:
+            self.samples[stage].append(seconds)
+            self.items[stage] += items
+
+    def wrap(self, stage: str, fn: Callable, count: Optional[Callable[[Any, Any], int]] = None) -> Callable:
+        """Time every call of fn under `stage`; count(args, result) gives the items handled"""
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            result = fn(*args, **kwargs)
+            self.record(stage, time.perf_counter() - started, count(args, result) if count else 1)
+            return result
+
+        return timed
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+# ---------------------------------------------------------------------------
+# In-memory stand-ins
+# ---------------------------------------------------------------------------
+
+
+class InMemoryQueueClient:
+    """Stand-in for AzureQueueClient"""
+
+    def __init__(self, messages: List[Dict[str, Any]]):
+        self._messages = [
+            SimpleNamespace(id=str(i), pop_receipt="0", content=json.dumps(m))
+            for i, m in enumerate(messages)
+        ]
+        self.deleted: List[str] = []
+
+    def receive_messages(self, max_messages: int = 32) -> List[Any]:
+        batch, self._messages = self._messages[:max_messages], self._messages[max_messages:]
+        return batch
+
+    def receive_message(self) -> Optional[Any]:
+        batch = self.receive_messages(1)
+        return batch[0] if batch else None
+
+    def extend_visibility(self, message, visibility_timeout: int) -> bool:
+        return True
+
+    def delete_message(self, message) -> bool:
+        self.deleted.append(message.id)
+        return True
+
+
+def _etag(data: bytes) -> str:
+    return hashlib.md5(data).hexdigest()
+
+
+class _Downloader:
+    """Mimics azure.storage.blob.StorageStreamDownloader"""
+
+    def __init__(self, data: bytes, latency: float):
+        self._data = data
+        self._latency = latency
+        self.size = len(data)
+        self.properties = SimpleNamespace(etag=_etag(data))
+
+    def readall(self) -> bytes:
+        time.sleep(self._latency)
+        return self._data
+
+    def chunks(self) -> Iterator[bytes]:
+        step = Config.BLOB_RANGE_BYTES
+        for start in range(0, self.size, step):
+            time.sleep(self._latency)
+            yield self._data[start:start + step]
+
+
+class InMemoryBlobClient:
+    """Stand-in for AzureBlobClient with optional per-request latency"""
+
+    def __init__(self, blobs: Dict[str, bytes], latency: float = 0.0):
+        self.blobs = blobs
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    def list_files_in_folder(self, blob_folder: str) -> List[str]:
+        prefix = f"crawled-content/{blob_folder}/"
+        return sorted(n for n in self.blobs if n.startswith(prefix) and n.endswith(('.txt', '.md')))
+
+    def open_blob_stream(self, blob_name: str, etag: Optional[str] = None) -> Optional[_Downloader]:
+        data = self.blobs.get(blob_name)
+        if data is None or (etag and etag != _etag(data)):
+            return None
+        return _Downloader(data, self.latency)
+
+    def download_blob_content(self, blob_name: str) -> Optional[str]:
+        data = self.blobs.get(blob_name)
+        if data is None:
+            return None
+        time.sleep(self.latency)
+        return data.decode('utf-8')
+
+    def blob_exists(self, blob_name: str) -> bool:
+        return blob_name in self.blobs
+
+    def upload_blob_content(self, blob_name: str, content: str, content_type: str = "application/json") -> bool:
+        with self._lock:
+            self.blobs[blob_name] = content.encode('utf-8')
+        return True
+
+
+class InMemoryPineconeClient:
+    """Stand-in for PineconeClient with optional per-request latency"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.vectors: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def upsert_embeddings(self, vectors: List[Dict[str, Any]]) -> bool:
+        for start in range(0, len(vectors), Config.PINECONE_UPSERT_BATCH_SIZE):
+            time.sleep(self.latency)
+        with self._lock:
+            for v in vectors:
+                self.vectors[v["id"]] = v["values"]
+        return True
+
+    def delete_vectors(self, ids: List[str]) -> bool:
+        with self._lock:
+            for vid in ids:
+                self.vectors.pop(vid, None)
+        return True
+
+
+class _HashModel:
+    """Deterministic stand-in for SentenceTransformer, for measuring pipeline overhead only"""
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, show_progress_bar=False, **kwargs):
+        import numpy as np
+
+        out = np.empty((len(texts), 384), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+            out[i] = np.random.default_rng(seed).standard_normal(384)
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus
+# ---------------------------------------------------------------------------
+
+_VOCAB = (
+    "municipal corporation ward road water supply drainage garbage collection scheme "
+    "citizen grievance department officer tender contract budget allocation project "
+    "maintenance streetlight sanitation health hospital school property tax license "
+    "permit application portal notice circular order committee meeting minutes zone"
+).split()
+
+_BOILERPLATE = (
+    "Government of Maharashtra | Municipal Corporation Portal\n"
+    "Home | About Us | Departments | Schemes | RTI | Contact Us\n"
+    "Disclaimer: Content on this website is published and managed by the municipal corporation.\n"
+)
+
+
+def generate_corpus(
+    messages: int, files: int, file_kb: int, seed: int = 42
+) -> Tuple[Dict[str, bytes], List[Dict[str, Any]]]:
+    """Build blob contents and queue messages: one folder per message"""
+    rnd = random.Random(seed)
+    blobs: Dict[str, bytes] = {}
+    queue_messages: List[Dict[str, Any]] = []
+    for m in range(messages):
+        folder = f"bench-{m}.gov.in"
+        for f in range(files):
+            target = int(file_kb * 1024 * rnd.uniform(0.5, 1.5))
+            parts = [_BOILERPLATE]
+            size = len(_BOILERPLATE)
+            while size < target:
+                sentence = " ".join(rnd.choice(_VOCAB) for _ in range(rnd.randint(8, 20))).capitalize() + ". "
+                parts.append(sentence)
+                size += len(sentence)
+            parts.append(_BOILERPLATE)
+            blobs[f"crawled-content/{folder}/page_{f}.txt"] = "".join(parts).encode('utf-8')
+        queue_messages.append({
+            "job_id": f"BENCH/{m}",
+            "url": f"https://{folder}/",
+            "blob_folder": folder,
+            "status": "completed",
+        })
+    return blobs, queue_messages
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    Config.EMBEDDING_BATCH_SIZE = args.batch_size
+    Config.MANIFEST_ENABLED = False
+    Config.EMBEDDING_CACHE_ENABLED = args.with_cache
+    if args.with_cache:
+        Config.EMBEDDING_CACHE_PATH = args.cache_path
+
+    blobs, messages = generate_corpus(args.messages, args.files, args.file_kb, args.seed)
+    corpus_bytes = sum(len(b) for b in blobs.values())
+
+    timer = StageTimer()
+    queue_client = InMemoryQueueClient(messages)
+    blob_client = InMemoryBlobClient(blobs, args.blob_latency_ms / 1000.0)
+    pinecone_client = InMemoryPineconeClient(args.pinecone_latency_ms / 1000.0)
+    engine = EmbeddingEngine()
+    if args.fake_model:
+        engine._model = _HashModel()
+    else:
+        _ = engine.model  # load outside the timed region
+
+    engine.chunk_text = timer.wrap("chunk", engine.chunk_text, lambda a, r: len(r))
+    engine.encode_batch = timer.wrap("embed", engine.encode_batch, lambda a, r: len(r))
+    pinecone_client.upsert_embeddings = timer.wrap(
+        "upsert", pinecone_client.upsert_embeddings, lambda a, r: len(a[0])
+    )
+
+    worker = VectorDBWorker(
+        queue_client=queue_client,
+        blob_client=blob_client,
+        embedding_engine=engine,
+        pinecone_client=pinecone_client,
+    )
+    # Download stage = range reads + decode + content hash of one file
+    worker.pipeline._download = timer.wrap("download", worker.pipeline._download)
+
+    def handle(message) -> None:
+        started = time.perf_counter()
+        worker.process_message(message)
+        timer.record("message", time.perf_counter() - started)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(handle, queue_client.receive_messages(len(messages))))
+    wall = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_peak_mb = rss_peak / (1024 * 1024) if sys.platform == "darwin" else rss_peak / 1024
+
+    stages = {}
+    for stage, values in timer.samples.items():
+        stages[stage] = {
+            "calls": len(values),
+            "items": timer.items[stage],
+            "p50_ms": percentile(values, 50) * 1000,
+            "p90_ms": percentile(values, 90) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": max(values) * 1000,
+            "total_s": sum(values),
+        }
+
+    chunks = timer.items.get("chunk", 0)
+    vectors = len(pinecone_client.vectors)
+    return {
+        "config": {
+            "messages": args.messages,
+            "files_per_message": args.files,
+            "file_kb": args.file_kb,
+            "corpus_mb": corpus_bytes / (1024 * 1024),
+            "batch_size": Config.EMBEDDING_BATCH_SIZE,
+            "concurrency": args.concurrency,
+            "download_workers": Config.DOWNLOAD_WORKERS,
+            "upsert_workers": Config.UPSERT_WORKERS,
+            "model": "hash (fake)" if args.fake_model else Config.EMBEDDING_MODEL,
+            "cache": args.with_cache,
+        },
+        "wall_s": wall,
+        "chunks": chunks,
+        "vectors": vectors,
+        "chunks_per_s": chunks / wall if wall else 0.0,
+        "vectors_per_s": vectors / wall if wall else 0.0,
+        "python_heap_peak_mb": traced_peak / (1024 * 1024),
+        "rss_peak_mb": rss_peak_mb,
+        "stages": stages,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    cfg = report["config"]
+    print("\n" + "=" * 80)
+    print("VectorDB worker benchmark")
+    print("=" * 80)
+    for key, value in cfg.items():
+        print(f"  {key:<20} {value:.2f}" if isinstance(value, float) else f"  {key:<20} {value}")
+    print("-" * 80)
+    print(f"  {'stage':<10}{'calls':>8}{'items':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'total s':>10}")
+    for stage in ("download", "chunk", "embed", "upsert", "message"):
+        s = report["stages"].get(stage)
+        if not s:
+            continue
+        print(
+            f"  {stage:<10}{s['calls']:>8}{s['items']:>9}{s['p50_ms']:>10.1f}{s['p90_ms']:>10.1f}"
+            f"{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}{s['total_s']:>10.2f}"
+        )
+    print("-" * 80)
+    print(f"  wall time            {report['wall_s']:.2f}s")
+    print(f"  chunks / vectors     {report['chunks']} / {report['vectors']}")
+    print(f"  throughput           {report['chunks_per_s']:.1f} chunks/s, {report['vectors_per_s']:.1f} vectors/s")
+    print(f"  memory high-water    {report['rss_peak_mb']:.0f} MB RSS, {report['python_heap_peak_mb']:.1f} MB Python heap")
+    print("=" * 80)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline VectorDB worker throughput benchmark")
+    parser.add_argument("--messages", type=int, default=4, help="Queue messages (one blob folder each)")
+    parser.add_argument("--files", type=int, default=25, help="Files per blob folder")
+    parser.add_argument("--file-kb", type=int, default=20, help="Average file size in KB")
+    parser.add_argument("--batch-size", type=int, default=Config.EMBEDDING_BATCH_SIZE, help="EMBEDDING_BATCH_SIZE")
+    parser.add_argument("--concurrency", type=int, default=1, help="Messages processed at the same time")
+    parser.add_argument("--blob-latency-ms", type=float, default=0.0, help="Simulated latency per blob request")
+    parser.add_argument("--pinecone-latency-ms", type=float, default=0.0, help="Simulated latency per upsert request")
+    parser.add_argument("--fake-model", action="store_true", help="Use a hash embedder instead of the real model")
+    parser.add_argument("--with-cache", action="store_true", help="Enable the embedding cache")
+    parser.add_argument("--cache-path", default="/tmp/vectordb-benchmark-cache.sqlite", help="Cache file for --with-cache")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Keep the worker's INFO logs")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    report = run_benchmark(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
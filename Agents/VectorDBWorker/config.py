@@ -15,12 +15,44 @@ class Config:
     # Pinecone
     PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", "")
     PINECONE_INDEX_NAME = os.environ.get("PINECONE_INDEX_NAME", "igrs1")
+    PINECONE_UPSERT_BATCH_SIZE = int(os.environ.get("PINECONE_UPSERT_BATCH_SIZE", "100"))  # Vectors per request
+    PINECONE_UPSERT_MAX_BYTES = int(os.environ.get("PINECONE_UPSERT_MAX_BYTES", "1800000"))  # Under the 2MB request cap
+    PINECONE_UPSERT_WORKERS = int(os.environ.get("PINECONE_UPSERT_WORKERS", "4"))  # Parallel upsert requests
+    PINECONE_UPSERT_RETRIES = int(os.environ.get("PINECONE_UPSERT_RETRIES", "3"))  # Retries per failed batch
+    PINECONE_DELETE_BATCH_SIZE = int(os.environ.get("PINECONE_DELETE_BATCH_SIZE", "1000"))  # Ids per delete request
     
     # Embedding Model
     EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")  # 384-dim
+    EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "64"))  # Chunks per forward pass
+    EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch").lower()  # torch | onnx (int8, see onnx_export.py)
+    EMBEDDING_ONNX_PATH = os.environ.get(
+        "EMBEDDING_ONNX_PATH", str(Path.home() / ".cache" / "igrs" / "onnx" / "all-MiniLM-L6-v2")
+    )
+    EMBEDDING_ONNX_THREADS = int(os.environ.get("EMBEDDING_ONNX_THREADS", "0"))  # 0 = onnxruntime default
+    
+    # Embedding cache: one SQLite file can be shared by every embedding worker on a host
+    EMBEDDING_CACHE_ENABLED = os.environ.get("EMBEDDING_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    EMBEDDING_CACHE_PATH = os.environ.get(
+        "EMBEDDING_CACHE_PATH", str(Path.home() / ".cache" / "igrs" / "embedding_cache.sqlite")
+    )
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))  # ~800 bytes each
     
     # Worker Settings
     POLL_INTERVAL_SEC = float(os.environ.get("POLL_INTERVAL_SEC", "2.0"))
     VISIBILITY_TIMEOUT = int(os.environ.get("VISIBILITY_TIMEOUT", "300"))  # 5 minutes
+    VISIBILITY_RENEW_SEC = float(os.environ.get("VISIBILITY_RENEW_SEC", str(VISIBILITY_TIMEOUT / 3)))  # Heartbeat period
+    MESSAGE_BATCH_SIZE = int(os.environ.get("MESSAGE_BATCH_SIZE", "32"))  # Messages per receive (max 32)
+    MESSAGE_WORKERS = int(os.environ.get("MESSAGE_WORKERS", "4"))  # Messages processed concurrently
     CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", "1000"))  # Characters per chunk
     CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", "200"))  # Overlap between chunks
+    BLOB_RANGE_BYTES = int(os.environ.get("BLOB_RANGE_BYTES", str(1024 * 1024)))  # Bytes per blob range request
+    STREAM_THRESHOLD_BYTES = int(os.environ.get("STREAM_THRESHOLD_BYTES", str(4 * 1024 * 1024)))  # Larger blobs are streamed
+
+    # Pipeline (per blob folder)
+    DOWNLOAD_WORKERS = int(os.environ.get("DOWNLOAD_WORKERS", "4"))  # Parallel blob downloads
+    UPSERT_WORKERS = int(os.environ.get("UPSERT_WORKERS", "4"))  # Parallel Pinecone upserts
+    PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "8"))  # Max items buffered between stages
+
+    # Incremental re-embedding: per-folder manifest of content hashes and vector ids
+    MANIFEST_ENABLED = os.environ.get("MANIFEST_ENABLED", "true").lower() in ("1", "true", "yes")
+    MANIFEST_PREFIX = os.environ.get("MANIFEST_PREFIX", "embeddings-manifest")
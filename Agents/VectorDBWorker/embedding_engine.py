@@ -1,19 +1,44 @@
 import logging
-from typing import List
+import threading
+from typing import Iterable, Iterator, List, Optional
 from config import Config
+from embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 
+
+def _cache_namespace() -> str:
+    # Quantized vectors are close to, not identical to, the torch ones; keep them apart
+    if Config.EMBEDDING_BACKEND == "onnx":
+        return f"{Config.EMBEDDING_MODEL}|onnx-int8|normalized"
+    return f"{Config.EMBEDDING_MODEL}|normalized"
+
+
 class EmbeddingEngine:
     def __init__(self):
         self._model = None
+        # Messages are processed concurrently; one forward pass at a time keeps
+        # CPU threads from oversubscribing and guards the lazy model load
+        self._lock = threading.Lock()
+        self.cache: Optional[EmbeddingCache] = None
+        if Config.EMBEDDING_CACHE_ENABLED:
+            self.cache = EmbeddingCache(
+                Config.EMBEDDING_CACHE_PATH,
+                _cache_namespace(),
+                Config.EMBEDDING_CACHE_MAX_ENTRIES,
+            )
     
     @property
     def model(self):
         if self._model is None:
-            from sentence_transformers import SentenceTransformer
-            logger.info(f"Loading embedding model: {Config.EMBEDDING_MODEL}")
-            self._model = SentenceTransformer(Config.EMBEDDING_MODEL)
+            if Config.EMBEDDING_BACKEND == "onnx":
+                from onnx_encoder import OnnxSentenceEncoder
+                logger.info(f"Loading int8 ONNX embedding model from {Config.EMBEDDING_ONNX_PATH}")
+                self._model = OnnxSentenceEncoder(Config.EMBEDDING_ONNX_PATH, Config.EMBEDDING_ONNX_THREADS)
+            else:
+                from sentence_transformers import SentenceTransformer
+                logger.info(f"Loading embedding model: {Config.EMBEDDING_MODEL}")
+                self._model = SentenceTransformer(Config.EMBEDDING_MODEL)
         return self._model
     
     def encode(self, text: str) -> List[float]:
@@ -21,29 +46,88 @@ class EmbeddingEngine:
         if not (text or "").strip():
             return []
         
-        emb = self.model.encode([text], normalize_embeddings=True)
-        return emb[0].tolist()
-    
+        return self._encode([text], 1)[0]
+
+    def encode_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """
+        Generate embeddings for many texts in mini-batches.
+
+        Returns one vector per input, in input order; blank texts map to [].
+        """
+        batch_size = batch_size or Config.EMBEDDING_BATCH_SIZE
+        results: List[List[float]] = [[] for _ in texts]
+
+        indexed = [(i, t) for i, t in enumerate(texts) if (t or "").strip()]
+        if not indexed:
+            return results
+
+        for (i, _), emb in zip(indexed, self._encode([t for _, t in indexed], batch_size)):
+            results[i] = emb
+
+        if self.cache is not None:
+            stats = self.cache.stats()
+            logger.info(
+                f"Encoded {len(indexed)} texts (batch_size={batch_size}, "
+                f"cache hit rate {stats['hit_rate']:.0%} over {stats['hits'] + stats['misses']} lookups)"
+            )
+        else:
+            logger.info(f"Encoded {len(indexed)} texts (batch_size={batch_size})")
+        return results
+
+    def _encode(self, texts: List[str], batch_size: int) -> List[List[float]]:
+        """Embed non-blank texts, serving repeats from the cache and running the model on the rest"""
+        cached: List[Optional[List[float]]] = (
+            self.cache.get_many(texts) if self.cache is not None else [None] * len(texts)
+        )
+        missing = [i for i, emb in enumerate(cached) if emb is None]
+        if missing:
+            with self._lock:
+                embs = self.model.encode(
+                    [texts[i] for i in missing],
+                    batch_size=batch_size,
+                    normalize_embeddings=True,
+                    show_progress_bar=False,
+                )
+            fresh = [emb.tolist() for emb in embs]
+            for i, emb in zip(missing, fresh):
+                cached[i] = emb
+            if self.cache is not None:
+                self.cache.put_many([texts[i] for i in missing], fresh)
+        return cached
+
     def chunk_text(self, text: str) -> List[str]:
         """Split text into chunks with overlap"""
         if not text:
             return []
         
-        chunks = []
-        chunk_size = Config.CHUNK_SIZE
-        overlap = Config.CHUNK_OVERLAP
-        
-        start = 0
-        while start < len(text):
-            end = start + chunk_size
-            chunk = text[start:end]
-            
-            if chunk.strip():
-                chunks.append(chunk.strip())
-            
-            start = end - overlap
-            if start >= len(text):
-                break
+        chunks = list(self.iter_chunks([text]))
         
         logger.info(f"Split text ({len(text)} chars) into {len(chunks)} chunks")
         return chunks
+    
+    def iter_chunks(self, pieces: Iterable[str]) -> Iterator[str]:
+        """
+        Yield overlapping chunks from text that arrives in pieces (e.g. a blob stream).
+        
+        Produces exactly the chunks chunk_text would for the concatenated text,
+        while holding at most one chunk plus one piece in memory.
+        """
+        chunk_size = Config.CHUNK_SIZE
+        step = max(1, chunk_size - Config.CHUNK_OVERLAP)
+        
+        buffer = ""
+        for piece in pieces:
+            buffer += piece
+            # Walk an offset and drop the consumed prefix once per piece;
+            # trimming the buffer per chunk would re-copy it every step
+            pos = 0
+            while len(buffer) - pos >= chunk_size:
+                chunk = buffer[pos:pos + chunk_size].strip()
+                if chunk:
+                    yield chunk
+                pos += step
+            buffer = buffer[pos:]
+        
+        chunk = buffer.strip()
+        if chunk:
+            yield chunk
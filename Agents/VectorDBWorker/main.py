@@ -8,6 +8,10 @@ from sentence_transformers import SentenceTransformer
 from pinecone import Pinecone, ServerlessSpec
 from groq import Groq
 import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 
@@ -22,6 +26,11 @@ INDEX_NAME = "dsa-concepts-index"
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 
+# Structured extraction: concurrent Groq calls under a shared rate limit
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "4"))
+GROQ_REQUESTS_PER_MIN = float(os.getenv("GROQ_REQUESTS_PER_MIN", "30"))
+CHECKPOINT_PATH = "knowledge_base.checkpoint.jsonl"
+
 pc = Pinecone(api_key=PINECONE_API_KEY)
 client = Groq(api_key=GROQ_API_KEY)
 EMBED_MODEL = "all-MiniLM-L6-v2"
@@ -518,28 +527,122 @@ def merge_json(master, new):
                 master[key] = [master[key], value]
 
     return master
-def build_knowledge_base(chunks):
+class TokenBucket:
 
-    master = {}
+    """Allows `rate` requests per second on average, with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+
+        while True:
+
+            with self.lock:
+
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+def chunk_key(chunk):
+
+    # Chunk ids are random per run; key on content so a restart can resume
+    return hashlib.sha1(f'{chunk["page"]}:{chunk["text"]}'.encode("utf-8")).hexdigest()
+
+
+def extract_with_retry(chunk, bucket, attempts=3):
+
+    for attempt in range(attempts):
+
+        bucket.acquire()
+
+        extracted = extract_chunk_universal(chunk["text"])
+
+        if extracted:
+            return extracted
 
-    for chunk in tqdm(chunks, desc="Extracting knowledge"):
+        # jittered backoff
+        time.sleep(min(8.0, 2 ** attempt) + random.random() * 0.5)
 
-        extracted = None
+    return None
 
-        for attempt in range(3):
 
-            extracted = extract_chunk_universal(chunk["text"])
+def load_checkpoint(path):
 
-            if extracted:
-                break
+    done = {}
 
-            time.sleep(1)
+    if not os.path.exists(path):
+        return done
+
+    with open(path, "r", encoding="utf-8") as f:
+
+        for line in f:
+
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # torn last line from a crash
+                continue
+
+            done[record["key"]] = record["data"]
+
+    return done
+
+
+def build_knowledge_base(chunks, checkpoint_path=CHECKPOINT_PATH, output_path="knowledge_base.json"):
+
+    done = load_checkpoint(checkpoint_path)
+
+    todo = [chunk for chunk in chunks if chunk_key(chunk) not in done]
+
+    if done:
+        print(f"Resuming: {len(chunks) - len(todo)} chunks already extracted")
+
+    bucket = TokenBucket(GROQ_REQUESTS_PER_MIN / 60.0, GROQ_MAX_CONCURRENCY)
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=GROQ_MAX_CONCURRENCY) as pool:
+
+        futures = {pool.submit(extract_with_retry, chunk, bucket): chunk for chunk in todo}
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Extracting knowledge"):
+
+            extracted = future.result()
+
+            if not extracted:
+                # not checkpointed, so it is retried on the next run
+                continue
+
+            key = chunk_key(futures[future])
+            done[key] = extracted
+
+            checkpoint.write(json.dumps({"key": key, "data": extracted}, ensure_ascii=False) + "\n")
+            checkpoint.flush()
+
+    # Merge once, in document order
+    master = {}
+
+    for chunk in chunks:
 
-        master = merge_json(master, extracted)
+        master = merge_json(master, done.get(chunk_key(chunk)))
 
-        with open("knowledge_base.json", "w", encoding="utf-8") as f:
+    with open(output_path, "w", encoding="utf-8") as f:
 
-            json.dump(master, f, indent=2, ensure_ascii=False)
+        json.dump(master, f, indent=2, ensure_ascii=False)
 
     return master
 
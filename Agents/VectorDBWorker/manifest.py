@@ -0,0 +1,144 @@
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Set
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(content: str) -> str:
+    """Stable hash of a file's text content"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _onnx_model_id(model_dir: str) -> str:
+    """Digest of the exported model and its encoder_config, so a re-export invalidates too"""
+    hasher = hashlib.sha256()
+    for name in ("model.onnx", "encoder_config.json"):
+        path = Path(model_dir) / name
+        if not path.exists():
+            return model_dir
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(block)
+    return hasher.hexdigest()[:16]
+
+
+def _settings_fingerprint() -> str:
+    """Anything that changes the vectors of unchanged text invalidates the manifest"""
+    backend = Config.EMBEDDING_BACKEND
+    if backend == "onnx":
+        backend = f"onnx:{_onnx_model_id(Config.EMBEDDING_ONNX_PATH)}"
+    return f"{Config.EMBEDDING_MODEL}|{backend}|{Config.CHUNK_SIZE}|{Config.CHUNK_OVERLAP}"
+
+
+class FolderManifest:
+    """
+    Content hashes and Pinecone vector ids of every embedded file in one blob folder.
+
+    entries format: {
+        "crawled-content/domain.com/page.txt": {
+            "hash": "<sha256 of content>",
+            "vector_ids": ["job_page_txt_0", ...],
+            "updated_at": 1700000000.0
+        }
+    }
+    """
+
+    def __init__(self, blob_folder: str, entries: Dict[str, Dict[str, Any]], fingerprint: str):
+        self.blob_folder = blob_folder
+        self.entries = entries
+        self.fingerprint = fingerprint
+        self.dirty = False
+        self._recorded: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def is_unchanged(self, file_path: str, file_hash: str) -> bool:
+        """True if the file was already embedded with the same content and settings"""
+        if self.fingerprint != _settings_fingerprint():
+            return False
+        with self._lock:
+            entry = self.entries.get(file_path)
+        return bool(entry) and entry.get("hash") == file_hash
+
+    def record(self, file_path: str, file_hash: str, vector_ids: List[str]) -> List[str]:
+        """Store the new state of a file. Returns ids it had before but no longer has"""
+        with self._lock:
+            previous = self.entries.get(file_path) or {}
+            self.entries[file_path] = {
+                "hash": file_hash,
+                "vector_ids": list(vector_ids),
+                "updated_at": time.time(),
+            }
+            self._recorded.add(file_path)
+            self.dirty = True
+        current = set(vector_ids)
+        return [vid for vid in previous.get("vector_ids", []) if vid not in current]
+
+    def prune(self, current_files: List[str]) -> List[str]:
+        """Forget files no longer in the folder. Returns their vector ids"""
+        keep = set(current_files)
+        stale: List[str] = []
+        with self._lock:
+            for file_path in [p for p in self.entries if p not in keep]:
+                stale.extend(self.entries.pop(file_path).get("vector_ids", []))
+                self.dirty = True
+        return stale
+
+    def to_json(self) -> str:
+        with self._lock:
+            if self.fingerprint != _settings_fingerprint():
+                # The manifest is saved under the new settings; files that were
+                # not re-embedded this run still hold vectors from the old ones.
+                # Their vector ids are kept so the next record() deletes them.
+                for file_path, entry in self.entries.items():
+                    if file_path not in self._recorded:
+                        entry["hash"] = ""
+            return json.dumps(
+                {
+                    "blob_folder": self.blob_folder,
+                    "fingerprint": _settings_fingerprint(),
+                    "files": self.entries,
+                }
+            )
+
+
+class ManifestStore:
+    """Loads and saves folder manifests as JSON blobs under MANIFEST_PREFIX"""
+
+    def __init__(self, blob_client):
+        self.blob_client = blob_client
+
+    @staticmethod
+    def blob_name(blob_folder: str) -> str:
+        return f"{Config.MANIFEST_PREFIX}/{blob_folder}.json"
+
+    def load(self, blob_folder: str) -> FolderManifest:
+        name = self.blob_name(blob_folder)
+        if not self.blob_client.blob_exists(name):
+            return FolderManifest(blob_folder, {}, _settings_fingerprint())
+
+        raw = self.blob_client.download_blob_content(name)
+        try:
+            data = json.loads(raw) if raw else {}
+        except json.JSONDecodeError as e:
+            logger.warning(f"Corrupt manifest {name}, re-embedding folder: {e}")
+            data = {}
+
+        manifest = FolderManifest(
+            blob_folder, data.get("files") or {}, data.get("fingerprint", "")
+        )
+        if manifest.fingerprint != _settings_fingerprint():
+            logger.info(f"Embedding settings changed since last run, re-embedding {blob_folder}")
+        return manifest
+
+    def save(self, manifest: FolderManifest) -> bool:
+        if not manifest.dirty:
+            return True
+        return self.blob_client.upload_blob_content(self.blob_name(manifest.blob_folder), manifest.to_json())
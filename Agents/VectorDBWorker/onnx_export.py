@@ -0,0 +1,247 @@
+"""
+Export, verify and benchmark the int8 ONNX version of the embedding model.
+
+    python onnx_export.py export [--model all-MiniLM-L6-v2] [--out DIR]
+        Export the sentence-transformers model to ONNX and quantize its
+        weights to int8 (dynamic quantization). Writes model.onnx,
+        tokenizer.json and encoder_config.json into DIR.
+
+    python onnx_export.py check [--out DIR] [--min-cosine 0.99]
+        Parity check: encode a fixed corpus with PyTorch and with ONNX and
+        fail (exit 1) if any pair has cosine similarity below --min-cosine.
+
+    python onnx_export.py bench [--out DIR]
+        Compare load time, single-text latency, batch throughput and RSS
+        of the two backends, each measured in a fresh process.
+
+Workers pick the exported model up with EMBEDDING_BACKEND=onnx and
+EMBEDDING_ONNX_PATH=DIR (the same DIR can serve every embedding worker).
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from config import Config
+
+_SAMPLE_TEXTS = [
+    "Garbage pile near my house in Bangalore causing health issues",
+    "Street light not working on MG Road for the past two weeks",
+    "Water supply disrupted in ward 12 since Monday morning",
+    "Pothole on the main road near the bus stop caused an accident",
+    "Drainage overflow in the market area, foul smell everywhere",
+    "",
+    "a",
+    "नमस्ते, हमारे इलाके में पानी की आपूर्ति बंद है",
+    "Municipal Corporation Portal | Home | About Us | Departments | Schemes | RTI | Contact Us",
+]
+
+
+def _sample_corpus(n: int = 200, seed: int = 7):
+    rnd = random.Random(seed)
+    words = " ".join(_SAMPLE_TEXTS).split()
+    texts = [t for t in _SAMPLE_TEXTS if t]
+    while len(texts) < n:
+        # Mix of short queries and chunk-sized passages (up to ~1000 chars)
+        length = rnd.choice([8, 20, 60, 180])
+        texts.append(" ".join(rnd.choice(words) for _ in range(length)))
+    return texts
+
+
+def _rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def export(model_name: str, out_dir: Path, quantize: bool = True, opset: int = 14) -> None:
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer = st[0].auto_model.eval()
+    tokenizer = st.tokenizer
+
+    pooling = "mean"
+    for module in st:
+        if isinstance(module, Pooling) and getattr(module, "pooling_mode_cls_token", False):
+            pooling = "cls"
+    normalize = any(isinstance(module, Normalize) for module in st)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    class _Wrapper(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            kwargs = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if token_type_ids is not None:
+                kwargs["token_type_ids"] = token_type_ids
+            return self.model(**kwargs)[0]
+
+    fp32_path = out_dir / "model_fp32.onnx"
+    dynamic = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            _Wrapper(transformer),
+            tuple(sample[n] for n in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    print(f"✓ Exported {model_name} -> {fp32_path}")
+
+    model_path = out_dir / "model.onnx"
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(fp32_path), str(model_path), weight_type=QuantType.QInt8)
+        print(f"✓ Quantized (int8) -> {model_path}")
+        # The encoder only loads model.onnx; don't ship the fp32 weights with it
+        print(f"   fp32 (removed): {fp32_path.stat().st_size / (1024 * 1024):.1f} MB")
+        fp32_path.unlink()
+    else:
+        fp32_path.replace(model_path)
+
+    tokenizer.save_pretrained(str(out_dir))
+    with open(out_dir / "encoder_config.json", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "model": model_name,
+                "max_seq_length": st.max_seq_length,
+                "pooling": pooling,
+                "normalize": normalize,
+                "pad_token_id": tokenizer.pad_token_id or 0,
+                "quantized": quantize,
+            },
+            f,
+            indent=2,
+        )
+    for path in sorted(out_dir.glob("*.onnx")):
+        print(f"   {path.name}: {path.stat().st_size / (1024 * 1024):.1f} MB")
+
+
+def check(model_name: str, out_dir: Path, min_cosine: float) -> bool:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    from onnx_encoder import OnnxSentenceEncoder
+
+    texts = [t for t in _sample_corpus() if t.strip()]
+    reference = SentenceTransformer(model_name, device="cpu").encode(
+        texts, batch_size=32, normalize_embeddings=True
+    )
+    candidate = OnnxSentenceEncoder(str(out_dir)).encode(texts, batch_size=32, normalize_embeddings=True)
+
+    cosines = np.sum(reference * candidate, axis=1)
+    worst = int(np.argmin(cosines))
+    print(f"Parity over {len(texts)} texts: min cosine {cosines.min():.4f}, mean {cosines.mean():.4f}")
+    if cosines.min() < min_cosine:
+        print(f"❌ Below {min_cosine}: {texts[worst][:80]!r}")
+        return False
+    print(f"✓ All pairs >= {min_cosine}")
+    return True
+
+
+def _measure(backend: str, model_name: str, out_dir: Path) -> dict:
+    """Runs in a child process so each backend's RSS is measured in isolation"""
+    started = time.perf_counter()
+    if backend == "onnx":
+        from onnx_encoder import OnnxSentenceEncoder
+
+        model = OnnxSentenceEncoder(str(out_dir))
+    else:
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(model_name, device="cpu")
+    load_s = time.perf_counter() - started
+
+    texts = _sample_corpus(256)
+    model.encode(texts[:8], batch_size=8, normalize_embeddings=True)  # warm up
+
+    single = []
+    for text in texts[:50]:
+        t = time.perf_counter()
+        model.encode([text], normalize_embeddings=True)
+        single.append(time.perf_counter() - t)
+    single.sort()
+
+    t = time.perf_counter()
+    model.encode(texts, batch_size=64, normalize_embeddings=True)
+    batch_s = time.perf_counter() - t
+
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "single_p50_ms": single[len(single) // 2] * 1000,
+        "single_p90_ms": single[int(len(single) * 0.9)] * 1000,
+        "batch_texts_per_s": len(texts) / batch_s,
+        "rss_peak_mb": _rss_mb(),
+    }
+
+
+def bench(model_name: str, out_dir: Path) -> None:
+    results = []
+    for backend in ("torch", "onnx"):
+        proc = subprocess.run(
+            [sys.executable, __file__, "_measure", backend, "--model", model_name, "--out", str(out_dir)],
+            capture_output=True,
+            text=True,
+            cwd=str(Path(__file__).resolve().parent),
+        )
+        if proc.returncode != 0:
+            print(f"❌ {backend} benchmark failed:\n{proc.stderr[-2000:]}")
+            return
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"{'backend':<8}{'load s':>9}{'p50 ms':>9}{'p90 ms':>9}{'batch/s':>10}{'RSS MB':>9}")
+    for r in results:
+        print(
+            f"{r['backend']:<8}{r['load_s']:>9.2f}{r['single_p50_ms']:>9.1f}{r['single_p90_ms']:>9.1f}"
+            f"{r['batch_texts_per_s']:>10.1f}{r['rss_peak_mb']:>9.0f}"
+        )
+    torch_r, onnx_r = results
+    print(
+        f"ONNX speedup: {onnx_r['batch_texts_per_s'] / torch_r['batch_texts_per_s']:.2f}x batch, "
+        f"{torch_r['single_p50_ms'] / onnx_r['single_p50_ms']:.2f}x single; "
+        f"RSS {onnx_r['rss_peak_mb'] / torch_r['rss_peak_mb']:.0%} of torch"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX export / parity / benchmark for the embedding model")
+    parser.add_argument("command", choices=["export", "check", "bench", "_measure"])
+    parser.add_argument("backend", nargs="?", help=argparse.SUPPRESS)
+    parser.add_argument("--model", default=Config.EMBEDDING_MODEL)
+    parser.add_argument("--out", default=Config.EMBEDDING_ONNX_PATH, help="Export directory")
+    parser.add_argument("--no-quantize", action="store_true", help="Keep fp32 weights")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+    out_dir = Path(args.out).expanduser()
+
+    if args.command == "export":
+        export(args.model, out_dir, quantize=not args.no_quantize)
+    elif args.command == "check":
+        sys.exit(0 if check(args.model, out_dir, args.min_cosine) else 1)
+    elif args.command == "bench":
+        bench(args.model, out_dir)
+    else:
+        # Keep library chatter off stdout; the parent parses the last line
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+        print(json.dumps(_measure(args.backend, args.model, out_dir)))
+
+
+if __name__ == "__main__":
+    main()
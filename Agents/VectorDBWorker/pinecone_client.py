@@ -1,5 +1,9 @@
+import json
 import logging
-from typing import List, Dict, Any
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator
 from pinecone import Pinecone
 from config import Config
 
@@ -9,6 +13,10 @@ class PineconeClient:
     def __init__(self):
         self.pc = Pinecone(api_key=Config.PINECONE_API_KEY)
         self.index = self.pc.Index(Config.PINECONE_INDEX_NAME)
+        # Shared across calls so concurrent files can't multiply the request fan-out
+        self._pool = ThreadPoolExecutor(
+            max_workers=Config.PINECONE_UPSERT_WORKERS, thread_name_prefix="pinecone"
+        )
         logger.info(f"Connected to Pinecone index: {Config.PINECONE_INDEX_NAME}")
     
     def upsert_embeddings(self, vectors: List[Dict[str, Any]]) -> bool:
@@ -29,11 +37,96 @@ class PineconeClient:
                 }
             }
         ]
+
+        Vectors are split into batches bounded by PINECONE_UPSERT_BATCH_SIZE and
+        PINECONE_UPSERT_MAX_BYTES, sent in parallel, and each batch is retried
+        with backoff. Returns True only if every batch was upserted.
         """
-        try:
-            self.index.upsert(vectors=vectors)
-            logger.info(f"✓ Upserted {len(vectors)} vectors to Pinecone")
+        if not vectors:
             return True
-        except Exception as e:
-            logger.error(f"Error upserting to Pinecone: {e}")
+
+        started = time.time()
+        batches = list(self._split_batches(vectors))
+        results = list(self._pool.map(self._upsert_batch, batches))
+        elapsed = time.time() - started
+
+        upserted = sum(count for count in results if count)
+        failed = sum(1 for count in results if count is None)
+        rate = upserted / elapsed if elapsed > 0 else 0.0
+        if failed:
+            logger.error(
+                f"Upserted {upserted}/{len(vectors)} vectors to Pinecone; "
+                f"{failed}/{len(batches)} batches failed"
+            )
             return False
+
+        logger.info(
+            f"✓ Upserted {upserted} vectors to Pinecone in {len(batches)} batches "
+            f"({elapsed:.2f}s, {rate:.0f} vectors/s)"
+        )
+        return True
+
+    def _split_batches(self, vectors: List[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """Yield batches that respect both the vector count and request size limits"""
+        max_count = Config.PINECONE_UPSERT_BATCH_SIZE
+        max_bytes = Config.PINECONE_UPSERT_MAX_BYTES
+
+        batch: List[Dict[str, Any]] = []
+        batch_bytes = 0
+        for vector in vectors:
+            size = self._estimate_size(vector)
+            if batch and (len(batch) >= max_count or batch_bytes + size > max_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(vector)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _estimate_size(vector: Dict[str, Any]) -> int:
+        """Approximate serialized size of one vector in the upsert request"""
+        return len(json.dumps(vector, ensure_ascii=False, default=str).encode("utf-8"))
+
+    def _upsert_batch(self, batch: List[Dict[str, Any]]):
+        """Upsert one batch with retries. Returns vector count, or None if it kept failing"""
+        attempts = Config.PINECONE_UPSERT_RETRIES + 1
+        for attempt in range(1, attempts + 1):
+            started = time.time()
+            try:
+                self.index.upsert(vectors=batch)
+                elapsed = time.time() - started
+                logger.debug(
+                    f"Pinecone batch of {len(batch)} vectors took {elapsed * 1000:.0f}ms "
+                    f"(attempt {attempt})"
+                )
+                return len(batch)
+            except Exception as e:
+                if attempt == attempts:
+                    logger.error(f"Error upserting batch of {len(batch)} to Pinecone: {e}")
+                    return None
+                # jittered backoff
+                sleep_s = min(8.0, 0.5 * (2 ** (attempt - 1))) + random.random() * 0.25
+                logger.warning(
+                    f"Pinecone upsert failed (attempt {attempt}/{attempts}): {e}; "
+                    f"retrying in {sleep_s:.1f}s"
+                )
+                time.sleep(sleep_s)
+        return None
+
+    def delete_vectors(self, ids: List[str]) -> bool:
+        """Delete vectors by id, in batches of PINECONE_DELETE_BATCH_SIZE"""
+        if not ids:
+            return True
+        ok = True
+        step = Config.PINECONE_DELETE_BATCH_SIZE
+        for start in range(0, len(ids), step):
+            batch = ids[start:start + step]
+            try:
+                self.index.delete(ids=batch)
+            except Exception as e:
+                logger.error(f"Error deleting {len(batch)} vectors from Pinecone: {e}")
+                ok = False
+        if ok:
+            logger.info(f"✓ Deleted {len(ids)} stale vectors from Pinecone")
+        return ok
@@ -0,0 +1,378 @@
+import hashlib
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from azure_clients import iter_blob_text
+from config import Config
+from manifest import FolderManifest, content_hash
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output on a queue
+_DONE = object()
+
+
+class _FileProgress:
+    """
+    Collects upsert results for the segments of one file, so the manifest is
+    only updated once every segment of the file has landed in Pinecone.
+    """
+
+    def __init__(self, file_path: str, file_name: str, file_hash: str):
+        self.file_path = file_path
+        self.file_name = file_name
+        self.file_hash = file_hash
+        self.vector_ids: List[str] = []
+        self.failed = False
+        self._pending = 0
+        self._last_seen = False
+        self._lock = threading.Lock()
+
+    def submitted(self) -> None:
+        with self._lock:
+            self._pending += 1
+
+    def finished(self, vector_ids: List[str], ok: bool) -> bool:
+        """Record one segment's outcome. Returns True when the whole file is done"""
+        with self._lock:
+            self._pending -= 1
+            self.vector_ids.extend(vector_ids)
+            self.failed = self.failed or not ok
+            return self._last_seen and self._pending == 0
+
+    def last_submitted(self, ok: bool = True) -> bool:
+        """Mark that no more segments will follow. Returns True when the whole file is done"""
+        with self._lock:
+            self._last_seen = True
+            self.failed = self.failed or not ok
+            return self._pending == 0
+
+
+@dataclass
+class _Segment:
+    """A run of consecutive chunks from one file"""
+    progress: _FileProgress
+    start: int
+    chunks: List[str]
+    total_chunks: int
+    last: bool
+    ok: bool = True
+
+
+@dataclass
+class _FileText:
+    """Downloaded file handed to the chunk stage; content is None for streamed files"""
+    file_path: str
+    file_hash: str
+    content: Optional[str] = None
+    total_chunks: int = 0
+    etag: Optional[str] = None  # Version the hash was computed from (streamed files)
+
+
+class FolderPipeline:
+    """
+    Staged pipeline for the files of one blob folder.
+
+    download (thread pool) -> chunk (1 thread) -> embed (caller thread) -> upsert (thread pool)
+
+    Stages are connected by bounded queues so memory stays flat, and blob /
+    Pinecone network waits overlap with the embedding model, which is the
+    only stage that should be busy all the time.
+
+    Files larger than STREAM_THRESHOLD_BYTES are never held in memory whole:
+    they are read in BLOB_RANGE_BYTES ranges, chunked by a generator and
+    handed to the embedder in segments of at most EMBEDDING_BATCH_SIZE chunks.
+
+    When a FolderManifest is given, files whose content hash is unchanged are
+    dropped right after download, and vectors a file no longer produces are
+    deleted once its new vectors are upserted.
+    """
+
+    def __init__(
+        self,
+        blob_client,
+        embedding_engine,
+        pinecone_client,
+        build_vectors: Callable[..., List[Dict[str, Any]]],
+    ):
+        self.blob_client = blob_client
+        self.embedding_engine = embedding_engine
+        self.pinecone_client = pinecone_client
+        self.build_vectors = build_vectors
+
+    def run(
+        self,
+        files: List[str],
+        job_id: str,
+        url: str,
+        blob_folder: str,
+        manifest: Optional[FolderManifest] = None,
+    ) -> int:
+        """Push every file through the pipeline. Returns number of vectors upserted"""
+        started = time.time()
+        skipped: List[str] = []
+        download_workers = max(1, min(Config.DOWNLOAD_WORKERS, len(files)))
+
+        path_queue: "queue.Queue[Any]" = queue.Queue()
+        for file_path in files:
+            path_queue.put(file_path)
+
+        text_queue: "queue.Queue[Any]" = queue.Queue(maxsize=Config.PIPELINE_QUEUE_SIZE)
+        chunk_queue: "queue.Queue[Any]" = queue.Queue(maxsize=Config.PIPELINE_QUEUE_SIZE)
+
+        downloaders = [
+            threading.Thread(
+                target=self._download_stage,
+                args=(path_queue, text_queue, manifest, skipped),
+                name=f"download-{i}",
+                daemon=True,
+            )
+            for i in range(download_workers)
+        ]
+        chunker = threading.Thread(
+            target=self._chunk_stage,
+            args=(text_queue, chunk_queue, download_workers),
+            name="chunk",
+            daemon=True,
+        )
+        for t in downloaders:
+            t.start()
+        chunker.start()
+
+        upserts: List[Future] = []
+        in_flight = threading.BoundedSemaphore(Config.PIPELINE_QUEUE_SIZE)
+        with ThreadPoolExecutor(
+            max_workers=Config.UPSERT_WORKERS, thread_name_prefix="upsert"
+        ) as upsert_pool:
+            self._embed_stage(
+                chunk_queue, upsert_pool, upserts, in_flight, job_id, url, blob_folder, manifest
+            )
+            total = sum(f.result() for f in upserts)
+
+        chunker.join()
+        for t in downloaders:
+            t.join()
+
+        logger.info(
+            f"Pipeline finished {len(files)} files ({len(skipped)} unchanged) -> "
+            f"{total} vectors in {time.time() - started:.1f}s"
+        )
+        return total
+
+    def _download_stage(
+        self,
+        path_queue: "queue.Queue[Any]",
+        text_queue: "queue.Queue[Any]",
+        manifest: Optional[FolderManifest],
+        skipped: List[str],
+    ) -> None:
+        try:
+            while True:
+                try:
+                    file_path = path_queue.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    item = self._download(file_path)
+                except Exception as e:
+                    logger.exception(f"Error downloading {file_path}: {e}")
+                    continue
+                if item is None:
+                    continue
+                if manifest is not None and manifest.is_unchanged(file_path, item.file_hash):
+                    logger.info(f"Unchanged since last run, skipping {file_path}")
+                    skipped.append(file_path)
+                    continue
+                text_queue.put(item)
+        finally:
+            text_queue.put(_DONE)
+
+    def _download(self, file_path: str) -> Optional[_FileText]:
+        downloader = self.blob_client.open_blob_stream(file_path)
+        if downloader is None:
+            return None
+
+        if downloader.size <= Config.STREAM_THRESHOLD_BYTES:
+            content = downloader.readall().decode('utf-8')
+            if not content:
+                # Still passed on, so vectors from an earlier version are deleted
+                logger.warning(f"Empty content in {file_path}")
+            logger.info(f"Downloaded {file_path} ({len(content)} chars)")
+            return _FileText(file_path, content_hash(content), content=content)
+
+        # Large file: one streaming pass for the hash and the chunk count, so the
+        # file can be skipped before any embedding and every vector still
+        # carries total_chunks. The chunk stage streams it again to embed.
+        hasher = hashlib.sha256()
+
+        def hashed_ranges():
+            for data in downloader.chunks():
+                hasher.update(data)
+                yield data
+
+        total_chunks = sum(
+            1 for _ in self.embedding_engine.iter_chunks(iter_blob_text(hashed_ranges()))
+        )
+        if not total_chunks:
+            logger.warning(f"No chunks generated from {file_path}")
+            return _FileText(file_path, hasher.hexdigest(), content="")
+        logger.info(
+            f"Scanned {file_path} ({downloader.size} bytes, {total_chunks} chunks), streaming"
+        )
+        return _FileText(
+            file_path, hasher.hexdigest(), total_chunks=total_chunks, etag=downloader.properties.etag
+        )
+
+    def _chunk_stage(
+        self, text_queue: "queue.Queue[Any]", chunk_queue: "queue.Queue[Any]", producers: int
+    ) -> None:
+        try:
+            remaining = producers
+            while remaining:
+                item = text_queue.get()
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+                try:
+                    self._chunk_file(item, chunk_queue)
+                except Exception as e:
+                    logger.exception(f"Error chunking {item.file_path}: {e}")
+        finally:
+            chunk_queue.put(_DONE)
+
+    def _chunk_file(self, item: _FileText, chunk_queue: "queue.Queue[Any]") -> None:
+        progress = _FileProgress(item.file_path, item.file_path.split('/')[-1], item.file_hash)
+
+        if item.content is not None:
+            chunks = self.embedding_engine.chunk_text(item.content) if item.content else []
+            if not chunks:
+                # An empty last segment records the file with no vectors
+                logger.warning(f"No chunks generated from {item.file_path}")
+            chunk_queue.put(_Segment(progress, 0, chunks, len(chunks), last=True))
+            return
+
+        # Pinned to the scanned version, so the manifest hash and total_chunks
+        # describe exactly the content that gets embedded
+        downloader = self.blob_client.open_blob_stream(item.file_path, etag=item.etag)
+        if downloader is None:
+            logger.error(f"{item.file_path} changed or vanished since it was scanned, retrying next run")
+            return
+        segment: List[str] = []
+        start = 0
+        try:
+            for chunk in self.embedding_engine.iter_chunks(iter_blob_text(downloader.chunks())):
+                segment.append(chunk)
+                if len(segment) >= Config.EMBEDDING_BATCH_SIZE:
+                    chunk_queue.put(_Segment(progress, start, segment, item.total_chunks, last=False))
+                    start += len(segment)
+                    segment = []
+        except Exception:
+            # Close the file out as failed so it is retried on the next run
+            chunk_queue.put(_Segment(progress, start, segment, item.total_chunks, last=True, ok=False))
+            raise
+        chunk_queue.put(_Segment(progress, start, segment, item.total_chunks, last=True))
+
+    def _embed_stage(
+        self,
+        chunk_queue: "queue.Queue[Any]",
+        upsert_pool: ThreadPoolExecutor,
+        upserts: List[Future],
+        in_flight: threading.BoundedSemaphore,
+        job_id: str,
+        url: str,
+        blob_folder: str,
+        manifest: Optional[FolderManifest],
+    ) -> None:
+        pending: List[_Segment] = []
+        pending_chunks = 0
+        while True:
+            item = chunk_queue.get()
+            done = item is _DONE
+            if not done:
+                pending.append(item)
+                pending_chunks += len(item.chunks)
+            # Flush once a full batch is ready, or when the chunker ran dry
+            if pending and (done or pending_chunks >= Config.EMBEDDING_BATCH_SIZE or chunk_queue.empty()):
+                self._embed_batch(
+                    pending, upsert_pool, upserts, in_flight, job_id, url, blob_folder, manifest
+                )
+                pending, pending_chunks = [], 0
+            if done:
+                return
+
+    def _embed_batch(
+        self,
+        pending: List[_Segment],
+        upsert_pool: ThreadPoolExecutor,
+        upserts: List[Future],
+        in_flight: threading.BoundedSemaphore,
+        job_id: str,
+        url: str,
+        blob_folder: str,
+        manifest: Optional[FolderManifest],
+    ) -> None:
+        try:
+            embeddings = self.embedding_engine.encode_batch(
+                [chunk for segment in pending for chunk in segment.chunks]
+            )
+        except Exception as e:
+            logger.exception(f"Error embedding {len(pending)} segments: {e}")
+            for segment in pending:
+                segment.progress.failed = True
+                if segment.last and segment.progress.last_submitted(ok=False):
+                    self._file_done(segment.progress, manifest)
+            return
+
+        offset = 0
+        for segment in pending:
+            progress = segment.progress
+            segment_embeddings = embeddings[offset:offset + len(segment.chunks)]
+            offset += len(segment.chunks)
+            vectors = self.build_vectors(
+                progress.file_path,
+                progress.file_name,
+                segment.chunks,
+                segment_embeddings,
+                job_id,
+                url,
+                blob_folder,
+                start_index=segment.start,
+                total_chunks=segment.total_chunks,
+            )
+            if vectors:
+                progress.submitted()
+                # Backpressure: block the embed stage if Pinecone falls behind
+                in_flight.acquire()
+                future = upsert_pool.submit(self._upsert, progress, vectors, manifest)
+                future.add_done_callback(lambda _f: in_flight.release())
+                upserts.append(future)
+            if segment.last and progress.last_submitted(segment.ok):
+                self._file_done(progress, manifest)
+
+    def _upsert(
+        self,
+        progress: _FileProgress,
+        vectors: List[Dict[str, Any]],
+        manifest: Optional[FolderManifest],
+    ) -> int:
+        ok = False
+        try:
+            ok = self.pinecone_client.upsert_embeddings(vectors)
+        except Exception as e:
+            logger.exception(f"Error upserting vectors for {progress.file_name}: {e}")
+        if progress.finished([v["id"] for v in vectors] if ok else [], ok):
+            self._file_done(progress, manifest)
+        return len(vectors) if ok else 0
+
+    def _file_done(self, progress: _FileProgress, manifest: Optional[FolderManifest]) -> None:
+        if progress.failed:
+            logger.error(f"Failed to upsert vectors for {progress.file_name}")
+            return
+        logger.info(f"✓ {progress.file_name}: {len(progress.vector_ids)} vectors upserted")
+        if manifest is not None:
+            stale = manifest.record(progress.file_path, progress.file_hash, progress.vector_ids)
+            self.pinecone_client.delete_vectors(stale)
@@ -2,8 +2,10 @@ import logging
 import sys
 import time
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 try:
     from dotenv import load_dotenv
@@ -12,9 +14,11 @@ except ImportError:
     pass
 
 from config import Config
-from azure_clients import AzureQueueClient, AzureBlobClient
+from azure_clients import AzureQueueClient, AzureBlobClient, VisibilityHeartbeat
 from embedding_engine import EmbeddingEngine
 from pinecone_client import PineconeClient
+from pipeline import FolderPipeline
+from manifest import ManifestStore
 
 logging.basicConfig(
     level=logging.INFO,
@@ -31,12 +35,24 @@ logger = logging.getLogger(__name__)
 
 
 class VectorDBWorker:
-    def __init__(self):
-        self.queue_client = AzureQueueClient()
-        self.blob_client = AzureBlobClient()
-        self.embedding_engine = EmbeddingEngine()
-        self.pinecone_client = PineconeClient()
+    def __init__(
+        self,
+        queue_client=None,
+        blob_client=None,
+        embedding_engine=None,
+        pinecone_client=None,
+    ):
+        # Clients can be injected (e.g. in-memory stand-ins for benchmark.py)
+        self.queue_client = queue_client or AzureQueueClient()
+        self.blob_client = blob_client or AzureBlobClient()
+        self.embedding_engine = embedding_engine or EmbeddingEngine()
+        self.pinecone_client = pinecone_client or PineconeClient()
+        self.pipeline = FolderPipeline(
+            self.blob_client, self.embedding_engine, self.pinecone_client, self.build_vectors
+        )
+        self.manifest_store = ManifestStore(self.blob_client) if Config.MANIFEST_ENABLED else None
         self.processed_count = 0
+        self._count_lock = threading.Lock()
     
     def process_message(self, message) -> bool:
         """Process one message from embeddings queue"""
@@ -69,14 +85,19 @@ class VectorDBWorker:
                 logger.warning(f"No files found in {blob_folder}, skipping")
                 return True  # Not an error, just empty folder
             
-            # Process each file
-            total_vectors = 0
-            for file_path in files:
-                vectors_count = self.process_file(file_path, job_id, url, blob_folder)
-                total_vectors += vectors_count
+            manifest = self.manifest_store.load(blob_folder) if self.manifest_store else None
+            
+            # Download, chunk, embed and upsert files concurrently
+            total_vectors = self.pipeline.run(files, job_id, url, blob_folder, manifest)
+            
+            if manifest is not None:
+                # Drop vectors of files that disappeared from the folder
+                self.pinecone_client.delete_vectors(manifest.prune(files))
+                self.manifest_store.save(manifest)
             
             logger.info(f"✓ Completed: {len(files)} files, {total_vectors} vectors")
-            self.processed_count += 1
+            with self._count_lock:
+                self.processed_count += 1
             return True
             
         except json.JSONDecodeError as e:
@@ -88,12 +109,19 @@ class VectorDBWorker:
     
     def process_file(self, file_path: str, job_id: str, url: str, blob_folder: str) -> int:
         """Process one file: download, chunk, embed, upsert to Pinecone"""
+        prepared = self.load_chunks(file_path)
+        if not prepared:
+            return 0
+        return self.embed_and_upsert([prepared], job_id, url, blob_folder)
+    
+    def load_chunks(self, file_path: str) -> Optional[Tuple[str, str, List[str]]]:
+        """Download and chunk one file. Returns (file_path, file_name, chunks) or None"""
         try:
             # Download file content
             content = self.blob_client.download_blob_content(file_path)
             if not content:
                 logger.warning(f"Empty content in {file_path}, skipping")
-                return 0
+                return None
             
             # Extract file name
             file_name = file_path.split('/')[-1]
@@ -102,50 +130,89 @@ class VectorDBWorker:
             chunks = self.embedding_engine.chunk_text(content)
             if not chunks:
                 logger.warning(f"No chunks generated from {file_path}")
-                return 0
-            
-            # Generate embeddings and prepare vectors
-            vectors = []
-            for i, chunk in enumerate(chunks):
-                embedding = self.embedding_engine.encode(chunk)
-                if not embedding:
-                    logger.warning(f"Empty embedding for chunk {i} in {file_path}")
-                    continue
-                
-                # Create unique ID: job_id + file_name + chunk_index
-                vector_id = f"{job_id}_{file_name}_{i}".replace('/', '_').replace('.', '_')
-                
-                vector = {
-                    "id": vector_id,
-                    "values": embedding,
-                    "metadata": {
-                        "job_id": job_id,
-                        "url": url,
-                        "blob_folder": blob_folder,
-                        "file_name": file_name,
-                        "file_path": file_path,
-                        "chunk_index": i,
-                        "total_chunks": len(chunks),
-                        "text": chunk[:500]  # Store first 500 chars of chunk
-                    }
-                }
-                vectors.append(vector)
-            
-            # Upsert to Pinecone
-            if vectors:
-                success = self.pinecone_client.upsert_embeddings(vectors)
-                if success:
-                    logger.info(f"✓ {file_name}: {len(vectors)} vectors upserted")
-                    return len(vectors)
-                else:
-                    logger.error(f"Failed to upsert vectors for {file_name}")
-                    return 0
+                return None
             
-            return 0
+            return file_path, file_name, chunks
             
         except Exception as e:
             logger.exception(f"Error processing file {file_path}: {e}")
+            return None
+    
+    def embed_and_upsert(
+        self,
+        files: List[Tuple[str, str, List[str]]],
+        job_id: str,
+        url: str,
+        blob_folder: str,
+    ) -> int:
+        """Embed the chunks of one or more files in batched passes, then upsert per file"""
+        try:
+            all_chunks = [chunk for _, _, chunks in files for chunk in chunks]
+            embeddings = self.embedding_engine.encode_batch(all_chunks)
+        except Exception as e:
+            logger.exception(f"Error embedding {len(files)} files: {e}")
             return 0
+        
+        total = 0
+        offset = 0
+        for file_path, file_name, chunks in files:
+            file_embeddings = embeddings[offset:offset + len(chunks)]
+            offset += len(chunks)
+            vectors = self.build_vectors(
+                file_path, file_name, chunks, file_embeddings, job_id, url, blob_folder
+            )
+            
+            # Upsert to Pinecone
+            if not vectors:
+                continue
+            if self.pinecone_client.upsert_embeddings(vectors):
+                logger.info(f"✓ {file_name}: {len(vectors)} vectors upserted")
+                total += len(vectors)
+            else:
+                logger.error(f"Failed to upsert vectors for {file_name}")
+        
+        return total
+    
+    def build_vectors(
+        self,
+        file_path: str,
+        file_name: str,
+        chunks: List[str],
+        embeddings: List[List[float]],
+        job_id: str,
+        url: str,
+        blob_folder: str,
+        start_index: int = 0,
+        total_chunks: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Pair chunks with their embeddings and attach Pinecone metadata"""
+        if total_chunks is None:
+            total_chunks = len(chunks)
+        vectors = []
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings), start=start_index):
+            if not embedding:
+                logger.warning(f"Empty embedding for chunk {i} in {file_path}")
+                continue
+            
+            # Create unique ID: job_id + file_name + chunk_index
+            vector_id = f"{job_id}_{file_name}_{i}".replace('/', '_').replace('.', '_')
+            
+            vector = {
+                "id": vector_id,
+                "values": embedding,
+                "metadata": {
+                    "job_id": job_id,
+                    "url": url,
+                    "blob_folder": blob_folder,
+                    "file_name": file_name,
+                    "file_path": file_path,
+                    "chunk_index": i,
+                    "total_chunks": total_chunks,
+                    "text": chunk[:500]  # Store first 500 chars of chunk
+                }
+            }
+            vectors.append(vector)
+        return vectors
     
     def run(self):
         """Main worker loop"""
@@ -156,40 +223,81 @@ class VectorDBWorker:
         logger.info(f"{'='*80}\n")
         
         no_message_logged = False
+        in_flight: Set[Future] = set()
+        heartbeat = VisibilityHeartbeat(
+            self.queue_client, Config.VISIBILITY_RENEW_SEC, Config.VISIBILITY_TIMEOUT
+        )
+        heartbeat.start()
+        pool = ThreadPoolExecutor(max_workers=Config.MESSAGE_WORKERS, thread_name_prefix="message")
         
-        while True:
-            try:
-                # Receive message from queue
-                message = self.queue_client.receive_message()
-                
-                if not message:
-                    if not no_message_logged:
-                        logger.info("Waiting for messages...")
-                        no_message_logged = True
+        try:
+            while True:
+                try:
+                    # Only fetch more work when a worker slot is free; anything
+                    # received stays hidden via the heartbeat until it is done
+                    if len(in_flight) >= Config.MESSAGE_WORKERS:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        self._reap(done)
+                        continue
+                    
+                    free_slots = Config.MESSAGE_WORKERS - len(in_flight)
+                    messages = self.queue_client.receive_messages(
+                        min(Config.MESSAGE_BATCH_SIZE, free_slots)
+                    )
+                    
+                    if not messages:
+                        if not in_flight and not no_message_logged:
+                            logger.info("Waiting for messages...")
+                            no_message_logged = True
+                        if in_flight:
+                            done, in_flight = wait(
+                                in_flight, timeout=Config.POLL_INTERVAL_SEC, return_when=FIRST_COMPLETED
+                            )
+                            self._reap(done)
+                        else:
+                            time.sleep(Config.POLL_INTERVAL_SEC)
+                        continue
+                    
+                    no_message_logged = False
+                    
+                    for message in messages:
+                        heartbeat.track(message)
+                        in_flight.add(pool.submit(self.handle_message, message, heartbeat))
+                    
+                except KeyboardInterrupt:
+                    raise
+                except Exception as e:
+                    logger.exception(f"Worker loop error: {e}")
                     time.sleep(Config.POLL_INTERVAL_SEC)
-                    continue
-                
-                no_message_logged = False
-                
-                # Process message
-                success = self.process_message(message)
-                
-                # Delete message if successful
-                if success:
-                    self.queue_client.delete_message(message)
-                else:
-                    logger.error(f"Failed to process message {message.id}, will retry later")
-                
-                # Small delay between messages
-                time.sleep(1)
-                
-            except KeyboardInterrupt:
-                logger.info(f"\nWorker stopped. Processed: {self.processed_count}")
-                break
+        except KeyboardInterrupt:
+            logger.info("\nStopping, waiting for in-flight messages...")
+            pool.shutdown(wait=True)
+            logger.info(f"Worker stopped. Processed: {self.processed_count}")
+        finally:
+            heartbeat.stop()
+    
+    @staticmethod
+    def _reap(done: Set[Future]):
+        """Surface exceptions raised by finished handle_message futures"""
+        for future in done:
+            try:
+                future.result()
             except Exception as e:
-                logger.exception(f"Worker loop error: {e}")
-                time.sleep(Config.POLL_INTERVAL_SEC)
-
+                logger.exception(f"Message handler crashed: {e}")
+    
+    def handle_message(self, message, heartbeat: VisibilityHeartbeat) -> bool:
+        """Process one message and delete it on success; runs on a pool thread"""
+        try:
+            success = self.process_message(message)
+        finally:
+            heartbeat.untrack(message)
+        
+        # Delete message if successful
+        if success:
+            self.queue_client.delete_message(message)
+        else:
+            logger.error(f"Failed to process message {message.id}, will retry later")
+        return success
 
 if __name__ == "__main__":
     worker = VectorDBWorker()
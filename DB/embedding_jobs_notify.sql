@@ -0,0 +1,30 @@
+-- ============================================================================
+-- embedding_jobs: wake embedding workers as soon as work arrives
+-- ============================================================================
+-- Workers started with EMBEDDING_WAKEUP_MODE=listen block on
+-- LISTEN embedding_jobs instead of polling the table. The payload is the
+-- job's table_name. Postgres folds identical notifications sent in one
+-- transaction, so bulk enqueues cost one wakeup per table.
+--
+-- The channel is the trigger's argument below; if workers run with a
+-- different EMBEDDING_NOTIFY_CHANNEL, change it there to match.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.notify_embedding_jobs()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM pg_notify(TG_ARGV[0], NEW.table_name);
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS embedding_jobs_notify ON public.embedding_jobs;
+
+-- New jobs, and jobs put back to pending by another process
+CREATE TRIGGER embedding_jobs_notify
+AFTER INSERT OR UPDATE OF status ON public.embedding_jobs
+FOR EACH ROW
+WHEN (NEW.status = 'pending')
+EXECUTE FUNCTION public.notify_embedding_jobs('embedding_jobs');
@@ -0,0 +1,32 @@
+-- ============================================================================
+-- embedding_jobs: priority lanes and per-table queue metrics
+-- ============================================================================
+-- Workers split every claimed batch across tables by weight
+-- (EMBEDDING_TABLE_WEIGHTS), so a bulk backfill of one table can no longer
+-- hold up fresh usergrievance rows. Within a table, higher priority jobs
+-- are claimed first, then oldest first.
+-- ============================================================================
+
+ALTER TABLE public.embedding_jobs
+ADD COLUMN IF NOT EXISTS priority smallint NOT NULL DEFAULT 0;
+
+-- Serves both the per-table claim and the "which tables have work" scan
+CREATE INDEX IF NOT EXISTS idx_embedding_jobs_pending
+  ON public.embedding_jobs (table_name, priority DESC, created_at)
+  WHERE status = 'pending';
+
+-- Queue depth and age per table
+CREATE OR REPLACE VIEW public.embedding_jobs_queue_stats AS
+SELECT
+  table_name,
+  count(*) FILTER (WHERE status = 'pending') AS pending,
+  count(*) FILTER (WHERE status = 'processing') AS processing,
+  count(*) FILTER (WHERE status = 'failed') AS failed,
+  count(*) FILTER (WHERE status = 'pending' AND priority > 0) AS pending_prioritized,
+  COALESCE(EXTRACT(EPOCH FROM now() - min(created_at) FILTER (WHERE status = 'pending')), 0)
+    AS oldest_pending_age_sec,
+  COALESCE(avg(EXTRACT(EPOCH FROM now() - created_at)) FILTER (WHERE status = 'pending'), 0)
+    AS avg_pending_age_sec
+FROM public.embedding_jobs
+WHERE status IN ('pending', 'processing', 'failed')
+GROUP BY table_name;
@@ -0,0 +1,33 @@
+-- ============================================================================
+-- Embedding text hashes and duplicate-job coalescing
+-- ============================================================================
+-- Edits to columns that are not embedded (status, updated_at...) still
+-- enqueue embedding_jobs. Workers store a hash of the embedded text next to
+-- each embedding and complete a job without calling the model when the
+-- text is unchanged. When a worker claims a row, the other claimed and
+-- pending jobs for that row (under either spelling of its table name) are
+-- folded into one kept job: they stay 'processing' while it runs and then
+-- take its final status and error ('completed' or 'failed'). If the batch
+-- is aborted they go back to 'pending' with it.
+-- ============================================================================
+
+-- Hash column on every embedded table that exists in this database
+DO $$
+DECLARE
+  t text;
+BEGIN
+  FOREACH t IN ARRAY ARRAY[
+    'usergrievance', 'faqs', 'departmentknowledgebase', 'policydocuments',
+    'citizens', 'users', 'departments', 'aiinsights', 'auditlog'
+  ]
+  LOOP
+    IF to_regclass('public.' || t) IS NOT NULL THEN
+      EXECUTE format('ALTER TABLE public.%I ADD COLUMN IF NOT EXISTS embedding_text_hash text', t);
+    END IF;
+  END LOOP;
+END $$;
+
+-- Lookup of other pending jobs for the rows a worker just claimed
+CREATE INDEX IF NOT EXISTS idx_embedding_jobs_pending_row
+  ON public.embedding_jobs (table_name, row_id)
+  WHERE status = 'pending';